@@ -1,13 +1,17 @@
 import os
 import time
-import re
 import sys
+import uuid
 import streamlit as st
 from dotenv import load_dotenv
 __import__('pysqlite3')
 sys.modules['sqlite3'] = sys.modules.pop('pysqlite3')
 sys.path.append('src')
 from src.trip_agent import TripAgent, TripTasks, TripCrew
+from src.plan_cache import PlanCache
+from src.job_queue import FINISHED_STATUSES, JobQueue, make_job_store
+from src.prefetch import SpeculativePrefetcher
+from src.knowledge_pack import verified_facts
 
 load_dotenv()
 
@@ -20,14 +24,74 @@ st.set_page_config(
 
 
 
-def clean_html_content(content):
-    if not content:
-        return "No content available"
-    content = re.sub(r'<[^>]+>', '', content)
-    content = re.sub(r'\*\*([^*]+)\*\*', r'**\1**', content)
-    content = re.sub(r'\*([^*]+)\*', r'*\1*', content)
-    content = content.replace('```html', '').replace('```', '')
-    return content.strip()
+@st.cache_resource
+def get_plan_cache():
+    return PlanCache(
+        ttl=int(os.getenv("PLAN_CACHE_TTL", 3600)),
+        max_entries=int(os.getenv("PLAN_CACHE_MAX_ENTRIES", 128)),
+        budget_bucket=int(os.getenv("PLAN_CACHE_BUDGET_BUCKET", 0)) or None
+    )
+
+@st.cache_resource
+def get_prefetcher():
+    return SpeculativePrefetcher(delay=float(os.getenv("PREFETCH_DELAY", 1.5)))
+
+@st.cache_resource
+def get_job_queue():
+    plan_cache = get_plan_cache()
+    
+    def run_job(inputs, mode, on_event, previous=None):
+        def compute():
+            crew = TripCrew(inputs, mode=mode)
+            if previous is not None:
+                return crew.replan(*previous, on_event=on_event)
+            return crew.run_crew(on_event=on_event)
+        return plan_cache.get_or_compute(inputs, compute, mode=mode)
+    
+    store = make_job_store(os.getenv("JOB_STORE", "memory"), os.getenv("JOB_STORE_PATH"))
+    return JobQueue(store, max_workers=int(os.getenv("JOB_WORKERS", 2)), run_job=run_job)
+
+# (tab label, heading, task names shown in the tab, text shown until they finish)
+PLAN_SECTIONS = [
+    ("🌆 Destinations", "### 🌆 Recommended Destinations",
+     ["destination_selection", "serendipity_destination"], "Destination recommendations will appear here."),
+    ("🔍 City Research", "### 🔍 Detailed City Research",
+     ["destination_research"], "City research information will appear here."),
+    ("🗓️ Itinerary", "### 🗓️ Day-by-Day Itinerary",
+     ["detailed_itinerary"], "Detailed itinerary will appear here."),
+    ("💸 Budget", "### 💸 Budget Breakdown",
+     ["comprehensive_budget"], "Budget analysis will appear here."),
+    ("🏨 Accommodation", "### 🏨 Accommodation Options",
+     ["accommodation_recommendations"], "Accommodation recommendations will appear here."),
+    ("🚗 Transportation", "### 🚗 Transportation Guide",
+     ["transportation_planning", "local_transport_mastery"], "Transportation options will appear here."),
+    ("💱 Currency & Visa", "### 💱 Currency & Visa Information",
+     ["currency_management", "visa_requirements"], "Currency and visa information will appear here."),
+    ("🛡️ Safety Guide", "### 🛡️ Safety & Emergency Information",
+     ["safety_security_planning"], "Safety and emergency information will appear here."),
+    ("🎒 Packing List", "### 🎒 Packing List",
+     ["smart_packing_guide"], "Packing list will appear here."),
+]
+
+# Tabs that lead with the knowledge pack's verified facts; the LLM is told not to regenerate them
+QUICK_FACTS_TABS = ("💱 Currency & Visa", "🛡️ Safety Guide")
+
+def render_section(placeholder, section, outputs_by_name, quick_facts=""):
+    _, heading, task_names, empty_text = section
+    with placeholder.container():
+        st.markdown(heading)
+        st.markdown('<div class="trip-card">', unsafe_allow_html=True)
+        if quick_facts:
+            st.markdown("#### ✅ Verified Quick Facts")
+            st.markdown(quick_facts)
+        # Job outputs are markdown rendered once when each task finished
+        finished = [outputs_by_name[name] for name in task_names if name in outputs_by_name]
+        if finished:
+            for output in finished:
+                st.markdown(output)
+        else:
+            st.info(empty_text)
+        st.markdown('</div>', unsafe_allow_html=True)
 
 st.markdown('<h1 class="main-header">🌍 AI Travel Planner</h1>', unsafe_allow_html=True)
 
@@ -131,6 +195,72 @@ def clean_emoji_text(text):
         return text.split(" ", 1)[1]
     return text
 
+def current_inputs():
+    return {
+        "travel_type": clean_emoji_text(travel_type),
+        "origin": origin,
+        "origin_zip": origin_zip,
+        "destination": clean_emoji_text(destination),
+        "interests": [clean_emoji_text(interest) for interest in selected_interests],
+        "season": clean_emoji_text(season),
+        "duration": duration,
+        "budget": f"${budget}",
+        "group_size": group_size,
+        "group_type": clean_emoji_text(group_type),
+        "transport_preferences": [clean_emoji_text(pref) for pref in transport_preferences]
+    }
+
+# Fetch the live fares, hotels, rates and routes the prompts use while the user is still filling in the form
+if origin and destination:
+    prefetch_slot = st.session_state.setdefault("prefetch_slot", uuid.uuid4().hex)
+    get_prefetcher().schedule(current_inputs(), slot_id=prefetch_slot)
+
+def render_job(job):
+    status = job['status']
+    if status == "succeeded":
+        st.markdown('<div class="success-banner">✅ Your personalized travel plan is ready!</div>', unsafe_allow_html=True)
+    elif status == "failed":
+        st.error("❌ Sorry, we couldn't generate your travel plan. Please try again.")
+        st.info("💡 This might be due to API limitations or network issues.")
+        if job['error']:
+            st.caption(f"Details: {job['error']}")
+    else:
+        progress = job['completed'] / job['total'] if job['total'] else 0
+        st.progress(progress)
+        if status == "queued":
+            step_text = "⏳ Waiting for a free planner..."
+        else:
+            step_text = f"🧠 AI agents are planning your perfect trip... {job['completed']}/{job['total'] or '?'} tasks done"
+        st.markdown(f'<div class="progress-container">{step_text}</div>', unsafe_allow_html=True)
+    
+    if not job['outputs'] and status in ("succeeded", "failed"):
+        return
+    
+    st.markdown('<h2 class="travel-plan-header">🧳 Your Personalized Travel Plan</h2>', unsafe_allow_html=True)
+    # Mystery plans pick their own destination, so the sidebar's facts would not apply
+    quick_facts = "" if job['mode'] == "mystery" else verified_facts(job['inputs']['destination'], job['inputs'].get('origin'))
+    tabs = st.tabs([section[0] for section in PLAN_SECTIONS])
+    for tab, section in zip(tabs, PLAN_SECTIONS):
+        with tab:
+            render_section(st.empty(), section, job['outputs'], quick_facts if section[0] in QUICK_FACTS_TABS else "")
+    
+    if status == "succeeded":
+        st.markdown("---")
+        st.markdown("### 📤 Export Your Plan")
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            if st.button("📄 Download PDF", key="pdf", use_container_width=True):
+                st.info("PDF download feature coming soon!")
+        
+        with col2:
+            if st.button("📧 Email Plan", key="email", use_container_width=True):
+                st.info("Email feature coming soon!")
+        
+        with col3:
+            if st.button("📱 Share Link", key="share", use_container_width=True):
+                st.info("Share feature coming soon!")
+
 if generate_plan:
     errors = validate_inputs()
     
@@ -139,233 +269,28 @@ if generate_plan:
         for error in errors:
             st.write(f"• {error}")
     else:
-        inputs = {
-            "travel_type": clean_emoji_text(travel_type),
-            "origin": origin,
-            "origin_zip": origin_zip,
-            "destination": clean_emoji_text(destination),
-            "interests": [clean_emoji_text(interest) for interest in selected_interests],
-            "season": clean_emoji_text(season),
-            "duration": duration,
-            "budget": f"${budget}",
-            "group_size": group_size,
-            "group_type": clean_emoji_text(group_type),
-            "transport_preferences": [clean_emoji_text(pref) for pref in transport_preferences]
-        }
-        
-        progress_placeholder = st.empty()
-        status_placeholder = st.empty()
+        inputs = current_inputs()
         
-        try:
-            with st.spinner("🧠 AI agents are planning your perfect trip..."):
-                progress_steps = [
-                    ("🔍 Analyzing preferences...", 12),
-                    ("🌍 Researching destinations...", 25),
-                    ("📊 Gathering local insights...", 38),
-                    ("🗓️ Creating itinerary...", 52),
-                    ("🏨 Finding accommodations...", 65),
-                    ("🚗 Planning transportation...", 78),
-                    ("💰 Calculating budget...", 88),
-                    ("✨ Finalizing recommendations...", 100)
-                ]
-                
-                for step_text, progress_value in progress_steps:
-                    with status_placeholder.container():
-                        st.markdown(f'<div class="progress-container">{step_text}</div>', unsafe_allow_html=True)
-                    progress_placeholder.progress(progress_value / 100)
-                    time.sleep(0.7)
-                
-                crew = TripCrew(inputs)
-                result = crew.run_crew()
-                
-                progress_placeholder.empty()
-                status_placeholder.empty()
-                
-                if result and hasattr(result, 'tasks_output') and len(result.tasks_output) > 0:
-                    st.markdown('<div class="success-banner">✅ Your personalized travel plan is ready!</div>', unsafe_allow_html=True)
-                    
-                    st.markdown('<h2 class="travel-plan-header">🧳 Your Personalized Travel Plan</h2>', unsafe_allow_html=True)
-                    
-                    tabs = st.tabs([
-                        "🌆 Destinations", 
-                        "🔍 City Research",  
-                        "🗓️ Itinerary",
-                        "💸 Budget",
-                        "🏨 Accommodation",
-                        "🚗 Transportation",
-                        "💱 Currency & Visa",
-                        "🛡️ Safety Guide",
-                        "🎒 Packing List"
-                    ])
-                    
-                    task_outputs = result.tasks_output
-                    
-                    with tabs[0]:
-                        st.markdown("### 🌆 Recommended Destinations")
-                        st.markdown('<div class="trip-card">', unsafe_allow_html=True)
-                        if len(task_outputs) > 0:
-                            content = clean_html_content(task_outputs[0].raw)
-                            st.markdown(content)
-                        else:
-                            st.info("Destination recommendations will appear here.")
-                        st.markdown('</div>', unsafe_allow_html=True)
-                    
-                    with tabs[1]:
-                        st.markdown("### 🔍 Detailed City Research")
-                        st.markdown('<div class="trip-card">', unsafe_allow_html=True)
-                        if len(task_outputs) > 1:
-                            content = clean_html_content(task_outputs[1].raw)
-                            st.markdown(content)
-                        else:
-                            st.info("City research information will appear here.")
-                        st.markdown('</div>', unsafe_allow_html=True)
-                    
-                    with tabs[2]:
-                        st.markdown("### 🗓️ Day-by-Day Itinerary")
-                        st.markdown('<div class="trip-card">', unsafe_allow_html=True)
-                        itinerary_found = False
-                        for i, output in enumerate(task_outputs):
-                            if hasattr(output, 'name') and 'itinerary' in output.name.lower():
-                                content = clean_html_content(output.raw)
-                                st.markdown(content)
-                                itinerary_found = True
-                                break
-                        if not itinerary_found and len(task_outputs) > 2:
-                            content = clean_html_content(task_outputs[2].raw)
-                            st.markdown(content)
-                        elif not itinerary_found:
-                            st.info("Detailed itinerary will appear here.")
-                        st.markdown('</div>', unsafe_allow_html=True)
-                    
-                    with tabs[3]:
-                        st.markdown("### 💸 Budget Breakdown")
-                        st.markdown('<div class="trip-card">', unsafe_allow_html=True)
-                        budget_found = False
-                        for i, output in enumerate(task_outputs):
-                            if hasattr(output, 'name') and 'budget' in output.name.lower():
-                                content = clean_html_content(output.raw)
-                                st.markdown(content)
-                                budget_found = True
-                                break
-                        if not budget_found and len(task_outputs) > 3:
-                            content = clean_html_content(task_outputs[3].raw)
-                            st.markdown(content)
-                        elif not budget_found:
-                            st.info("Budget analysis will appear here.")
-                        st.markdown('</div>', unsafe_allow_html=True)
-                    
-                    with tabs[4]:
-                        st.markdown("### 🏨 Accommodation Options")
-                        st.markdown('<div class="trip-card">', unsafe_allow_html=True)
-                        accommodation_found = False
-                        for i, output in enumerate(task_outputs):
-                            if hasattr(output, 'name') and 'accommodation' in output.name.lower():
-                                content = clean_html_content(output.raw)
-                                st.markdown(content)
-                                accommodation_found = True
-                                break
-                        if not accommodation_found and len(task_outputs) > 4:
-                            content = clean_html_content(task_outputs[4].raw)
-                            st.markdown(content)
-                        elif not accommodation_found:
-                            st.info("Accommodation recommendations will appear here.")
-                        st.markdown('</div>', unsafe_allow_html=True)
-                    
-                    with tabs[5]:
-                        st.markdown("### 🚗 Transportation Guide")
-                        st.markdown('<div class="trip-card">', unsafe_allow_html=True)
-                        transport_found = False
-                        for i, output in enumerate(task_outputs):
-                            if hasattr(output, 'name') and 'transport' in output.name.lower():
-                                content = clean_html_content(output.raw)
-                                st.markdown(content)
-                                transport_found = True
-                                break
-                        if not transport_found and len(task_outputs) > 5:
-                            content = clean_html_content(task_outputs[5].raw)
-                            st.markdown(content)
-                        elif not transport_found:
-                            st.info("Transportation options will appear here.")
-                        st.markdown('</div>', unsafe_allow_html=True)
-                    
-                    with tabs[6]:
-                        st.markdown("### 💱 Currency & Visa Information")
-                        st.markdown('<div class="trip-card">', unsafe_allow_html=True)
-                        found_info = False
-                        for i, output in enumerate(task_outputs):
-                            if hasattr(output, 'name') and ('currency' in output.name.lower() or 'visa' in output.name.lower()):
-                                content = clean_html_content(output.raw)
-                                st.markdown(content)
-                                found_info = True
-                                break
-                        if not found_info and len(task_outputs) > 6:
-                            content = clean_html_content(task_outputs[6].raw)
-                            st.markdown(content)
-                        elif not found_info:
-                            st.info("Currency and visa information will appear here.")
-                        st.markdown('</div>', unsafe_allow_html=True)
-                    
-                    with tabs[7]:
-                        st.markdown("### 🛡️ Safety & Emergency Information")
-                        st.markdown('<div class="trip-card">', unsafe_allow_html=True)
-                        safety_found = False
-                        for i, output in enumerate(task_outputs):
-                            if hasattr(output, 'name') and ('safety' in output.name.lower() or 'emergency' in output.name.lower()):
-                                content = clean_html_content(output.raw)
-                                st.markdown(content)
-                                safety_found = True
-                                break
-                        if not safety_found and len(task_outputs) > 7:
-                            content = clean_html_content(task_outputs[7].raw)
-                            st.markdown(content)
-                        elif not safety_found:
-                            st.info("Safety and emergency information will appear here.")
-                        st.markdown('</div>', unsafe_allow_html=True)
-                    
-                    with tabs[8]:
-                        st.markdown("### 🎒 Packing List")
-                        st.markdown('<div class="trip-card">', unsafe_allow_html=True)
-                        packing_found = False
-                        for i, output in enumerate(task_outputs):
-                            if hasattr(output, 'name') and 'packing' in output.name.lower():
-                                content = clean_html_content(output.raw)
-                                st.markdown(content)
-                                packing_found = True
-                                break
-                        if not packing_found and len(task_outputs) > 8:
-                            content = clean_html_content(task_outputs[8].raw)
-                            st.markdown(content)
-                        elif not packing_found:
-                            st.info("Packing list will appear here.")
-                        st.markdown('</div>', unsafe_allow_html=True)
-                    
-                    st.markdown("---")
-                    st.markdown("### 📤 Export Your Plan")
-                    col1, col2, col3 = st.columns(3)
-                    
-                    with col1:
-                        if st.button("📄 Download PDF", key="pdf", use_container_width=True):
-                            st.info("PDF download feature coming soon!")
-                    
-                    with col2:
-                        if st.button("📧 Email Plan", key="email", use_container_width=True):
-                            st.info("Email feature coming soon!")
-                    
-                    with col3:
-                        if st.button("📱 Share Link", key="share", use_container_width=True):
-                            st.info("Share feature coming soon!")
-                
-                else:
-                    st.error("❌ Sorry, we couldn't generate your travel plan. Please try again.")
-                    st.info("💡 This might be due to API limitations or network issues.")
-                    
-        except Exception as e:
-            progress_placeholder.empty()
-            status_placeholder.empty()
-            st.error(f"❌ Something went wrong: {str(e)}")
-            st.info("💡 Try refreshing the page or check your API configuration.")
+        # Re-plan from this session's last plan so only tasks affected by the changed inputs re-run
+        st.session_state["job_id"] = get_job_queue().submit(
+            inputs, previous_job_id=st.session_state.get("job_id")
+        )
+
+# The job runs on the shared worker pool, so reruns (widget changes, button
+# clicks) only re-read its status instead of restarting the plan
+job_id = st.session_state.get("job_id")
+if job_id:
+    job = get_job_queue().status(job_id)
+    if job is None:
+        st.session_state.pop("job_id")
+        st.warning("⚠️ That travel plan is no longer available. Please generate it again.")
+    else:
+        render_job(job)
+        if job['status'] not in FINISHED_STATUSES:
+            time.sleep(1)
+            st.rerun()
 
-if not generate_plan:
+if not st.session_state.get("job_id"):
     st.markdown("---")
     st.markdown('<div class="info-section">', unsafe_allow_html=True)
     st.markdown('</div>', unsafe_allow_html=True)
@@ -0,0 +1,188 @@
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from src.plan_cache import PlanCache
+from src.trip_crew import EnhancedTripCrew
+
+logger = logging.getLogger(__name__)
+
+MODES = ("basic", "full", "mystery", "custom")
+LIST_FIELDS = ("interests", "transport_preferences")
+INT_FIELDS = ("duration", "group_size")
+# Separators accepted inside a CSV cell for list fields
+LIST_SEPARATORS = (";", "|")
+
+
+def _split_list(value):
+    for separator in LIST_SEPARATORS:
+        if separator in value:
+            return [item.strip() for item in value.split(separator) if item.strip()]
+    return [value.strip()] if value.strip() else []
+
+
+def _coerce_csv_row(row):
+    """Turn a CSV row into the inputs shape app.py builds"""
+    item = {name: value for name, value in row.items() if name and value not in (None, "")}
+    for name in LIST_FIELDS:
+        if name in item:
+            item[name] = _split_list(item[name])
+    for name in INT_FIELDS:
+        if name in item:
+            item[name] = int(item[name])
+    if "budget" in item and not str(item["budget"]).startswith("$"):
+        item["budget"] = f"${item['budget']}"
+    return item
+
+
+def read_items(path):
+    """Input sets from a .jsonl or .csv file, each optionally carrying "id" and "mode" fields"""
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as handle:
+            return [_coerce_csv_row(row) for row in csv.DictReader(handle)]
+    with open(path, encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+def completed_ids(path):
+    """IDs already recorded as succeeded in an earlier, possibly interrupted, run"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by an interrupted run
+                continue
+            if record.get("status") == "succeeded":
+                done.add(record["id"])
+    return done
+
+
+class BatchRunner:
+    """Runs EnhancedTripCrew over many input sets and streams one JSON line per item.
+
+    At most concurrency crews run at once. LLM clients, the SerpAPI response
+    cache and the exchange-rate table are process-wide, so every item shares
+    them; identical canonical inputs within a batch are computed once through
+    a PlanCache. Items whose ID is already in the output file as succeeded are
+    skipped, so an interrupted batch can be resumed by running it again.
+    """
+
+    def __init__(self, output_path, mode="full", concurrency=2, task_workers=4, plan_cache=None):
+        self.output_path = output_path
+        self.mode = mode
+        self.concurrency = max(1, int(concurrency))
+        self.task_workers = task_workers
+        self.plan_cache = plan_cache or PlanCache()
+        self._write_lock = threading.Lock()
+
+    def item_id(self, inputs, mode):
+        return self.plan_cache.key_for(inputs, mode)
+
+    def _split_item(self, item):
+        inputs = dict(item)
+        item_id = inputs.pop("id", None)
+        mode = inputs.pop("mode", None) or self.mode
+        return str(item_id) if item_id is not None else self.item_id(inputs, mode), mode, inputs
+
+    def _write(self, record):
+        line = json.dumps(record, default=str) + "\n"
+        with self._write_lock:
+            with open(self.output_path, "a", encoding="utf-8") as handle:
+                handle.write(line)
+                handle.flush()
+
+    def _run_item(self, item_id, mode, inputs, submitted_at):
+        started_at = time.time()
+        error, result = None, None
+        try:
+            result = self.plan_cache.get_or_compute(
+                inputs,
+                lambda: EnhancedTripCrew(inputs, max_workers=self.task_workers, mode=mode).run_crew(),
+                mode=mode
+            )
+            if result is None:
+                error = "The crew did not return a plan"
+        except Exception as e:
+            error = str(e)
+        finished_at = time.time()
+
+        metrics = getattr(result, 'metrics', None)
+        record = {
+            'id': item_id,
+            'mode': mode,
+            'status': "failed" if error else "succeeded",
+            'error': error,
+            'inputs': inputs,
+            'outputs': result.markdown() if not error else {},
+            'data': result.data() if not error else {},
+            'timings': {
+                'queue_time': started_at - submitted_at,
+                'wall_time': finished_at - started_at,
+                'started_at': started_at,
+                'finished_at': finished_at,
+            },
+            'metrics': metrics.summary() if metrics is not None else None,
+        }
+        self._write(record)
+        return record
+
+    def run(self, items, limit=None):
+        """Run every pending item; returns counts of succeeded, failed and skipped items"""
+        done = completed_ids(self.output_path)
+        pending, skipped, seen = [], 0, set()
+        for item in items:
+            item_id, mode, inputs = self._split_item(item)
+            if item_id in done or item_id in seen:
+                skipped += 1
+                continue
+            seen.add(item_id)
+            pending.append((item_id, mode, inputs))
+        if limit is not None:
+            pending = pending[:limit]
+
+        logger.info(f"Running {len(pending)} items ({skipped} already done) with concurrency {self.concurrency}")
+        counts = {'succeeded': 0, 'failed': 0, 'skipped': skipped}
+        submitted_at = time.time()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="trip-batch") as pool:
+            futures = [pool.submit(self._run_item, *entry, submitted_at) for entry in pending]
+            for future in as_completed(futures):
+                record = future.result()
+                counts[record['status']] += 1
+                logger.info(
+                    f"[{counts['succeeded'] + counts['failed']}/{len(pending)}] {record['id']} "
+                    f"{record['status']} in {record['timings']['wall_time']:.1f}s"
+                )
+        return counts
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate trip plans for many input sets")
+    parser.add_argument("input", help="JSONL or CSV file of input sets shaped like the app's inputs")
+    parser.add_argument("output", help="JSONL file results are appended to; re-running resumes it")
+    parser.add_argument("--mode", default="full", choices=MODES, help="mode for items without a \"mode\" field")
+    parser.add_argument("--concurrency", type=int, default=2, help="crews running at once")
+    parser.add_argument("--task-workers", type=int, default=4, help="concurrent tasks within one crew")
+    parser.add_argument("--limit", type=int, default=None, help="run at most this many pending items")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    runner = BatchRunner(args.output, mode=args.mode, concurrency=args.concurrency, task_workers=args.task_workers)
+    counts = runner.run(read_items(args.input), limit=args.limit)
+    print(f"Succeeded: {counts['succeeded']}, failed: {counts['failed']}, skipped: {counts['skipped']}")
+    return 1 if counts['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+import json
+import threading
+import time
+
+from crewai.events.types.llm_events import LLMCallType
+from crewai.llms.base_llm import BaseLLM, llm_call_context
+from pydantic import PrivateAttr
+
+from src.metrics import estimate_tokens
+
+FILLER_WORDS = ("day", "museum", "market", "train", "budget", "hotel", "walk", "dinner", "view", "ticket")
+# Items generated for each array in a structured answer
+SAMPLE_ARRAY_ITEMS = 3
+
+
+def _sample_value(schema, definitions, text):
+    """A value matching a JSON schema, with text for every string"""
+    if "$ref" in schema:
+        return _sample_value(definitions[schema["$ref"].rsplit("/", 1)[-1]], definitions, text)
+    if "anyOf" in schema:
+        options = [option for option in schema["anyOf"] if option.get("type") != "null"]
+        return _sample_value(options[0], definitions, text) if options else None
+    kind = schema.get("type")
+    if kind == "object":
+        return {name: _sample_value(field, definitions, text) for name, field in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [_sample_value(schema.get("items", {}), definitions, text) for _ in range(SAMPLE_ARRAY_ITEMS)]
+    if kind == "integer":
+        return 1
+    if kind == "number":
+        return 100.0
+    if kind == "boolean":
+        return True
+    return text
+
+
+class FakeLLM(BaseLLM):
+    """Deterministic stand-in LLM that answers every call with a fixed-size final answer.
+
+    Each call sleeps for latency seconds to imitate the provider round-trip,
+    answers with JSON matching the task's output_pydantic schema when it has
+    one, then reports prompt_tokens (or an estimate from the messages when None)
+    and completion_tokens through crewai's usual LLM events.
+    """
+
+    latency: float = 0.0
+    prompt_tokens: int | None = None
+    completion_tokens: int = 200
+    _calls: int = PrivateAttr(default=0)
+    _calls_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def __init__(self, model="fake/benchmark-llm", **options):
+        super().__init__(model=model, **options)
+
+    @property
+    def calls(self):
+        return self._calls
+
+    def reset(self):
+        with self._calls_lock:
+            self._calls = 0
+
+    def answer(self):
+        words = " ".join(FILLER_WORDS[index % len(FILLER_WORDS)] for index in range(self.completion_tokens))
+        return f"Thought: I now know the final answer\nFinal Answer: {words}"
+
+    def structured_answer(self, output_model, final_answer=True):
+        schema = output_model.model_json_schema()
+        text = " ".join(FILLER_WORDS[:8])
+        answer = json.dumps(_sample_value(schema, schema.get("$defs", {}), text))
+        return f"Thought: I now know the final answer\nFinal Answer: {answer}" if final_answer else answer
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, response_model=None):
+        with llm_call_context():
+            self._emit_call_started_event(
+                messages=messages, tools=tools, callbacks=callbacks,
+                available_functions=available_functions, from_task=from_task, from_agent=from_agent
+            )
+            with self._calls_lock:
+                self._calls += 1
+            if self.latency:
+                time.sleep(self.latency)
+
+            output_model = getattr(from_task, 'output_pydantic', None)
+            if response_model is not None:
+                response = self.structured_answer(response_model, final_answer=False)
+            elif output_model is not None:
+                response = self.structured_answer(output_model)
+            else:
+                response = self.answer()
+            prompt_tokens = self.prompt_tokens if self.prompt_tokens is not None else estimate_tokens(messages)
+            usage = {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': self.completion_tokens,
+                'total_tokens': prompt_tokens + self.completion_tokens,
+            }
+            self._track_token_usage_internal(usage)
+            self._emit_call_completed_event(
+                response=response, call_type=LLMCallType.LLM_CALL, from_task=from_task,
+                from_agent=from_agent, messages=messages, usage=usage
+            )
+            return response
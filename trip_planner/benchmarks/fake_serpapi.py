@@ -0,0 +1,149 @@
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+RATES = {
+    "USD": 1.0, "EUR": 0.92, "GBP": 0.79, "JPY": 151.2, "INR": 83.4, "AUD": 1.52, "CAD": 1.36,
+    "CHF": 0.88, "CNY": 7.23, "THB": 36.1, "SGD": 1.35, "AED": 3.67, "BRL": 5.05, "MXN": 16.9,
+    "ZAR": 18.6, "TRY": 32.3, "IDR": 15900.0, "KRW": 1370.0, "NZD": 1.66, "EGP": 47.3,
+}
+
+RATE_PATH = re.compile(r"^/v4/latest/([A-Z]{3})$")
+
+# google_hotels results are served in pages linked by next_page_token
+HOTELS_PER_PAGE = 10
+HOTEL_PAGES = 3
+
+
+def serpapi_payload(params):
+    """Canned response shaped like the SerpAPI engine named in params"""
+    engine = params.get("engine", "google")
+    query = params.get("q") or params.get("arrival_id") or "destination"
+    if engine == "google_flights":
+        flights = [
+            {
+                "flights": [{"departure_airport": {"id": params.get("departure_id")},
+                             "arrival_airport": {"id": params.get("arrival_id")},
+                             "airline": f"Airline {index}", "duration": 420 + 15 * index}],
+                "total_duration": 420 + 15 * index,
+                "price": 480 + 35 * index,
+            }
+            for index in range(5)
+        ]
+        return {"best_flights": flights[:2], "other_flights": flights[2:]}
+    if engine == "google_hotels":
+        page = int(params.get("next_page_token", "page-0").rsplit("-", 1)[-1])
+        payload = {"properties": [
+            {"name": f"{query} Hotel {index}", "overall_rating": round(4.8 - (index % 10) * 0.1, 1),
+             "rate_per_night": {"extracted_lowest": 90 + 20 * index}}
+            for index in range(page * HOTELS_PER_PAGE, (page + 1) * HOTELS_PER_PAGE)
+        ]}
+        if page + 1 < HOTEL_PAGES:
+            payload["serpapi_pagination"] = {"next_page_token": f"page-{page + 1}"}
+        return payload
+    if engine == "google_maps_directions":
+        return {"directions": [{"travel_mode": params.get("travel_mode", "driving"),
+                                "distance": 12400, "duration": 1500}]}
+    if engine == "google_maps":
+        return {"local_results": [
+            {"title": f"{query} Place {index}", "rating": 4.7 - index * 0.1, "type": params.get("type")}
+            for index in range(10)
+        ]}
+    return {
+        "local_results": {"places": [
+            {"title": f"{query} office {index}", "rating": 4.5, "type": "Consulate",
+             "address": f"{index + 1} Main St"}
+            for index in range(3)
+        ]},
+        "organic_results": [
+            {"title": f"{query} result {index}", "link": f"https://example.com/{index}"}
+            for index in range(10)
+        ],
+    }
+
+
+def rate_payload(base):
+    if base not in RATES:
+        return None
+    return {
+        "base": base,
+        "date": "2025-01-01",
+        "rates": {code: rate / RATES[base] for code, rate in RATES.items()},
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {name: values[0] for name, values in parse_qs(url.query).items()}
+        self.server.record(url.path)
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        rate_match = RATE_PATH.match(url.path)
+        if url.path == "/search":
+            self._send_json(200, serpapi_payload(params))
+        elif rate_match and rate_payload(rate_match.group(1)):
+            self._send_json(200, rate_payload(rate_match.group(1)))
+        else:
+            self._send_json(404, {"error": f"Unknown path {url.path}"})
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeSerpAPIServer(ThreadingHTTPServer):
+    """Local HTTP server imitating the serpapi.com and exchangerate-api.com endpoints.
+
+    Serves /search for every SerpAPI engine the services use and
+    /v4/latest/<BASE> for exchange rates, each after an optional latency.
+    Point the services at it with SERPAPI_BASE_URL and EXCHANGE_RATE_BASE_URL.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        super().__init__((host, port), _Handler)
+        self.latency = latency
+        self.requests = {}
+        self._requests_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, path):
+        with self._requests_lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def request_count(self):
+        with self._requests_lock:
+            return sum(self.requests.values())
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-serpapi", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -0,0 +1,237 @@
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from functools import partial
+
+import numpy as np
+
+from .fake_llm import FakeLLM
+from .fake_serpapi import FakeSerpAPIServer
+
+MODES = ("basic", "full", "mystery", "custom")
+# "api" exercises APIIntegrationService directly against the fake server
+SCENARIOS = MODES + ("api",)
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Metrics compared against the baseline; higher is worse for all of them
+COMPARED_METRICS = ("wall_p50", "wall_p95", "llm_calls", "cpu_time", "peak_memory_mb")
+
+BENCHMARK_INPUTS = {
+    "travel_type": "Adventure",
+    "origin": "New York, USA",
+    "origin_zip": "10001",
+    "destination": "Japan",
+    "interests": ["Food", "History", "Budget travel"],
+    "season": "Spring",
+    "duration": 7,
+    "budget": "$3000",
+    "group_size": 2,
+    "group_type": "Couple",
+    "transport_preferences": ["Train", "Walking"],
+}
+
+
+def configure_environment(server):
+    """Point every external dependency at local stand-ins"""
+    os.environ.update({
+        "SERPAPI_KEY": "benchmark",
+        "SERPAPI_BASE_URL": server.base_url,
+        "EXCHANGE_RATE_BASE_URL": server.base_url,
+        "SERPAPI_CACHE_DISABLED": "1",
+        # Provider quotas do not apply to the local stand-ins
+        "RATE_LIMITS": json.dumps({
+            provider: {"rate": 10000, "burst": 10000, "concurrency": 64, "max_concurrency": 64}
+            for provider in ("serpapi", "exchange_rate")
+        }),
+        "CREWAI_DISABLE_TELEMETRY": "true",
+        "OTEL_SDK_DISABLED": "true",
+    })
+
+
+def run_once(mode, workers, quiet=True):
+    from src.trip_crew import EnhancedTripCrew
+
+    crew = EnhancedTripCrew(dict(BENCHMARK_INPUTS), max_workers=workers, mode=mode)
+    # The agents are verbose; their console output is not part of the measurement
+    output = io.StringIO() if quiet else sys.stdout
+    with contextlib.redirect_stdout(output):
+        result = crew.run_crew()
+    if result is None:
+        raise RuntimeError(f"{mode} run failed")
+    return result
+
+
+def run_api_once():
+    from src.api_services import APIIntegrationService
+
+    with APIIntegrationService(cache=False) as service:
+        service.search_flights("JFK", "HND", "2025-04-01", "2025-04-08")
+        service.search_hotels("Tokyo", "2025-04-01", "2025-04-08")
+        service.get_local_info("Tokyo")
+        service.get_directions("Shinjuku", "Asakusa", "transit")
+        service.search_places("Tokyo")
+        service.get_exchange_rate("USD", "JPY")
+
+
+def bench_scenario(run, llm, server, iterations):
+    """Time iterations calls of run after one untimed warm-up call, then one extra traced call for peak memory"""
+    # The first call pays for imports, pool start-up and cold caches
+    llm.reset()
+    run()
+    wall_times, cpu_times, llm_calls, http_requests = [], [], [], []
+    for _ in range(iterations):
+        llm.reset()
+        served = server.request_count()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        run()
+        wall_times.append(time.perf_counter() - wall_start)
+        cpu_times.append(time.process_time() - cpu_start)
+        llm_calls.append(llm.calls)
+        http_requests.append(server.request_count() - served)
+
+    # tracemalloc slows allocation-heavy code, so memory gets its own run
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "wall_p50": float(np.percentile(wall_times, 50)),
+        "wall_p95": float(np.percentile(wall_times, 95)),
+        "llm_calls": float(np.mean(llm_calls)),
+        "http_requests": float(np.mean(http_requests)),
+        # The fake LLM and server only sleep, so process CPU time is the Python-side overhead
+        "cpu_time": float(np.median(cpu_times)),
+        "peak_memory_mb": peak / (1024 * 1024),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Rows of (mode, metric, baseline, current, ratio, regressed)"""
+    rows = []
+    for mode, current in results.items():
+        previous = baseline.get("modes", {}).get(mode)
+        if not previous:
+            continue
+        for metric in COMPARED_METRICS:
+            if metric not in previous:
+                continue
+            before, after = previous[metric], current[metric]
+            ratio = after / before if before else (float("inf") if after else 1.0)
+            # LLM round-trips are deterministic, so any increase counts
+            limit = 1.0 if metric == "llm_calls" else 1.0 + tolerance
+            rows.append((mode, metric, before, after, ratio, ratio > limit))
+    return rows
+
+
+def confirm(rows, confirmation_rows):
+    """Rows whose regression flag is kept only where the confirmation run also regressed on that metric"""
+    confirmed = {(row[0], row[1]) for row in confirmation_rows if row[-1]}
+    return [(*row[:-1], row[-1] and (row[0], row[1]) in confirmed) for row in rows]
+
+
+def print_results(results):
+    print(f"{'mode':<8} {'p50 s':>8} {'p95 s':>8} {'LLM calls':>10} {'HTTP':>6} {'CPU s':>8} {'peak MB':>8}")
+    for mode, stats in results.items():
+        print(
+            f"{mode:<8} {stats['wall_p50']:>8.3f} {stats['wall_p95']:>8.3f} {stats['llm_calls']:>10.1f} "
+            f"{stats['http_requests']:>6.1f} {stats['cpu_time']:>8.3f} {stats['peak_memory_mb']:>8.1f}"
+        )
+
+
+def print_comparison(rows):
+    for mode, metric, before, after, ratio, regressed in rows:
+        flag = "REGRESSION" if regressed else "ok"
+        print(f"{mode:<8} {metric:<15} {before:>10.3f} -> {after:>10.3f} ({ratio:>6.2f}x) {flag}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline trip crew benchmarks against a fake LLM and fake SerpAPI")
+    parser.add_argument("--modes", nargs="+", default=list(SCENARIOS), choices=SCENARIOS)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per fake LLM call")
+    parser.add_argument("--prompt-tokens", type=int, default=None, help="fixed prompt tokens; estimated when omitted")
+    parser.add_argument("--completion-tokens", type=int, default=200)
+    parser.add_argument("--http-latency", type=float, default=0.01, help="seconds per fake API request")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before flagging, e.g. 0.2 = 20%%")
+    parser.add_argument("--output", help="also write the results as JSON to this path")
+    parser.add_argument("--verbose", action="store_true", help="show agent and crew output")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Configured before the crew is imported, so its own basicConfig(level=INFO) call is a no-op
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+
+    from src.llm_pool import shared_llm_pool
+
+    llm = FakeLLM(
+        latency=args.llm_latency,
+        prompt_tokens=args.prompt_tokens,
+        completion_tokens=args.completion_tokens,
+    )
+    shared_llm_pool().override(llm)
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+
+    with FakeSerpAPIServer(latency=args.http_latency) as server:
+        configure_environment(server)
+
+        def measure(mode):
+            if mode == "api":
+                run = run_api_once
+            else:
+                run = partial(run_once, mode, args.workers, quiet=not args.verbose)
+            return bench_scenario(run, llm, server, args.iterations)
+
+        results = {mode: measure(mode) for mode in args.modes}
+        confirmations = {}
+        if baseline is not None:
+            # A flagged scenario is measured again; each flagged metric must regress in that run too
+            flagged = sorted({row[0] for row in compare(results, baseline, args.tolerance) if row[-1]})
+            confirmations = {mode: measure(mode) for mode in flagged}
+
+    config = {key: value for key, value in vars(args).items() if key not in ("baseline", "save_baseline", "output")}
+    report = {"config": config, "modes": results}
+    print_results(results)
+    if confirmations:
+        print("\nRe-measured to confirm:")
+        print_results(confirmations)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    rows = confirm(compare(results, baseline, args.tolerance), compare(confirmations, baseline, args.tolerance))
+    print()
+    print_comparison(rows)
+    return 1 if any(row[-1] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
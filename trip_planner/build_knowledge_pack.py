@@ -0,0 +1,24 @@
+import argparse
+import sys
+
+from src.knowledge_pack import DEFAULT_PACK_PATH, DEFAULT_SOURCE_PATH, KnowledgePack, build_pack
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compile the destination knowledge pack from its JSON source")
+    parser.add_argument("--source", default=DEFAULT_SOURCE_PATH, help="JSON source of country and entry facts")
+    parser.add_argument("--output", default=DEFAULT_PACK_PATH, help="binary pack to write")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    countries, pairs = build_pack(args.source, args.output)
+    pack = KnowledgePack(args.output)
+    print(f"Wrote {args.output}: data version {pack.version}, {countries} country keys, {pairs} origin-destination pairs")
+    pack.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
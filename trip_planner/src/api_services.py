@@ -1,130 +1,486 @@
+import asyncio
+import logging
 import os
+import time
+from functools import partial
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
+from .http_policy import FALLBACK_TIMEOUT, RetryPolicy, resolve_timeouts
+from .response_cache import cache_key, shared_response_cache
+from .exchange_rates import shared_rate_table
+from .metrics import record_api_call
+from .rate_limit import shared_limiter
+from .single_flight import shared_single_flight
+from .serpapi_records import page_from_dict, page_to_dict, project
 
 load_dotenv()
+logger = logging.getLogger(__name__)
 
-class APIIntegrationService:
-    
-    def __init__(self):
+# SERPAPI_BASE_URL / EXCHANGE_RATE_BASE_URL in the environment point the services elsewhere,
+# e.g. at the local stand-in server used by the benchmarks
+SERPAPI_BASE_URL = "https://serpapi.com"
+EXCHANGE_RATE_BASE_URL = "https://api.exchangerate-api.com"
+
+
+class _CountingReader:
+    """Readable wrapper around a streamed body that counts the bytes read"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.size = 0
+
+    def read(self, size=-1):
+        data = self.raw.read(size)
+        self.size += len(data)
+        return data
+
+
+class _APIRequestBuilder:
+    """Request parameters shared by the sync and async API services"""
+
+    def _load_keys(self):
         self.serpapi_key = os.getenv("SERPAPI_KEY")
-        self.exchange_api_key = os.getenv("EXCHANGE_API_KEY")        
+        self.exchange_api_key = os.getenv("EXCHANGE_API_KEY")
         if not self.serpapi_key:
             raise ValueError("SERPAPI_KEY is required for enhanced features")
 
+    def _configure_http(self, retry_policy=None, timeouts=None, cache=None):
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.timeouts = resolve_timeouts(timeouts)
+        # cache=None uses the shared on-disk cache, cache=False disables caching
+        self.cache = shared_response_cache() if cache is None else (cache or None)
+        self.rates = shared_rate_table()
+        # Identical concurrent requests from any thread, loop or session share one upstream call
+        self.flights = shared_single_flight()
+        self.serpapi_url = os.getenv("SERPAPI_BASE_URL", SERPAPI_BASE_URL).rstrip("/") + "/search"
+        self.exchange_rate_url = os.getenv("EXCHANGE_RATE_BASE_URL", EXCHANGE_RATE_BASE_URL).rstrip("/") + "/v4/latest/{base}"
+
+    @staticmethod
+    def _flight_key(params):
+        return ("serpapi", cache_key(params))
+
+    def _endpoint_timeout(self, endpoint):
+        return self.timeouts.get(endpoint, FALLBACK_TIMEOUT)
+
+    @staticmethod
+    def _limiter(endpoint):
+        """Process-wide rate limiter of the provider behind endpoint"""
+        return shared_limiter("exchange_rate" if endpoint == "exchange_rate" else "serpapi")
+
+    def _record_call(self, endpoint, label, started, attempt, response=None, error=None, size=None):
+        status = response.status_code if response is not None else None
+        if size is None:
+            size = len(response.content) if response is not None else 0
+        record_api_call(endpoint, label, status, time.monotonic() - started, size, attempt, error)
+
+    def _log_retry(self, label, attempt, delay, reason):
+        logger.warning(
+            f"{label} attempt {attempt + 1}/{self.retry_policy.max_attempts} failed "
+            f"({reason}); retrying in {delay:.2f}s"
+        )
+
+    def _flight_params(self, origin, destination, departure_date, return_date=None, travel_class="economy"):
+        params = {
+            "engine": "google_flights",
+            "departure_id": origin,
+            "arrival_id": destination,
+            "outbound_date": departure_date,
+            "currency": "USD",
+            "travel_class": travel_class,
+            "api_key": self.serpapi_key
+        }
+        if return_date:
+            params["return_date"] = return_date
+        return params
+
+    def _hotel_params(self, destination, check_in, check_out, adults=2):
+        return {
+            "engine": "google_hotels",
+            "q": destination,
+            "check_in_date": check_in,
+            "check_out_date": check_out,
+            "adults": adults,
+            "currency": "USD",
+            "api_key": self.serpapi_key
+        }
+
+    @staticmethod
+    def _hotel_matches(hotel, filters):
+        price, rating = hotel.price_per_night, hotel.rating
+        if "max_price" in filters and (price is None or price > filters["max_price"]):
+            return False
+        if "min_price" in filters and (price is None or price < filters["min_price"]):
+            return False
+        if "min_rating" in filters and (rating is None or rating < filters["min_rating"]):
+            return False
+        if "min_class" in filters and (hotel.hotel_class or 0) < filters["min_class"]:
+            return False
+        return True
+
+    def _local_info_params(self, location, query_type="visa center"):
+        return {
+            "engine": "google",
+            "q": f"{query_type} near {location}",
+            "location": location,
+            "api_key": self.serpapi_key
+        }
+
+    def _directions_params(self, origin, destination, mode="driving"):
+        return {
+            "engine": "google_maps_directions",
+            "start_addr": origin,
+            "end_addr": destination,
+            "travel_mode": mode,
+            "api_key": self.serpapi_key
+        }
+
+    def _places_params(self, location, place_type="tourist_attraction"):
+        return {
+            "engine": "google_maps",
+            "q": f"{place_type} in {location}",
+            "type": "search",
+            "api_key": self.serpapi_key
+        }
+
+
+class APIIntegrationService(_APIRequestBuilder):
+    """Blocking client for SerpAPI and the exchange-rate API.
+
+    All calls share one keep-alive connection pool. Transient failures (5xx,
+    429, dropped connections) are retried with jittered exponential backoff,
+    and each endpoint has its own (connect, read) timeout.
+    """
+
+    def __init__(self, session=None, retry_policy=None, timeouts=None, pool_size=10, cache=None):
+        self._load_keys()
+        self._configure_http(retry_policy, timeouts, cache)
+        self._owns_session = session is None
+        self.session = session or self._build_session(pool_size)
+
+    @staticmethod
+    def _build_session(pool_size):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def close(self):
+        if self._owns_session:
+            self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _get_json(self, url, params=None, endpoint=None, label="API", parse=None):
+        endpoint = endpoint or params["engine"]
+        timeout = self._endpoint_timeout(endpoint)
+        attempt = 0
+        while True:
+            response = None
+            started = time.monotonic()
+            try:
+                with self._limiter(endpoint).request() as request:
+                    started = time.monotonic()
+                    response = self.session.get(url, params=params, timeout=timeout, stream=parse is not None)
+                    request.report(response.status_code)
+                    if parse is not None and response.ok:
+                        return self._parse_stream(response, parse, endpoint, label, started, attempt)
+                self._record_call(endpoint, label, started, attempt, response)
+                if parse is not None:
+                    # A streamed error response is never parsed; hand its connection back before retrying or raising
+                    response.close()
+                if self.retry_policy.is_retryable_status(response.status_code) and self.retry_policy.can_retry(attempt):
+                    delay = self.retry_policy.delay(attempt, response.headers.get("Retry-After"))
+                    self._log_retry(label, attempt, delay, f"HTTP {response.status_code}")
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                response.raise_for_status()
+                return response.json()
+            except Exception as e:
+                if response is None:
+                    self._record_call(endpoint, label, started, attempt, error=str(e))
+                if self.retry_policy.is_transient_error(e) and self.retry_policy.can_retry(attempt):
+                    delay = self.retry_policy.delay(attempt)
+                    self._log_retry(label, attempt, delay, e)
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                print(f"{label} API error: {e}")
+                raise
+
+    def _parse_stream(self, response, parse, endpoint, label, started, attempt):
+        """parse() the body as it arrives off the socket, so it is never held in memory whole"""
+        response.raw.decode_content = True
+        body = _CountingReader(response.raw)
+        try:
+            return parse(body)
+        finally:
+            response.close()
+            self._record_call(endpoint, label, started, attempt, response, size=body.size)
+
+    def _serpapi_get(self, params, label):
+        return self.flights.do(self._flight_key(params), lambda: self._serpapi_fetch(params, label))
+
+    def _serpapi_fetch(self, params, label):
+        if not self.cache:
+            return self._get_json(self.serpapi_url, params, label=label)
+        return self.cache.get_or_fetch(params, lambda: self._get_json(self.serpapi_url, params, label=label))
+
+    def _serpapi_records(self, params, label, kind):
+        """RecordPage of compact records; only the projection is parsed out of the body and cached"""
+        # The projection is part of the cache key so raw and projected entries never mix
+        key_params = dict(params, projection=kind)
+        parse = partial(project, kind=kind)
+
+        def fetch():
+            return page_to_dict(self._get_json(self.serpapi_url, params, label=label, parse=parse))
+
+        def cached_fetch():
+            return self.cache.get_or_fetch(key_params, fetch) if self.cache else fetch()
+
+        return page_from_dict(self.flights.do(self._flight_key(key_params), cached_fetch), kind)
+
+    def _fetch_rate_table(self, base):
+        return self.flights.do(
+            ("exchange_rate", base),
+            lambda: self._get_json(self.exchange_rate_url.format(base=base), endpoint="exchange_rate", label="Exchange rate")
+        )
+
     def get_exchange_rate(self, from_currency="USD", to_currency="EUR"):
+        self.rates.refresh_if_stale(self._fetch_rate_table)
         try:
-            url = f"https://api.exchangerate-api.com/v4/latest/{from_currency}"
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            if to_currency in data['rates']:
-                return {
-                    'rate': data['rates'][to_currency],
-                    'date': data['date'],
-                    'from': from_currency,
-                    'to': to_currency,
-                    'success': True
-                }
-            else:
-                raise ValueError(f"Currency {to_currency} not found in exchange rates")
-                
-        except Exception as e:
+            return self.rates.quote(from_currency, to_currency)
+        except ValueError as e:
             print(f"Exchange rate API error: {e}")
             raise
 
+    def convert_many(self, amounts, from_currency="USD", to_currency="EUR"):
+        """Convert many amounts, e.g. a whole budget breakdown, with a single rate lookup"""
+        self.rates.refresh_if_stale(self._fetch_rate_table)
+        return self.rates.convert_many(amounts, from_currency, to_currency)
+
     def search_flights(self, origin, destination, departure_date, return_date=None, travel_class="economy"):
-        try:
-            params = {
-                "engine": "google_flights",
-                "departure_id": origin,
-                "arrival_id": destination,
-                "outbound_date": departure_date,
-                "currency": "USD",
-                "travel_class": travel_class,
-                "api_key": self.serpapi_key
-            }
-            
-            if return_date:
-                params["return_date"] = return_date
-            
-            response = requests.get("https://serpapi.com/search", params=params, timeout=30)
-            response.raise_for_status()
-            return response.json()
-            
-        except Exception as e:
-            print(f"Flight search API error: {e}")
-            raise
+        params = self._flight_params(origin, destination, departure_date, return_date, travel_class)
+        return self._serpapi_get(params, "Flight search")
+
+    def search_flight_offers(self, origin, destination, departure_date, return_date=None, travel_class="economy"):
+        """FlightOffer records instead of the raw google_flights response"""
+        params = self._flight_params(origin, destination, departure_date, return_date, travel_class)
+        return self._serpapi_records(params, "Flight search", "flights").records
 
     def search_hotels(self, destination, check_in, check_out, adults=2):
-        try:
-            params = {
-                "engine": "google_hotels",
-                "q": destination,
-                "check_in_date": check_in,
-                "check_out_date": check_out,
-                "adults": adults,
-                "currency": "USD",
-                "api_key": self.serpapi_key
-            }
-            
-            response = requests.get("https://serpapi.com/search", params=params, timeout=30)
-            response.raise_for_status()
-            return response.json()
-            
-        except Exception as e:
-            print(f"Hotel search API error: {e}")
-            raise
+        params = self._hotel_params(destination, check_in, check_out, adults)
+        return self._serpapi_get(params, "Hotel search")
+
+    def iter_hotels(self, destination, check_in, check_out, adults=2, filters=None, limit=None, max_pages=10):
+        """Yield HotelOffer records one at a time, fetching the next page only when the caller asks for more.
+
+        filters may hold max_price and min_price (USD per night), min_rating
+        and min_class. Price bounds are also sent to SerpAPI so fewer
+        non-matching hotels come back. Stop iterating, or pass limit, and no
+        further pages are fetched.
+        """
+        filters = filters or {}
+        params = self._hotel_params(destination, check_in, check_out, adults)
+        params.update({name: filters[name] for name in ("max_price", "min_price") if name in filters})
+        matched = 0
+        for _ in range(max_pages):
+            page = self._serpapi_records(params, "Hotel search", "hotels")
+            for hotel in page.records:
+                if not self._hotel_matches(hotel, filters):
+                    continue
+                yield hotel
+                matched += 1
+                if limit is not None and matched >= limit:
+                    return
+            if not page.next_page_token:
+                return
+            params = dict(params, next_page_token=page.next_page_token)
 
     def get_local_info(self, location, query_type="visa center"):
-        try:
-            params = {
-                "engine": "google",
-                "q": f"{query_type} near {location}",
-                "location": location,
-                "api_key": self.serpapi_key
-            }
-            
-            response = requests.get("https://serpapi.com/search", params=params, timeout=20)
-            response.raise_for_status()
-            return response.json()
-            
-        except Exception as e:
-            print(f"Local search API error: {e}")
-            raise
+        params = self._local_info_params(location, query_type)
+        return self._serpapi_get(params, "Local search")
 
     def get_directions(self, origin, destination, mode="driving"):
-        try:
-            params = {
-                "engine": "google_maps_directions",
-                "start_addr": origin,
-                "end_addr": destination,
-                "travel_mode": mode,
-                "api_key": self.serpapi_key
-            }
-            
-            response = requests.get("https://serpapi.com/search", params=params, timeout=20)
-            response.raise_for_status()
-            return response.json()
-            
-        except Exception as e:
-            print(f"Directions API error: {e}")
-            raise
+        params = self._directions_params(origin, destination, mode)
+        return self._serpapi_get(params, "Directions")
+
+    def get_local_places(self, location, query_type="visa center"):
+        """Place records from the local results of get_local_info's search"""
+        params = self._local_info_params(location, query_type)
+        return self._serpapi_records(params, "Local search", "local_places").records
 
     def search_places(self, location, place_type="tourist_attraction"):
+        params = self._places_params(location, place_type)
+        return self._serpapi_get(params, "Places search")
+
+    def get_routes(self, origin, destination, mode="driving"):
+        """Route records instead of the raw google_maps_directions response"""
+        params = self._directions_params(origin, destination, mode)
+        return self._serpapi_records(params, "Directions", "routes").records
+
+    def get_places(self, location, place_type="tourist_attraction"):
+        """Place records instead of the raw google_maps response"""
+        params = self._places_params(location, place_type)
+        return self._serpapi_records(params, "Places search", "places").records
+
+
+class AsyncAPIIntegrationService(_APIRequestBuilder):
+    """Asyncio counterpart of APIIntegrationService backed by a pooled httpx client.
+
+    Use it as an async context manager, or call aclose() when done, so the
+    pooled connections are released.
+    """
+
+    def __init__(self, client=None, max_connections=20, retry_policy=None, timeouts=None, cache=None):
+        self._load_keys()
+        self._configure_http(retry_policy, timeouts, cache)
+        self._refresh_tasks = set()
+        self._owns_client = client is None
+        self._client = client or httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            )
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def aclose(self):
+        if self._owns_client:
+            await self._client.aclose()
+
+    async def _get_json(self, url, params=None, endpoint=None, label="API"):
+        endpoint = endpoint or params["engine"]
+        connect, read = self._endpoint_timeout(endpoint)
+        timeout = httpx.Timeout(read, connect=connect)
+        attempt = 0
+        while True:
+            response = None
+            started = time.monotonic()
+            try:
+                async with self._limiter(endpoint).arequest() as request:
+                    started = time.monotonic()
+                    response = await self._client.get(url, params=params, timeout=timeout)
+                    request.report(response.status_code)
+                self._record_call(endpoint, label, started, attempt, response)
+                if self.retry_policy.is_retryable_status(response.status_code) and self.retry_policy.can_retry(attempt):
+                    delay = self.retry_policy.delay(attempt, response.headers.get("Retry-After"))
+                    self._log_retry(label, attempt, delay, f"HTTP {response.status_code}")
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    continue
+                response.raise_for_status()
+                return response.json()
+            except Exception as e:
+                if response is None:
+                    self._record_call(endpoint, label, started, attempt, error=str(e))
+                if self.retry_policy.is_transient_error(e) and self.retry_policy.can_retry(attempt):
+                    delay = self.retry_policy.delay(attempt)
+                    self._log_retry(label, attempt, delay, e)
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    continue
+                print(f"{label} API error: {e}")
+                raise
+
+    async def _serpapi_get(self, params, label):
+        return await self.flights.do_async(self._flight_key(params), lambda: self._serpapi_fetch(params, label))
+
+    async def _serpapi_fetch(self, params, label):
+        if not self.cache:
+            return await self._get_json(self.serpapi_url, params, label=label)
+        # The cache is SQLite on disk, so its calls run on a worker thread instead of stalling the loop
+        value, state = await asyncio.to_thread(self.cache.lookup, params)
+        if state == "fresh":
+            return value
+        if state == "stale":
+            if self.cache.begin_refresh(params):
+                task = asyncio.create_task(self._refresh_cached(params, label))
+                self._refresh_tasks.add(task)
+                task.add_done_callback(self._refresh_tasks.discard)
+            return value
+        value = await self._get_json(self.serpapi_url, params, label=label)
+        await asyncio.to_thread(self.cache.store, params, value)
+        return value
+
+    async def _refresh_cached(self, params, label):
         try:
-            params = {
-                "engine": "google_maps",
-                "q": f"{place_type} in {location}",
-                "type": "search",
-                "api_key": self.serpapi_key
-            }
-            
-            response = requests.get("https://serpapi.com/search", params=params, timeout=20)
-            response.raise_for_status()
-            return response.json()
-            
+            value = await self._get_json(self.serpapi_url, params, label=label)
+            await asyncio.to_thread(self.cache.store, params, value)
         except Exception as e:
-            print(f"Places search API error: {e}")
-            raise
\ No newline at end of file
+            logger.warning(f"Background cache refresh failed for {label}: {e}")
+        finally:
+            self.cache.end_refresh(params)
+
+    async def _refresh_rates(self):
+        if self.rates.is_stale():
+            url = self.exchange_rate_url.format(base=self.rates.base)
+            data = await self.flights.do_async(
+                ("exchange_rate", self.rates.base),
+                lambda: self._get_json(url, endpoint="exchange_rate", label="Exchange rate")
+            )
+            self.rates.load(data)
+
+    async def get_exchange_rate(self, from_currency="USD", to_currency="EUR"):
+        await self._refresh_rates()
+        try:
+            return self.rates.quote(from_currency, to_currency)
+        except ValueError as e:
+            print(f"Exchange rate API error: {e}")
+            raise
+
+    async def convert_many(self, amounts, from_currency="USD", to_currency="EUR"):
+        await self._refresh_rates()
+        return self.rates.convert_many(amounts, from_currency, to_currency)
+
+    async def search_flights(self, origin, destination, departure_date, return_date=None, travel_class="economy"):
+        params = self._flight_params(origin, destination, departure_date, return_date, travel_class)
+        return await self._serpapi_get(params, "Flight search")
+
+    async def search_hotels(self, destination, check_in, check_out, adults=2):
+        params = self._hotel_params(destination, check_in, check_out, adults)
+        return await self._serpapi_get(params, "Hotel search")
+
+    async def get_local_info(self, location, query_type="visa center"):
+        params = self._local_info_params(location, query_type)
+        return await self._serpapi_get(params, "Local search")
+
+    async def get_directions(self, origin, destination, mode="driving"):
+        params = self._directions_params(origin, destination, mode)
+        return await self._serpapi_get(params, "Directions")
+
+    async def search_places(self, location, place_type="tourist_attraction"):
+        params = self._places_params(location, place_type)
+        return await self._serpapi_get(params, "Places search")
+
+    async def gather(self, **calls):
+        """Await named coroutines concurrently; failed calls come back as their exception"""
+        results = await asyncio.gather(*calls.values(), return_exceptions=True)
+        return dict(zip(calls.keys(), results))
+
+    async def gather_trip_data(self, destination, origin=None, departure_date=None, return_date=None,
+                               check_in=None, check_out=None, adults=2, from_currency="USD",
+                               to_currency=None, place_type="tourist_attraction"):
+        """Fetch everything one trip needs at once; only calls with enough inputs are made"""
+        calls = {
+            'places': self.search_places(destination, place_type)
+        }
+        if origin and departure_date:
+            calls['flights'] = self.search_flights(origin, destination, departure_date, return_date)
+        if check_in and check_out:
+            calls['hotels'] = self.search_hotels(destination, check_in, check_out, adults)
+        if to_currency:
+            calls['exchange_rate'] = self.get_exchange_rate(from_currency, to_currency)
+        return await self.gather(**calls)
@@ -0,0 +1,134 @@
+import logging
+import os
+import re
+
+from .metrics import CHARS_PER_TOKEN, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_TOKENS = 800
+MAX_FACT_CHARS = 240
+MAX_HEADING_CHARS = 60
+
+# Any upper-case three-letter code (NPR, AED, KRW, ...), so costs in every destination currency count
+CURRENCY_CODE = r"(?-i:[A-Z]{3})"
+AMOUNT = re.compile(
+    r"(?:[$€£¥₹]\s?\d[\d,]*(?:\.\d+)?(?:\s?[kK]\b)?"
+    rf"|\b{CURRENCY_CODE}\s?\d[\d,]*(?:\.\d+)?"
+    rf"|\b\d[\d,]*(?:\.\d+)?\s?(?:{CURRENCY_CODE}|dollars?|euros?|pounds?|yen|rupees?|dirhams?|won|baht|rand)\b)",
+    re.IGNORECASE
+)
+HEADING = re.compile(r"^(?:#{1,6}\s+|\*\*[^*]+\*\*:?$|(?:day|option|night)\s+\d+\b)", re.IGNORECASE)
+BULLET = re.compile(r"^(?:[-*•]|\d+[.)])\s+")
+
+SUMMARY_PROMPT = (
+    "Extract only the cost-relevant facts from the travel planning notes below: prices, fares, "
+    "nightly rates, fees, passes and totals, each with the item it belongs to. Answer as short bullet "
+    "points, at most {max_words} words in total, with no commentary.\n\n{notes}"
+)
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Cut text at a line boundary so it stays within roughly max_tokens"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    limit = max_tokens * CHARS_PER_TOKEN
+    cut = text.rfind("\n", 0, limit)
+    return text[:cut if cut > 0 else limit].rstrip()
+
+
+def _clean_line(line):
+    line = BULLET.sub("", line.strip().lstrip("#").strip())
+    line = " ".join(line.replace("**", "").split())
+    return line[:MAX_FACT_CHARS]
+
+
+def extract_cost_facts(text):
+    """Lines of text that state an amount of money, each prefixed with the heading above it"""
+    facts, seen = [], set()
+    heading = None
+    for raw_line in text.splitlines():
+        stripped = raw_line.strip()
+        if not stripped:
+            continue
+        if HEADING.match(stripped):
+            heading = _clean_line(stripped)[:MAX_HEADING_CHARS].rstrip(":")
+        if not AMOUNT.search(stripped):
+            continue
+        line = _clean_line(stripped)
+        # The same line under another heading (e.g. lunch on day 1 and day 2) is a separate cost
+        if (heading, line) in seen:
+            continue
+        seen.add((heading, line))
+        # One self-contained fact per line, so truncation never orphans a label
+        facts.append(f"- {heading}: {line}" if heading and not line.startswith(heading) else f"- {line}")
+    return facts
+
+
+def _share_budget(sizes, total):
+    """Split total tokens across sections so small ones keep everything and big ones share the rest"""
+    shares = [0] * len(sizes)
+    remaining_budget = total
+    pending = sorted(range(len(sizes)), key=lambda index: sizes[index])
+    while pending:
+        fair_share = remaining_budget // len(pending)
+        index = pending.pop(0)
+        shares[index] = min(sizes[index], fair_share)
+        remaining_budget -= shares[index]
+    return shares
+
+
+class CostFactCompactor:
+    """Deterministic digest of the money figures in each context section, capped at max_tokens"""
+
+    def __init__(self, max_tokens=DEFAULT_MAX_TOKENS):
+        self.max_tokens = max_tokens
+
+    def digest(self, name, text):
+        facts = extract_cost_facts(text)
+        body = "\n".join(facts) if facts else "(no cost figures found)"
+        return f"Cost facts from {name}:\n{body}"
+
+    def compact(self, sections):
+        """sections is a list of (task name, raw output); returns one context string"""
+        digests = [self.digest(name, text) for name, text in sections]
+        shares = _share_budget([estimate_tokens(digest) for digest in digests], self.max_tokens)
+        return "\n\n".join(truncate_to_tokens(digest, share) for digest, share in zip(digests, shares))
+
+
+class SummarizerCompactor:
+    """Cost digest written by a cheap LLM, falling back to CostFactCompactor if the call fails"""
+
+    def __init__(self, llm, max_tokens=DEFAULT_MAX_TOKENS, fallback=None):
+        self.llm = llm
+        self.max_tokens = max_tokens
+        self.fallback = fallback or CostFactCompactor(max_tokens)
+
+    def compact(self, sections):
+        notes = "\n\n".join(f"## {name}\n{text}" for name, text in sections)
+        # Roughly three words per four tokens
+        prompt = SUMMARY_PROMPT.format(max_words=self.max_tokens * 3 // 4, notes=notes)
+        try:
+            summary = self.llm.call(prompt)
+        except Exception as e:
+            logger.warning(f"Context summarizer failed, using cost fact extraction: {e}")
+            return self.fallback.compact(sections)
+        return truncate_to_tokens(str(summary).strip(), self.max_tokens)
+
+
+def make_compactor(kind=None, max_tokens=None, llm=None):
+    """Compactor named by kind ("facts", "summary" or "off"), defaulting to CONTEXT_COMPACTION.
+
+    The token cap defaults to CONTEXT_COMPACTION_MAX_TOKENS. "summary" needs an llm.
+    """
+    kind = (kind or os.getenv("CONTEXT_COMPACTION", "facts")).lower()
+    max_tokens = int(max_tokens or os.getenv("CONTEXT_COMPACTION_MAX_TOKENS", DEFAULT_MAX_TOKENS))
+    if kind in ("off", "none", "0"):
+        return None
+    if kind == "facts":
+        return CostFactCompactor(max_tokens)
+    if kind == "summary":
+        if llm is None:
+            raise ValueError("The summary compactor needs an llm")
+        return SummarizerCompactor(llm, max_tokens)
+    raise ValueError(f"Unknown context compaction: {kind}")
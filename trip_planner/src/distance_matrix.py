@@ -0,0 +1,171 @@
+import logging
+
+import numpy as np
+
+from .api_services import APIIntegrationService
+from .fetch_cache import ConcurrentFetchCache
+
+logger = logging.getLogger(__name__)
+
+# Modes whose A->B travel time is close enough to B->A to fetch one direction for both
+SYMMETRIC_MODES = frozenset({"walking", "bicycling", "cycling"})
+
+# Seconds a cached pair stays valid; routes between attractions rarely change
+PAIR_FRESH_FOR = 3 * 24 * 60 * 60
+
+
+def _place_key(place):
+    return " ".join(str(place).split()).casefold()
+
+
+def fastest_route(routes):
+    """(seconds, meters) of the quickest of some Route records, or None"""
+    routes = [route for route in routes if route.duration_seconds is not None]
+    if not routes:
+        return None
+    route = min(routes, key=lambda route: route.duration_seconds)
+    return route.duration_seconds, route.distance_meters if route.distance_meters is not None else np.nan
+
+
+class TravelMatrix:
+    """Travel seconds and meters between places, row to column; NaN where no route was found"""
+
+    def __init__(self, places, mode, seconds, meters):
+        self.places = places
+        self.mode = mode
+        self.seconds = seconds
+        self.meters = meters
+
+    def route_seconds(self, order, return_to_start=False):
+        order = list(order)
+        if return_to_start:
+            order.append(order[0])
+        return float(self.seconds[order[:-1], order[1:]].sum()) if len(order) > 1 else 0.0
+
+    def order(self, start=0, return_to_start=False):
+        """Visiting order of every place, starting at index start"""
+        return order_stops(self.seconds, start, return_to_start)
+
+    def describe_route(self, order):
+        """One line per leg, compact enough for an itinerary prompt"""
+        lines = []
+        for origin, destination in zip(order, order[1:]):
+            seconds = self.seconds[origin, destination]
+            leg = "no route found" if np.isnan(seconds) else f"{seconds / 60:.0f} min {self.mode}"
+            lines.append(f"- {self.places[origin]} -> {self.places[destination]}: {leg}")
+        return "\n".join(lines)
+
+
+def _nearest_neighbour(costs, start):
+    order, unvisited = [start], set(range(len(costs))) - {start}
+    while unvisited:
+        current = order[-1]
+        nearest = min(unvisited, key=lambda place: costs[current, place])
+        order.append(nearest)
+        unvisited.remove(nearest)
+    return order
+
+
+def _route_cost(costs, order):
+    return costs[order[:-1], order[1:]].sum()
+
+
+def order_stops(seconds, start=0, return_to_start=False, max_passes=20):
+    """Nearest-neighbour tour improved by 2-opt segment reversals; the start stop stays first.
+
+    Each candidate reversal is costed over the whole route, so asymmetric
+    (e.g. driving) times are handled correctly. Missing pairs count as far
+    more expensive than any known leg.
+    """
+    count = len(seconds)
+    if count < 3:
+        return list(range(count)) if start == 0 else [start, *[place for place in range(count) if place != start]]
+    known = seconds[~np.isnan(seconds)]
+    penalty = (known.max() if known.size else 1.0) * count * 10
+    costs = np.where(np.isnan(seconds), penalty, seconds)
+    np.fill_diagonal(costs, 0)
+
+    order = _nearest_neighbour(costs, start)
+    if return_to_start:
+        order.append(start)
+    route = np.array(order)
+    best = _route_cost(costs, route)
+    last = len(route) - 1 if return_to_start else len(route)
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, last - 1):
+            for j in range(i + 1, last):
+                candidate = np.concatenate([route[:i], route[i:j + 1][::-1], route[j + 1:]])
+                cost = _route_cost(costs, candidate)
+                if cost < best - 1e-9:
+                    route, best, improved = candidate, cost, True
+        if not improved:
+            break
+    order = route.tolist()
+    return order[:-1] if return_to_start else order
+
+
+class DistanceMatrixService:
+    """Travel-time matrices for sets of attractions, fetching only pairs not already cached.
+
+    Pairs are cached per mode for fresh_for seconds; in SYMMETRIC_MODES one
+    fetch fills both directions. Missing pairs are fetched concurrently,
+    bounded by max_workers, through the service's usual cache, rate limiter
+    and single-flight coalescing.
+
+    itinerary_creation_task gets the gateway city's top attractions in the
+    order this finds, through LiveTripData.attraction_route.
+    """
+
+    def __init__(self, service=None, max_workers=6, fresh_for=PAIR_FRESH_FOR, max_pairs=4096):
+        self.service = service or APIIntegrationService()
+        # Failed pairs stay uncached and are retried next time
+        self.pairs = ConcurrentFetchCache(self._route, fresh_for, max_workers, label="Directions",
+                                          thread_name_prefix="distance-matrix", max_entries=max_pairs)
+
+    def _route(self, mode, origin, destination):
+        """(seconds, meters) of the fastest route, NaN when there is none"""
+        route = fastest_route(self.service.get_routes(origin, destination, mode))
+        return route if route is not None else (np.nan, np.nan)
+
+    def matrix(self, places, mode="driving"):
+        places = list(places)
+        count = len(places)
+        seconds, meters = np.full((count, count), np.nan), np.full((count, count), np.nan)
+        np.fill_diagonal(seconds, 0)
+        np.fill_diagonal(meters, 0)
+
+        symmetric = mode in SYMMETRIC_MODES
+        cells = {
+            (row, column): (mode, _place_key(places[row]), _place_key(places[column]))
+            for row in range(count) for column in range(count)
+            if row != column and not (symmetric and column < row)
+        }
+        routes, missing = self.pairs.lookup(cells.values())
+        if missing:
+            logger.info(f"Fetching {len(missing)} {mode} routes between {count} places")
+            missing = set(missing)
+            requests = {key: (mode, places[row], places[column])
+                        for (row, column), key in cells.items() if key in missing}
+            fetched = self.pairs.fetch_many(requests)
+            if symmetric:
+                # One fetch fills both directions
+                for (mode_key, origin, destination), route in fetched.items():
+                    self.pairs.put((mode_key, destination, origin), route)
+            routes.update(fetched)
+        for (row, column), key in cells.items():
+            if key in routes:
+                seconds[row, column], meters[row, column] = routes[key]
+        if symmetric:
+            upper = np.triu_indices(count, 1)
+            seconds.T[upper], meters.T[upper] = seconds[upper], meters[upper]
+        return TravelMatrix(places, mode, seconds, meters)
+
+    def plan_day(self, places, mode="driving", start=0, return_to_start=False):
+        """(places in visiting order, total travel seconds) for one day's stops"""
+        matrix = self.matrix(places, mode)
+        order = matrix.order(start, return_to_start)
+        return [places[index] for index in order], matrix.route_seconds(order, return_to_start)
+
+    def clear(self):
+        self.pairs.clear()
@@ -0,0 +1,94 @@
+import threading
+import time
+
+import numpy as np
+
+_shared_table = None
+_shared_table_lock = threading.Lock()
+
+
+def shared_rate_table():
+    """Process-wide rate table so every session and service reuses one download"""
+    global _shared_table
+    with _shared_table_lock:
+        if _shared_table is None:
+            _shared_table = ExchangeRateTable()
+        return _shared_table
+
+
+class ExchangeRateTable:
+    """In-memory rate table for a single base currency, with cross rates derived locally.
+
+    Rates are kept as one float64 array indexed through a currency-code map,
+    so any pair is rates[to] / rates[from] and a whole budget converts in one
+    vectorized multiply. The table is replaced at most once per refresh_interval.
+    """
+
+    def __init__(self, base="USD", refresh_interval=3600):
+        self.base = base
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._index = {}
+        self._rates = np.empty(0, dtype=np.float64)
+        self._date = None
+        self._loaded_at = None
+
+    def is_stale(self):
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_interval
+
+    def load(self, data):
+        """Replace the table with an exchangerate-api /latest payload for self.base"""
+        codes = sorted(data['rates'])
+        index = {code: position for position, code in enumerate(codes)}
+        rates = np.fromiter((data['rates'][code] for code in codes), dtype=np.float64, count=len(codes))
+        with self._lock:
+            self._index, self._rates = index, rates
+            self._date = data.get('date')
+            self._loaded_at = time.monotonic()
+
+    def refresh_if_stale(self, fetch_table):
+        """Call fetch_table(base) only when the table is missing or older than refresh_interval"""
+        if not self.is_stale():
+            return
+        with self._refresh_lock:
+            if self.is_stale():
+                self.load(fetch_table(self.base))
+
+    @property
+    def date(self):
+        return self._date
+
+    @property
+    def currencies(self):
+        return list(self._index)
+
+    def _position(self, currency):
+        try:
+            return self._index[currency]
+        except KeyError:
+            raise ValueError(f"Currency {currency} not found in exchange rates") from None
+
+    def rate(self, from_currency, to_currency):
+        with self._lock:
+            rates = self._rates
+            source, target = self._position(from_currency), self._position(to_currency)
+        return float(rates[target] / rates[source])
+
+    def quote(self, from_currency, to_currency):
+        """Rate in the same shape APIIntegrationService.get_exchange_rate has always returned"""
+        return {
+            'rate': self.rate(from_currency, to_currency),
+            'date': self._date,
+            'from': from_currency,
+            'to': to_currency,
+            'success': True
+        }
+
+    def convert_many(self, amounts, from_currency, to_currency):
+        """Convert a sequence or mapping of amounts in one pass; mappings keep their keys"""
+        factor = self.rate(from_currency, to_currency)
+        if isinstance(amounts, dict):
+            values = np.fromiter(amounts.values(), dtype=np.float64, count=len(amounts)) * factor
+            return dict(zip(amounts.keys(), values.tolist()))
+        return np.asarray(amounts, dtype=np.float64) * factor
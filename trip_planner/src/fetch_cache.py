@@ -0,0 +1,84 @@
+import contextvars
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrentFetchCache:
+    """Values kept per key for fresh_for seconds, with the missing ones fetched concurrently.
+
+    fetch(*args) returns the value to cache; if it raises, the key stays
+    uncached so the next lookup retries it. Fetches run in a copy of the
+    caller's context, so API metrics reach the caller's task. Expired entries
+    are dropped when looked up, and beyond max_entries the least recently
+    used are evicted.
+    """
+
+    def __init__(self, fetch, fresh_for, max_workers=6, label="Fetch", thread_name_prefix="fetch-cache",
+                 max_entries=4096):
+        self.fetch = fetch
+        self.fresh_for = fresh_for
+        self.max_entries = max(1, int(max_entries))
+        self.max_workers = max(1, int(max_workers))
+        self.label = label
+        self.thread_name_prefix = thread_name_prefix
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, keys):
+        """({key: value} of the fresh cached keys, [keys that are missing or stale])"""
+        found, missing, now = {}, [], time.time()
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and now - entry[1] < self.fresh_for:
+                    found[key] = entry[0]
+                    self._entries.move_to_end(key)
+                    continue
+                if entry is not None:
+                    del self._entries[key]
+                missing.append(key)
+        return found, missing
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _fetch_one(self, key, args):
+        try:
+            value = self.fetch(*args)
+        except Exception as e:
+            logger.warning(f"{self.label} {args} failed: {e}")
+            return key, None, False
+        self.put(key, value)
+        return key, value, True
+
+    def fetch_many(self, requests):
+        """Fetch {key: fetch args} concurrently; returns {key: value} for the fetches that succeeded"""
+        if not requests:
+            return {}
+        values = {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(requests)),
+                                thread_name_prefix=self.thread_name_prefix) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, self._fetch_one, key, args)
+                       for key, args in requests.items()]
+            for future in futures:
+                key, value, fetched = future.result()
+                if fetched:
+                    values[key] = value
+        return values
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
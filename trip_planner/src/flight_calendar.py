@@ -0,0 +1,108 @@
+import logging
+from datetime import date, timedelta
+
+import numpy as np
+
+from .api_services import APIIntegrationService
+from .fetch_cache import ConcurrentFetchCache
+
+logger = logging.getLogger(__name__)
+
+# A cached cell older than this is fetched again; matches the response cache's google_flights freshness
+CELL_FRESH_FOR = 15 * 60
+
+
+def _as_date(value):
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+
+def cheapest_fare(offers):
+    """Lowest price among FlightOffer records, or None when none has a price"""
+    prices = [offer.price for offer in offers if offer.price is not None]
+    return min(prices) if prices else None
+
+
+class PriceCalendar:
+    """Cheapest round-trip fare per (outbound date, return date); NaN where no fare was found"""
+
+    def __init__(self, origin, destination, outbound_dates, return_dates, prices):
+        self.origin = origin
+        self.destination = destination
+        self.outbound_dates = outbound_dates
+        self.return_dates = return_dates
+        self.prices = prices
+
+    def cheapest(self):
+        """(outbound date, return date, price) of the cheapest cell, or None when every cell is empty"""
+        if np.isnan(self.prices).all():
+            return None
+        row, column = np.unravel_index(np.nanargmin(self.prices), self.prices.shape)
+        return self.outbound_dates[row], self.return_dates[column], float(self.prices[row, column])
+
+    def price(self, outbound_date, return_date):
+        value = self.prices[self.outbound_dates.index(_as_date(outbound_date)),
+                            self.return_dates.index(_as_date(return_date))]
+        return None if np.isnan(value) else float(value)
+
+    def to_markdown(self):
+        """Compact fare table for prompts: outbound dates down, return dates across"""
+        header = "| Out \\ Back | " + " | ".join(day.strftime("%b %d") for day in self.return_dates) + " |"
+        lines = [header, "|" + " --- |" * (len(self.return_dates) + 1)]
+        for outbound, row in zip(self.outbound_dates, self.prices):
+            cells = " | ".join("-" if np.isnan(value) else f"${value:,.0f}" for value in row)
+            lines.append(f"| {outbound.strftime('%b %d')} | {cells} |")
+        best = self.cheapest()
+        if best is not None:
+            lines.append(f"\nCheapest: {best[0]:%b %d} - {best[1]:%b %d} at ${best[2]:,.0f}")
+        return "\n".join(lines)
+
+
+class FlightPriceCalendar:
+    """Flexible-date fare search: one concurrent, capped sweep of google_flights per date window.
+
+    Each (route, class, outbound, return) cell's cheapest fare is cached for
+    fresh_for seconds, so repeating or widening a search only fetches the
+    missing or stale cells. Requests still pass through the service's response
+    cache, rate limiter and single-flight coalescing.
+    """
+
+    def __init__(self, service=None, max_workers=6, fresh_for=CELL_FRESH_FOR, max_cells=4096):
+        self.service = service or APIIntegrationService()
+        # A failed cell stays empty and uncached, so the next sweep retries it
+        self.cells = ConcurrentFetchCache(self._fare, fresh_for, max_workers, label="Fare lookup",
+                                          thread_name_prefix="fare-calendar", max_entries=max_cells)
+
+    def _fare(self, origin, destination, travel_class, outbound, inbound):
+        offers = self.service.search_flight_offers(
+            origin, destination, outbound.isoformat(), inbound.isoformat(), travel_class
+        )
+        return cheapest_fare(offers)
+
+    def calendar(self, origin, destination, outbound_date, trip_length, flex_days=3, return_flex_days=None,
+                 travel_class="economy"):
+        """Fares for outbound_date +/- flex_days against returns trip_length days later +/- return_flex_days"""
+        outbound_date = _as_date(outbound_date)
+        return_flex_days = flex_days if return_flex_days is None else return_flex_days
+        outbound_dates = [outbound_date + timedelta(days=offset) for offset in range(-flex_days, flex_days + 1)]
+        first_return = outbound_date + timedelta(days=trip_length)
+        return_dates = [first_return + timedelta(days=offset)
+                        for offset in range(-return_flex_days, return_flex_days + 1)]
+
+        prices = np.full((len(outbound_dates), len(return_dates)), np.nan)
+        cells = {
+            (row, column): (origin, destination, travel_class, outbound, inbound)
+            for row, outbound in enumerate(outbound_dates)
+            for column, inbound in enumerate(return_dates)
+            if inbound > outbound
+        }
+        fares, missing = self.cells.lookup(cells.values())
+        if missing:
+            logger.info(f"Fetching {len(missing)} of {prices.size} fare cells for {origin} - {destination}")
+            fares.update(self.cells.fetch_many({key: key for key in missing}))
+        for (row, column), key in cells.items():
+            if fares.get(key) is not None:
+                prices[row, column] = fares[key]
+        return PriceCalendar(origin, destination, outbound_dates, return_dates, prices)
+
+    def clear(self):
+        self.cells.clear()
@@ -0,0 +1,81 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import httpx
+import requests
+
+# (connect, read) timeouts in seconds, keyed by SerpAPI engine or "exchange_rate"
+DEFAULT_TIMEOUTS = {
+    "exchange_rate": (3.05, 10),
+    "google_flights": (3.05, 30),
+    "google_hotels": (3.05, 30),
+    "google": (3.05, 20),
+    "google_maps_directions": (3.05, 20),
+    "google_maps": (3.05, 20),
+}
+FALLBACK_TIMEOUT = (3.05, 20)
+
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+TRANSIENT_ERRORS = (
+    ConnectionResetError,
+    requests.exceptions.ConnectionError,
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    httpx.ReadError,
+    httpx.RemoteProtocolError,
+)
+
+
+def resolve_timeouts(overrides=None):
+    """Merge per-endpoint overrides into the defaults; a bare number sets only the read timeout"""
+    timeouts = dict(DEFAULT_TIMEOUTS)
+    for endpoint, value in (overrides or {}).items():
+        if isinstance(value, (int, float)):
+            value = (timeouts.get(endpoint, FALLBACK_TIMEOUT)[0], value)
+        timeouts[endpoint] = tuple(value)
+    return timeouts
+
+
+def parse_retry_after(value):
+    """Return the Retry-After delay in seconds, accepting delta-seconds or an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Jittered exponential backoff for transient HTTP failures"""
+
+    def __init__(self, max_attempts=4, backoff_base=0.5, backoff_max=20.0, retry_after_max=60.0,
+                 retry_statuses=RETRYABLE_STATUSES):
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_after_max = retry_after_max
+        self.retry_statuses = frozenset(retry_statuses)
+
+    def can_retry(self, attempt):
+        return attempt + 1 < self.max_attempts
+
+    def is_retryable_status(self, status_code):
+        return status_code in self.retry_statuses
+
+    def is_transient_error(self, error):
+        return isinstance(error, TRANSIENT_ERRORS)
+
+    def delay(self, attempt, retry_after=None):
+        """Seconds to wait before the next attempt; a server Retry-After wins over backoff"""
+        server_delay = parse_retry_after(retry_after)
+        if server_delay is not None:
+            return min(server_delay, self.retry_after_max)
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
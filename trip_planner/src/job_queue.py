@@ -0,0 +1,274 @@
+import copy
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from .plan_schemas import output_markdown
+from .trip_crew import EnhancedTripCrew
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED_STATUSES = (SUCCEEDED, FAILED)
+
+DEFAULT_JOB_DB_PATH = os.path.join(os.path.expanduser("~"), ".cache", "trip_planner", "jobs.sqlite3")
+
+
+def new_job(inputs, mode, previous_job_id=None):
+    return {
+        'job_id': uuid.uuid4().hex,
+        'status': QUEUED,
+        'inputs': inputs,
+        'mode': mode,
+        'created_at': time.time(),
+        'started_at': None,
+        'finished_at': None,
+        'completed': 0,
+        'total': 0,
+        'outputs': {},
+        'error': None,
+        'previous_job_id': previous_job_id,
+    }
+
+
+class InMemoryJobStore:
+    """Job records for a single process"""
+
+    def __init__(self, max_finished=500):
+        self.max_finished = max_finished
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, job):
+        with self._lock:
+            self._jobs[job['job_id']] = copy.deepcopy(job)
+            self._prune()
+
+    def _prune(self):
+        finished = [job for job in self._jobs.values() if job['status'] in FINISHED_STATUSES]
+        if len(finished) > self.max_finished:
+            finished.sort(key=lambda job: job['finished_at'])
+            for job in finished[:len(finished) - self.max_finished]:
+                del self._jobs[job['job_id']]
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return copy.deepcopy(job) if job else None
+
+    def claim_next(self):
+        with self._lock:
+            queued = [job for job in self._jobs.values() if job['status'] == QUEUED]
+            if not queued:
+                return None
+            job = min(queued, key=lambda job: job['created_at'])
+            job.update(status=RUNNING, started_at=time.time())
+            return copy.deepcopy(job)
+
+    def record_progress(self, job_id, completed, total, task_name=None, output=None):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(completed=completed, total=total)
+            if task_name is not None:
+                job['outputs'][task_name] = output
+
+    def finish(self, job_id, status, outputs=None, error=None):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(status=status, finished_at=time.time(), error=error)
+            if outputs is not None:
+                job['outputs'] = dict(outputs)
+            self._prune()
+
+
+class SQLiteJobStore:
+    """Job records in SQLite, so several app or worker processes can share one queue"""
+
+    COLUMNS = ('job_id', 'status', 'inputs', 'mode', 'created_at', 'started_at', 'finished_at',
+               'completed', 'total', 'outputs', 'error', 'previous_job_id')
+
+    def __init__(self, path=DEFAULT_JOB_DB_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "job_id TEXT PRIMARY KEY, status TEXT NOT NULL, inputs TEXT NOT NULL, mode TEXT NOT NULL, "
+                "created_at REAL NOT NULL, started_at REAL, finished_at REAL, "
+                "completed INTEGER NOT NULL DEFAULT 0, total INTEGER NOT NULL DEFAULT 0, "
+                "outputs TEXT NOT NULL DEFAULT '{}', error TEXT, previous_job_id TEXT)"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            if 'previous_job_id' not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN previous_job_id TEXT")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, created_at)")
+
+    def _row_to_job(self, row):
+        job = dict(zip(self.COLUMNS, row))
+        job['inputs'] = json.loads(job['inputs'])
+        job['outputs'] = json.loads(job['outputs'])
+        return job
+
+    def create(self, job):
+        record = dict(job, inputs=json.dumps(job['inputs']), outputs=json.dumps(job['outputs']))
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO jobs ({', '.join(self.COLUMNS)}) VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                [record[column] for column in self.COLUMNS]
+            )
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def claim_next(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE status = ? "
+                    "ORDER BY created_at LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, started_at = ? WHERE job_id = ?",
+                        (RUNNING, time.time(), row[0])
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return dict(self._row_to_job(row), status=RUNNING)
+
+    def record_progress(self, job_id, completed, total, task_name=None, output=None):
+        with self._lock:
+            if task_name is None:
+                self._conn.execute(
+                    "UPDATE jobs SET completed = ?, total = ? WHERE job_id = ?", (completed, total, job_id)
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE jobs SET completed = ?, total = ?, outputs = json_set(outputs, ?, ?) WHERE job_id = ?",
+                    (completed, total, f'$."{task_name}"', output, job_id)
+                )
+
+    def finish(self, job_id, status, outputs=None, error=None):
+        with self._lock:
+            if outputs is None:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, finished_at = ?, error = ? WHERE job_id = ?",
+                    (status, time.time(), error, job_id)
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, finished_at = ?, error = ?, outputs = ? WHERE job_id = ?",
+                    (status, time.time(), error, json.dumps(outputs), job_id)
+                )
+
+
+def make_job_store(backend="memory", path=None):
+    if backend == "memory":
+        return InMemoryJobStore()
+    if backend == "sqlite":
+        return SQLiteJobStore(path or DEFAULT_JOB_DB_PATH)
+    raise ValueError(f"Unknown job store backend: {backend}")
+
+
+def run_trip_crew(inputs, mode, on_event, previous=None):
+    crew = EnhancedTripCrew(inputs, mode=mode)
+    if previous is not None:
+        previous_inputs, previous_outputs = previous
+        return crew.replan(previous_inputs, previous_outputs, on_event=on_event)
+    return crew.run_crew(on_event=on_event)
+
+
+class JobQueue:
+    """Runs crew jobs on a bounded worker pool; callers poll by job ID.
+
+    Every submit() schedules one claim on the pool. Claims take the oldest
+    queued job in the store, which with SQLiteJobStore may have been
+    submitted by another process.
+
+    A job submitted with previous_job_id re-plans from that job when it
+    succeeded in the same mode: run_job then also receives
+    previous=(previous inputs, previous outputs by task name).
+    """
+
+    def __init__(self, store=None, max_workers=2, run_job=run_trip_crew):
+        self.store = store or InMemoryJobStore()
+        self.run_job = run_job
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="trip-job")
+
+    def submit(self, inputs, mode="full", previous_job_id=None):
+        job = new_job(inputs, mode, previous_job_id)
+        self.store.create(job)
+        self._executor.submit(self._work)
+        return job['job_id']
+
+    def status(self, job_id):
+        return self.store.get(job_id)
+
+    def work_forever(self, poll_interval=2.0, stop_event=None):
+        """Dedicated worker loop: keep claiming jobs from a shared store until stopped"""
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            if not self._work():
+                stop_event.wait(poll_interval)
+
+    def _work(self):
+        job = self.store.claim_next()
+        if job is None:
+            return False
+        job_id = job['job_id']
+
+        def on_event(event):
+            if event.kind == "finished":
+                self.store.record_progress(job_id, event.completed, event.total, event.task_name, output_markdown(event.output))
+            else:
+                self.store.record_progress(job_id, event.completed, event.total)
+
+        try:
+            previous = self._previous_plan(job)
+            if previous is None:
+                result = self.run_job(job['inputs'], job['mode'], on_event)
+            else:
+                result = self.run_job(job['inputs'], job['mode'], on_event, previous=previous)
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            self.store.finish(job_id, FAILED, error=str(e))
+            return True
+
+        if not result or not getattr(result, 'tasks_output', None):
+            self.store.finish(job_id, FAILED, error="The crew did not return a plan")
+            return True
+        outputs = {output.name: output_markdown(output) for output in result.tasks_output}
+        self.store.record_progress(job_id, len(outputs), len(outputs))
+        self.store.finish(job_id, SUCCEEDED, outputs=outputs)
+        return True
+
+    def _previous_plan(self, job):
+        if not job.get('previous_job_id'):
+            return None
+        previous = self.store.get(job['previous_job_id'])
+        if previous is None or previous['status'] != SUCCEEDED or previous['mode'] != job['mode']:
+            return None
+        return previous['inputs'], previous['outputs']
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,188 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DEFAULT_SOURCE_PATH = os.path.join(DATA_DIR, "knowledge_pack.json")
+DEFAULT_PACK_PATH = os.path.join(DATA_DIR, "knowledge_pack.bin")
+
+PACK_MAGIC = b"TKPK"
+FORMAT_VERSION = 1
+# magic, format version, source data version, country index entries, pair index entries
+HEADER = struct.Struct("<4sHIII")
+# key offset, key length, value offset, value length; offsets are from the start of the file
+INDEX_ENTRY = struct.Struct("<IIII")
+
+PAIR_SEPARATOR = "|"
+
+VISA_LABELS = {
+    'visa_free': "Visa-free",
+    'visa_on_arrival': "Visa on arrival",
+    'eta': "Electronic travel authorization required",
+    'e_visa': "e-Visa required",
+    'domestic': "Domestic trip",
+}
+
+
+def _key(text):
+    return " ".join(str(text).split()).casefold()
+
+
+def build_pack(source_path=DEFAULT_SOURCE_PATH, pack_path=DEFAULT_PACK_PATH):
+    """Compile the JSON source into the binary pack; returns (countries, pairs) written"""
+    with open(source_path, encoding="utf-8") as handle:
+        source = json.load(handle)
+
+    countries = {}
+    for name, record in source['countries'].items():
+        value = json.dumps(dict(record, name=name, version=source['version']), separators=(",", ":"))
+        for alias in [name, *record.get('aliases', [])]:
+            countries[_key(alias)] = value
+    pairs = {}
+    for origin, destinations in source['pairs'].items():
+        for destination, record in destinations.items():
+            value = json.dumps(dict(record, origin=origin, destination=destination), separators=(",", ":"))
+            pairs[_key(origin) + PAIR_SEPARATOR + _key(destination)] = value
+
+    # Keys are sorted so lookups can binary-search the index without loading it
+    indexes = [sorted(countries.items()), sorted(pairs.items())]
+    offset = HEADER.size + INDEX_ENTRY.size * (len(countries) + len(pairs))
+    entries, blob, value_offsets = [], bytearray(), {}
+
+    def append(data):
+        blob.extend(data)
+        return offset + len(blob) - len(data)
+
+    for index in indexes:
+        for key, value in index:
+            key_bytes, value_bytes = key.encode("utf-8"), value.encode("utf-8")
+            key_offset = append(key_bytes)
+            # Aliases share their country's record
+            if value_bytes not in value_offsets:
+                value_offsets[value_bytes] = append(value_bytes)
+            entries.append(INDEX_ENTRY.pack(key_offset, len(key_bytes), value_offsets[value_bytes], len(value_bytes)))
+
+    temporary_path = pack_path + ".tmp"
+    with open(temporary_path, "wb") as handle:
+        handle.write(HEADER.pack(PACK_MAGIC, FORMAT_VERSION, source['version'], len(countries), len(pairs)))
+        handle.write(b"".join(entries))
+        handle.write(blob)
+    os.replace(temporary_path, pack_path)
+    return len(countries), len(pairs)
+
+
+class KnowledgePack:
+    """Read-only, memory-mapped destination facts indexed by country and by (origin, destination).
+
+    The OS shares the mapped pages between every process that opens the same
+    file, and a lookup only decodes the one record it finds.
+    """
+
+    def __init__(self, path=DEFAULT_PACK_PATH):
+        self.path = path
+        with open(path, "rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, format_version, self.version, self._countries, self._pairs = HEADER.unpack_from(self._map, 0)
+        if magic != PACK_MAGIC or format_version != FORMAT_VERSION:
+            self._map.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} knowledge pack")
+
+    def _entry(self, position):
+        return INDEX_ENTRY.unpack_from(self._map, HEADER.size + position * INDEX_ENTRY.size)
+
+    def _search(self, first, count, key):
+        target = key.encode("utf-8")
+        low, high = first, first + count
+        while low < high:
+            middle = (low + high) // 2
+            key_offset, key_length, value_offset, value_length = self._entry(middle)
+            candidate = self._map[key_offset:key_offset + key_length]
+            if candidate == target:
+                return json.loads(self._map[value_offset:value_offset + value_length])
+            if candidate < target:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def country(self, name):
+        """Facts for a country name or alias, or None"""
+        return self._search(0, self._countries, _key(name))
+
+    def resolve(self, place):
+        """Canonical country for free text such as "New York, USA", trying comma parts from the right"""
+        for part in [place, *reversed(str(place).split(","))]:
+            record = self.country(part)
+            if record is not None:
+                return record['name']
+        return None
+
+    def pair(self, origin, destination):
+        """Entry facts for travelers from origin visiting destination, or None"""
+        origin_name, destination_name = self.resolve(origin), self.resolve(destination)
+        if origin_name is None or destination_name is None:
+            return None
+        return self._search(self._countries, self._pairs, _key(origin_name) + PAIR_SEPARATOR + _key(destination_name))
+
+    def close(self):
+        self._map.close()
+
+
+_shared_pack = None
+_shared_pack_lock = threading.Lock()
+
+
+def shared_knowledge_pack():
+    """Process-wide pack at KNOWLEDGE_PACK_PATH, or None when it is missing or unreadable"""
+    global _shared_pack
+    with _shared_pack_lock:
+        if _shared_pack is None:
+            try:
+                _shared_pack = KnowledgePack(os.getenv("KNOWLEDGE_PACK_PATH", DEFAULT_PACK_PATH))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Destination knowledge pack unavailable: {e}")
+                return None
+        return _shared_pack
+
+
+def destination_currency(destination, pack=None):
+    """ISO code of the destination country's currency, or None when the pack does not know it"""
+    pack = pack or shared_knowledge_pack()
+    country = pack.country(destination) if pack is not None else None
+    return country['currency'] if country else None
+
+
+def country_facts_lines(country):
+    return [
+        f"- Currency: {country['currency_name']} ({country['currency']})",
+        "- Emergency numbers: " + ", ".join(f"{label} {number}" for label, number in country['emergency'].items()),
+        f"- Power: plug types {', '.join(country['plugs'])}, {country['voltage']}",
+        f"- Driving side: {country['driving_side']}",
+    ]
+
+
+def entry_facts_lines(pair):
+    lines = [f"- Entry for {pair['origin']} citizens: {VISA_LABELS.get(pair['visa'], pair['visa'])}. {pair['rule']}"]
+    if pair.get('max_stay_days'):
+        lines.append(f"- Maximum stay: {pair['max_stay_days']} days")
+    if pair.get('embassy'):
+        lines.append(f"- {pair['origin']} embassy: {pair['embassy']}")
+    return lines
+
+
+def verified_facts(destination, origin=None, pack=None):
+    """Markdown bullet list of the pack's facts for a trip, or "" when the pack has none"""
+    pack = pack or shared_knowledge_pack()
+    if pack is None:
+        return ""
+    country = pack.country(destination)
+    lines = country_facts_lines(country) if country else []
+    pair = pack.pair(origin, destination) if origin else None
+    if pair:
+        lines += entry_facts_lines(pair)
+    return "\n".join(lines)
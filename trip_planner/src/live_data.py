@@ -0,0 +1,210 @@
+import logging
+from datetime import date, timedelta
+
+from .distance_matrix import DistanceMatrixService
+from .flight_calendar import FlightPriceCalendar
+from .knowledge_pack import destination_currency, shared_knowledge_pack
+from .plan_cache import parse_budget
+from .serpapi_records import render_records
+
+logger = logging.getLogger(__name__)
+
+# Middle month of each season the app offers, as seen from the northern hemisphere
+SEASON_MONTHS = {"spring": 4, "summer": 7, "autumn": 10, "fall": 10, "winter": 1}
+
+# Indicative trips start no sooner than this, so fares are still bookable
+MIN_LEAD_DAYS = 21
+
+# Days either side of the indicative outbound and return dates in the fare grid (3 x 3 = 9 searches)
+FARE_FLEX_DAYS = 1
+
+# Itineraries listed for the cheapest dates, and hotels listed for the stay
+FLIGHT_OPTIONS = 5
+HOTEL_OPTIONS = 6
+HOTEL_MAX_PAGES = 2
+
+# Top attractions ordered for the itinerary; an asymmetric mode needs n * (n - 1) directions searches
+ITINERARY_STOPS = 5
+ITINERARY_MODE = "transit"
+
+# Embassy or consulate offices listed for the visa task
+CONSULATE_OPTIONS = 3
+
+BASE_CURRENCY = "USD"
+
+# Share of the total budget the hotel search allows for lodging when capping the nightly rate
+HOTEL_BUDGET_SHARE = 0.4
+
+
+def _count(value, default):
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        return default
+
+
+def travel_window(season, duration, southern=False, today=None):
+    """(outbound, return) dates of an indicative trip: the 15th of the season's middle month.
+
+    The inputs carry a season rather than dates, so live prices are quoted
+    for the next such date at least MIN_LEAD_DAYS away. In the southern
+    hemisphere the season's months are six months later.
+    """
+    text = str(season or "").casefold()
+    month = next((month for name, month in SEASON_MONTHS.items() if name in text), None)
+    earliest = (today or date.today()) + timedelta(days=MIN_LEAD_DAYS)
+    if month is None:
+        outbound = earliest
+    else:
+        if southern:
+            month = (month + 5) % 12 + 1
+        outbound = date(earliest.year, month, 15)
+        if outbound < earliest:
+            outbound = outbound.replace(year=outbound.year + 1)
+    return outbound, outbound + timedelta(days=_count(duration, 7))
+
+
+class LiveTripData:
+    """Prompt sections built from live SerpAPI results for one trip's inputs.
+
+    Each section is text ready for a task description, or "" when the
+    knowledge pack cannot place the trip or the lookup fails, so a prompt
+    never depends on SerpAPI being reachable. Requests go through the
+    service's response cache, rate limiter and single-flight coalescing.
+    """
+
+    # Section method -> inputs keys it reads
+    SECTIONS = {
+        'exchange_rate': ('destination',),
+        'consulates': ('destination', 'origin'),
+        'hotel_offers': ('budget', 'destination', 'duration', 'group_size', 'season'),
+        'flight_fares': ('destination', 'duration', 'origin', 'season'),
+        'attraction_route': ('destination',),
+    }
+
+    def __init__(self, service, pack=None):
+        self.service = service
+        self.pack = pack
+        self.fares = FlightPriceCalendar(service)
+        self.routes = DistanceMatrixService(service)
+
+    def _country(self, place):
+        pack = self.pack or shared_knowledge_pack()
+        name = pack.resolve(place) if pack is not None and place else None
+        return pack.country(name) if name else None
+
+    def _window(self, inputs, country):
+        return travel_window(inputs.get('season'), inputs.get('duration'), country.get('hemisphere') == "south")
+
+    def flight_fares(self, inputs):
+        """Round-trip fare grid around the indicative dates, between both countries' main airports"""
+        origin, destination = self._country(inputs.get('origin')), self._country(inputs.get('destination'))
+        if origin is None or destination is None or origin['name'] == destination['name']:
+            return ""
+        outbound, inbound = self._window(inputs, destination)
+        try:
+            calendar = self.fares.calendar(origin['airport'], destination['airport'], outbound,
+                                           (inbound - outbound).days, flex_days=FARE_FLEX_DAYS)
+        except Exception as e:
+            logger.warning(f"Live fares for {origin['airport']} - {destination['airport']} unavailable: {e}")
+            return ""
+        cheapest = calendar.cheapest()
+        if cheapest is None:
+            return ""
+        section = (
+            f"Live economy fares per traveler, {origin['airport']} ({origin['name']}'s main gateway) to "
+            f"{destination['airport']}, for indicative {inputs.get('season', '')} dates (USD):\n"
+            f"{calendar.to_markdown()}"
+        )
+        try:
+            # Same request as the grid's cheapest cell, so it comes from the response cache
+            offers = self.service.search_flight_offers(origin['airport'], destination['airport'],
+                                                       cheapest[0].isoformat(), cheapest[1].isoformat())
+        except Exception as e:
+            logger.warning(f"Flight offers for {cheapest[0]} - {cheapest[1]} unavailable: {e}")
+            return section
+        offers = sorted(offers, key=lambda offer: (offer.price is None, offer.price or 0))
+        return (
+            f"{section}\n\nItineraries on the cheapest dates ({cheapest[0]:%b %d} - {cheapest[1]:%b %d}):\n"
+            f"{render_records(offers, FLIGHT_OPTIONS)}"
+        )
+
+    def hotel_offers(self, inputs):
+        """Hotels in the destination's gateway city for the indicative stay, capped by the budget's lodging share"""
+        destination = self._country(inputs.get('destination'))
+        if destination is None:
+            return ""
+        check_in, check_out = self._window(inputs, destination)
+        nights, guests = (check_out - check_in).days, _count(inputs.get('group_size'), 2)
+        filters = {}
+        budget = parse_budget(inputs.get('budget', ""))
+        if budget:
+            filters['max_price'] = round(budget * HOTEL_BUDGET_SHARE / nights)
+        try:
+            hotels = list(self.service.iter_hotels(
+                destination['gateway_city'], check_in.isoformat(), check_out.isoformat(), adults=guests,
+                filters=filters, limit=HOTEL_OPTIONS, max_pages=HOTEL_MAX_PAGES
+            ))
+        except Exception as e:
+            logger.warning(f"Live hotels in {destination['gateway_city']} unavailable: {e}")
+            return ""
+        if not hotels:
+            return ""
+        cap = f", up to ${filters['max_price']:,}/night" if filters else ""
+        return (
+            f"Live hotel rates in {destination['gateway_city']}, {check_in:%b %d} - {check_out:%b %d} "
+            f"({nights} nights, {guests} guests{cap}):\n{render_records(hotels)}"
+        )
+
+    def attraction_route(self, inputs):
+        """The gateway city's top attractions in a travel-efficient visiting order, with the time of each leg"""
+        destination = self._country(inputs.get('destination'))
+        if destination is None:
+            return ""
+        city = destination['gateway_city']
+        try:
+            titles = list(dict.fromkeys(place.title for place in self.service.get_places(city) if place.title))
+            stops = [f"{title}, {city}" for title in titles[:ITINERARY_STOPS]]
+            if len(stops) < 2:
+                return ""
+            matrix = self.routes.matrix(stops, ITINERARY_MODE)
+        except Exception as e:
+            logger.warning(f"Attraction routes in {city} unavailable: {e}")
+            return ""
+        order = matrix.order()
+        return (
+            f"Top attractions in {city} in a travel-efficient visiting order "
+            f"({matrix.route_seconds(order) / 60:.0f} min by {ITINERARY_MODE} in total); "
+            f"sequence the days along it:\n{matrix.describe_route(order)}"
+        )
+
+    def exchange_rate(self, inputs):
+        """Today's rate from the US dollar, the budget's currency, to the destination's"""
+        currency = destination_currency(inputs.get('destination'), self.pack)
+        if not currency or currency == BASE_CURRENCY:
+            return ""
+        try:
+            quote = self.service.get_exchange_rate(BASE_CURRENCY, currency)
+        except Exception as e:
+            logger.warning(f"Live {BASE_CURRENCY}/{currency} rate unavailable: {e}")
+            return ""
+        rate = f"{quote['rate']:,.2f}" if quote['rate'] >= 10 else f"{quote['rate']:.4f}"
+        return f"Live exchange rate ({quote['date']}): 1 {BASE_CURRENCY} = {rate} {currency}"
+
+    def consulates(self, inputs):
+        """The destination's embassy or consulate offices near the traveler's origin"""
+        destination = self._country(inputs.get('destination'))
+        origin = inputs.get('origin')
+        if destination is None or not origin or self._country(origin) == destination:
+            return ""
+        try:
+            offices = self.service.get_local_places(origin, f"{destination['name']} embassy or consulate")
+        except Exception as e:
+            logger.warning(f"Live {destination['name']} consulate search near {origin} unavailable: {e}")
+            return ""
+        if not offices:
+            return ""
+        return (
+            f"{destination['name']} embassy or consulate offices near {origin} (live search):\n"
+            f"{render_records(offices, CONSULATE_OPTIONS)}"
+        )
@@ -0,0 +1,117 @@
+import logging
+import os
+import threading
+
+from crewai.llm import LLM
+
+from .rate_limit import limit_llm_calls, provider_for_model, shared_limiter
+
+logger = logging.getLogger(__name__)
+
+GEMINI_MODEL = "gemini/gemini-2.0-flash-exp"
+OPENAI_MODEL = "openai/gpt-4"
+
+# Model prefix -> environment variable holding its API key
+API_KEY_ENVS = {
+    "gemini/": "GEMINI_API_KEY",
+    "openai/": "OPENAI_API_KEY",
+}
+
+
+def api_key_env_for(model):
+    for prefix, api_key_env in API_KEY_ENVS.items():
+        if model.startswith(prefix):
+            return api_key_env
+    return None
+
+
+class LLMPool:
+    """Process-wide LLM clients, built once per model configuration.
+
+    crewai LLM objects hold no per-conversation state, so one client per
+    (model, temperature, options) can serve every agent in every session and
+    keep its provider connections warm.
+    """
+
+    def __init__(self):
+        self._clients = {}
+        self._override = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(model, temperature, api_key_env, options):
+        return (model, temperature, api_key_env, tuple(sorted(options.items())))
+
+    def get(self, model, temperature=0.7, api_key_env=None, **options):
+        key = self._key(model, temperature, api_key_env, options)
+        with self._lock:
+            if key not in self._clients:
+                api_key = os.getenv(api_key_env) if api_key_env else None
+                llm = LLM(model=model, temperature=temperature, api_key=api_key, **options)
+                # Clients of one provider share its request rate and concurrency budget
+                self._clients[key] = limit_llm_calls(llm, shared_limiter(provider_for_model(model)))
+            return self._clients[key]
+
+    def _first_available(self, key, candidates):
+        """Build the first candidate (model, temperature, api_key_env, options) that succeeds, once per key"""
+        with self._lock:
+            if self._override is not None:
+                return self._override
+            cached = self._clients.get(key)
+        if cached is not None:
+            return cached
+
+        llm, last_error = None, None
+        for index, (model, temperature, api_key_env, options) in enumerate(candidates):
+            try:
+                llm = self.get(model, temperature, api_key_env, **options)
+                break
+            except Exception as e:
+                last_error = e
+                if index < len(candidates) - 1:
+                    print(f"{model} initialization failed: {e}")
+        if llm is None:
+            raise last_error
+
+        with self._lock:
+            return self._clients.setdefault(key, llm)
+
+    def get_default(self, use_gemini=True, temperature=0.7):
+        """Gemini with an OpenAI fallback; the fallback decision is made once per process"""
+        candidates = [(OPENAI_MODEL, temperature, "OPENAI_API_KEY", {})]
+        if use_gemini:
+            candidates.insert(0, (GEMINI_MODEL, temperature, "GEMINI_API_KEY", {}))
+        return self._first_available(("default", use_gemini, temperature), candidates)
+
+    def get_tier(self, tier, settings, use_gemini=True):
+        """Client for a model tier's settings, falling back to settings["fallback"] once per process"""
+        candidates = []
+        for spec in (settings, settings.get("fallback")):
+            if not spec or (not use_gemini and spec["model"].startswith("gemini/")):
+                continue
+            options = {name: value for name, value in spec.items()
+                       if name not in ("model", "temperature", "api_key_env", "fallback")}
+            api_key_env = spec.get("api_key_env") or api_key_env_for(spec["model"])
+            candidates.append((spec["model"], spec.get("temperature", 0.7), api_key_env, options))
+        if not candidates:
+            raise ValueError(f"Model tier {tier} has no usable model")
+        # Keyed on the resolved candidates, so changed routing settings build a new client
+        key = ("tier", tier, tuple(self._key(*candidate) for candidate in candidates))
+        return self._first_available(key, candidates)
+
+    def override(self, llm):
+        """Serve llm for every default and tier lookup, e.g. a stand-in LLM for offline benchmarks"""
+        with self._lock:
+            self._override = llm
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+            self._override = None
+
+
+_pool = LLMPool()
+
+
+def shared_llm_pool():
+    return _pool
@@ -0,0 +1,325 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import namedtuple
+from contextlib import contextmanager
+
+from crewai.events import crewai_event_bus
+from crewai.events.types.llm_events import LLMCallCompletedEvent, LLMCallFailedEvent
+
+logger = logging.getLogger(__name__)
+
+# USD per million (prompt, completion) tokens, matched on a substring of the model name
+MODEL_PRICES = {
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-pro": (1.25, 5.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4": (30.00, 60.00),
+}
+
+# Rough characters-per-token ratio used when a provider reports no usage
+CHARS_PER_TOKEN = 4
+
+# status is the HTTP status code, or None when the request raised before a response
+ApiCall = namedtuple("ApiCall", ["endpoint", "label", "status", "latency", "bytes", "attempt", "error"])
+
+_current_run = contextvars.ContextVar("trip_run_metrics", default=None)
+_current_task = contextvars.ContextVar("trip_task_metrics", default=None)
+
+
+def model_price(model):
+    """(prompt, completion) USD per million tokens, or None for an unknown model"""
+    model = (model or "").lower()
+    for name in sorted(MODEL_PRICES, key=len, reverse=True):
+        if name in model:
+            return MODEL_PRICES[name]
+    return None
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    price = model_price(model)
+    if price is None:
+        return 0.0
+    return (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+
+
+def estimate_tokens(value):
+    if not value:
+        return 0
+    text = value if isinstance(value, str) else json.dumps(value, default=str)
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def _usage_tokens(usage):
+    """(prompt, completion) from the usage dicts of the different crewai providers"""
+    prompt = usage.get("prompt_tokens", usage.get("prompt_token_count", usage.get("input_tokens"))) or 0
+    completion = usage.get("completion_tokens", usage.get("output_tokens")) or 0
+    return int(prompt), int(completion)
+
+
+class TaskMetrics:
+    """Timing, LLM usage and API calls of one task in one run"""
+
+    def __init__(self, task_name, agent_role=None):
+        self.task_name = task_name
+        self.agent_role = agent_role
+        self.status = "pending"
+        self.queued_at = None
+        self.started_at = None
+        self.finished_at = None
+        self.llm_calls = 0
+        self.llm_errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.tokens_estimated = False
+        self.models = set()
+        self.api_calls = []
+        self.context_tokens = None
+        self.compacted_context_tokens = None
+        self._lock = threading.Lock()
+
+    @property
+    def queue_time(self):
+        if self.queued_at is None or self.started_at is None:
+            return None
+        return self.started_at - self.queued_at
+
+    @property
+    def wall_time(self):
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def mark_queued(self):
+        self.queued_at = time.time()
+
+    def mark_started(self):
+        self.started_at = time.time()
+        self.status = "running"
+
+    def mark_finished(self, succeeded=True):
+        self.finished_at = time.time()
+        self.status = "succeeded" if succeeded else "failed"
+
+    def record_llm_call(self, model, prompt_tokens, completion_tokens, estimated=False):
+        with self._lock:
+            self.llm_calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.cost += estimate_cost(model, prompt_tokens, completion_tokens)
+            self.tokens_estimated = self.tokens_estimated or estimated
+            if model:
+                self.models.add(model)
+
+    def record_llm_error(self):
+        with self._lock:
+            self.llm_errors += 1
+
+    def record_api_call(self, call):
+        with self._lock:
+            self.api_calls.append(call)
+
+    def record_context(self, tokens, compacted_tokens):
+        self.context_tokens = tokens
+        self.compacted_context_tokens = compacted_tokens
+
+    def to_dict(self):
+        return {
+            'task': self.task_name,
+            'agent': self.agent_role,
+            'status': self.status,
+            'queue_time': self.queue_time,
+            'wall_time': self.wall_time,
+            'llm_calls': self.llm_calls,
+            'llm_errors': self.llm_errors,
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'tokens_estimated': self.tokens_estimated,
+            'cost_usd': round(self.cost, 6),
+            'models': sorted(self.models),
+            'api_calls': len(self.api_calls),
+            'api_time': sum(call.latency for call in self.api_calls),
+            'context_tokens': self.context_tokens,
+            'compacted_context_tokens': self.compacted_context_tokens,
+        }
+
+
+class RunMetrics:
+    """Per-task metrics of one crew run plus the API calls made outside any task"""
+
+    def __init__(self, mode=None, run_id=None):
+        self.run_id = run_id or uuid.uuid4().hex
+        self.mode = mode
+        self.started_at = time.time()
+        self.finished_at = None
+        self.tasks = {}
+        self.api_calls = []
+        self._lock = threading.Lock()
+
+    def task(self, task_name, agent_role=None):
+        with self._lock:
+            if task_name not in self.tasks:
+                self.tasks[task_name] = TaskMetrics(task_name, agent_role)
+            return self.tasks[task_name]
+
+    def record_api_call(self, call):
+        with self._lock:
+            self.api_calls.append(call)
+
+    def finish(self):
+        self.finished_at = time.time()
+
+    @property
+    def wall_time(self):
+        end = self.finished_at if self.finished_at is not None else time.time()
+        return end - self.started_at
+
+    def all_api_calls(self):
+        calls = list(self.api_calls)
+        for task in self.tasks.values():
+            calls.extend(task.api_calls)
+        return calls
+
+    def by_agent(self):
+        """Task metrics summed per agent role"""
+        agents = {}
+        for task in self.tasks.values():
+            totals = agents.setdefault(task.agent_role, {
+                'agent': task.agent_role, 'tasks': 0, 'wall_time': 0.0, 'llm_calls': 0,
+                'prompt_tokens': 0, 'completion_tokens': 0, 'cost_usd': 0.0,
+            })
+            totals['tasks'] += 1
+            totals['wall_time'] += task.wall_time or 0.0
+            totals['llm_calls'] += task.llm_calls
+            totals['prompt_tokens'] += task.prompt_tokens
+            totals['completion_tokens'] += task.completion_tokens
+            totals['cost_usd'] = round(totals['cost_usd'] + task.cost, 6)
+        return list(agents.values())
+
+    def summary(self):
+        tasks = list(self.tasks.values())
+        slowest = max(tasks, key=lambda task: task.wall_time or 0.0, default=None)
+        costliest = max(tasks, key=lambda task: task.cost, default=None)
+        return {
+            'run_id': self.run_id,
+            'mode': self.mode,
+            'wall_time': self.wall_time,
+            'tasks': len(tasks),
+            'failed_tasks': sum(task.status == "failed" for task in tasks),
+            'llm_calls': sum(task.llm_calls for task in tasks),
+            'prompt_tokens': sum(task.prompt_tokens for task in tasks),
+            'completion_tokens': sum(task.completion_tokens for task in tasks),
+            'tokens_estimated': any(task.tokens_estimated for task in tasks),
+            'cost_usd': round(sum(task.cost for task in tasks), 6),
+            'api_calls': len(self.all_api_calls()),
+            'slowest_task': slowest.task_name if slowest else None,
+            'costliest_task': costliest.task_name if costliest else None,
+        }
+
+    def to_records(self):
+        """One dict per run, task, agent and API call, each tagged with its type and run ID"""
+        records = [dict(self.summary(), type="run")]
+        records.extend(dict(task.to_dict(), type="task", run_id=self.run_id) for task in self.tasks.values())
+        records.extend(dict(agent, type="agent", run_id=self.run_id) for agent in self.by_agent())
+        scoped_calls = [(None, call) for call in self.api_calls]
+        for task in self.tasks.values():
+            scoped_calls.extend((task.task_name, call) for call in task.api_calls)
+        records.extend(
+            dict(call._asdict(), type="api_call", run_id=self.run_id, task=task_name)
+            for task_name, call in scoped_calls
+        )
+        return records
+
+    def to_jsonl(self):
+        return "".join(json.dumps(record, default=str) + "\n" for record in self.to_records())
+
+    def write_jsonl(self, path):
+        """Append this run's records to a JSON lines file"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as handle:
+            handle.write(self.to_jsonl())
+
+
+def current_run():
+    return _current_run.get()
+
+
+def current_task():
+    return _current_task.get()
+
+
+@contextmanager
+def run_scope(run_metrics):
+    token = _current_run.set(run_metrics)
+    try:
+        yield run_metrics
+    finally:
+        _current_run.reset(token)
+
+
+@contextmanager
+def task_scope(task_metrics):
+    token = _current_task.set(task_metrics)
+    try:
+        yield task_metrics
+    finally:
+        _current_task.reset(token)
+
+
+def record_api_call(endpoint, label, status, latency, size, attempt, error=None):
+    """Attach an HTTP call to the current task, else the current run; a no-op outside a run"""
+    call = ApiCall(endpoint, label, status, latency, size, attempt, error)
+    target = current_task() or current_run()
+    if target is not None:
+        target.record_api_call(call)
+
+
+def _on_llm_call_completed(source, event):
+    # crewai runs sync handlers with a copy of the emitting thread's context
+    task_metrics = current_task()
+    if task_metrics is None:
+        return
+    if event.usage:
+        prompt_tokens, completion_tokens = _usage_tokens(event.usage)
+        estimated = False
+    else:
+        prompt_tokens, completion_tokens = estimate_tokens(event.messages), estimate_tokens(event.response)
+        estimated = True
+    task_metrics.record_llm_call(event.model, prompt_tokens, completion_tokens, estimated)
+
+
+def _on_llm_call_failed(source, event):
+    task_metrics = current_task()
+    if task_metrics is not None:
+        task_metrics.record_llm_error()
+
+
+_listener_lock = threading.Lock()
+_listener_installed = False
+
+
+def install_llm_listener():
+    """Subscribe once per process to crewai's LLM events"""
+    global _listener_installed
+    with _listener_lock:
+        if _listener_installed:
+            return
+        crewai_event_bus.register_handler(LLMCallCompletedEvent, _on_llm_call_completed)
+        crewai_event_bus.register_handler(LLMCallFailedEvent, _on_llm_call_failed)
+        _listener_installed = True
+
+
+def flush_llm_events(timeout=5.0):
+    """Wait for queued LLM event handlers so token counts are complete before export"""
+    try:
+        crewai_event_bus.flush(timeout=timeout)
+    except Exception as e:
+        logger.warning(f"Could not flush LLM events: {e}")
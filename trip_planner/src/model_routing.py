@@ -0,0 +1,100 @@
+import copy
+import json
+import logging
+import os
+
+from .llm_pool import GEMINI_MODEL, OPENAI_MODEL
+
+logger = logging.getLogger(__name__)
+
+# Tier -> primary model settings plus the fallback used when the primary cannot be built
+DEFAULT_TIERS = {
+    "fast": {
+        "model": "gemini/gemini-2.0-flash-lite",
+        "temperature": 0.5,
+        "max_tokens": 2048,
+        "fallback": {"model": "openai/gpt-4o-mini", "temperature": 0.5, "max_tokens": 2048},
+    },
+    "heavy": {
+        "model": GEMINI_MODEL,
+        "temperature": 0.7,
+        "max_tokens": 8192,
+        "fallback": {"model": OPENAI_MODEL, "temperature": 0.7, "max_tokens": 4096},
+    },
+}
+
+DEFAULT_TIER = "heavy"
+
+# Crew task attribute -> tier; short, formulaic outputs go to the fast tier
+DEFAULT_TASK_TIERS = {
+    'packing_guide': 'fast',
+    'weather_analysis': 'fast',
+    'mystery_destination': 'fast',
+    'currency_conversion': 'fast',
+    'cultural_immersion': 'fast',
+}
+
+# Crew agent attribute -> tier, used for tasks without their own route
+DEFAULT_AGENT_TIERS = {}
+
+
+def _merge_tiers(tiers, overrides):
+    merged = copy.deepcopy(tiers)
+    for name, settings in overrides.items():
+        merged.setdefault(name, {}).update(settings)
+    return merged
+
+
+class ModelRouter:
+    """Maps crew tasks and agents to LLM tiers.
+
+    A task's own route wins over its agent's route, which wins over the
+    default tier. ModelRouter.load() applies the MODEL_ROUTING override: a JSON
+    object, or the path of a JSON file, with any of "tiers", "tasks", "agents"
+    and "default_tier".
+    """
+
+    def __init__(self, tiers=None, task_tiers=None, agent_tiers=None, default_tier=DEFAULT_TIER):
+        self.tiers = copy.deepcopy(tiers or DEFAULT_TIERS)
+        self.task_tiers = dict(DEFAULT_TASK_TIERS if task_tiers is None else task_tiers)
+        self.agent_tiers = dict(DEFAULT_AGENT_TIERS if agent_tiers is None else agent_tiers)
+        self.default_tier = default_tier
+        for tier in [default_tier, *self.task_tiers.values(), *self.agent_tiers.values()]:
+            if tier not in self.tiers:
+                raise ValueError(f"Unknown model tier: {tier}")
+
+    @classmethod
+    def from_config(cls, config):
+        """Router with config's tier settings, routes and default merged over the defaults"""
+        return cls(
+            tiers=_merge_tiers(DEFAULT_TIERS, config.get("tiers", {})),
+            task_tiers={**DEFAULT_TASK_TIERS, **config.get("tasks", {})},
+            agent_tiers={**DEFAULT_AGENT_TIERS, **config.get("agents", {})},
+            default_tier=config.get("default_tier", DEFAULT_TIER),
+        )
+
+    @classmethod
+    def load(cls, source=None):
+        source = source if source is not None else os.getenv("MODEL_ROUTING", "")
+        source = source.strip()
+        if not source:
+            return cls()
+        if source.startswith("{"):
+            config = json.loads(source)
+        else:
+            with open(source, encoding="utf-8") as handle:
+                config = json.load(handle)
+        return cls.from_config(config)
+
+    def tier_names(self):
+        return list(self.tiers)
+
+    def tier_for(self, task_name=None, agent_name=None):
+        if task_name in self.task_tiers:
+            return self.task_tiers[task_name]
+        if agent_name in self.agent_tiers:
+            return self.agent_tiers[agent_name]
+        return self.default_tier
+
+    def settings(self, tier):
+        return self.tiers[tier]
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+
+LIST_INPUTS = ("interests", "transport_preferences")
+EMOJI_CATEGORIES = frozenset({"So", "Sk", "Cf", "Cs", "Co"})
+VARIATION_SELECTORS = frozenset({"\ufe0e", "\ufe0f"})
+
+
+def strip_emoji(text):
+    """Remove emoji, flags, ZWJ sequences and variation selectors, then collapse whitespace"""
+    kept = "".join(
+        char for char in str(text)
+        if char not in VARIATION_SELECTORS and unicodedata.category(char) not in EMOJI_CATEGORIES
+    )
+    return " ".join(kept.split())
+
+
+def parse_budget(budget):
+    digits = re.sub(r"[^\d.]", "", str(budget))
+    return float(digits) if digits else None
+
+
+def canonicalize_inputs(inputs, budget_bucket=None):
+    """Canonical form of the app's inputs dict, so equivalent requests share one cache key"""
+    canonical = {}
+    for name, value in inputs.items():
+        if isinstance(value, str):
+            value = strip_emoji(value).casefold()
+        elif isinstance(value, (list, tuple)):
+            value = [strip_emoji(item).casefold() for item in value]
+        canonical[name] = value
+    for name in LIST_INPUTS:
+        if name in canonical:
+            canonical[name] = sorted(set(canonical[name]))
+    if "budget" in canonical:
+        amount = parse_budget(canonical["budget"])
+        if amount is not None and budget_bucket:
+            amount = (amount // budget_bucket) * budget_bucket
+        canonical["budget"] = amount
+    return canonical
+
+
+class PlanCache:
+    """Whole-plan result cache with TTL, LRU eviction and in-flight deduplication.
+
+    Concurrent callers asking for the same canonical inputs wait on the one run
+    already in progress instead of starting their own. Failed or empty runs are
+    never cached.
+    """
+
+    def __init__(self, ttl=3600, max_entries=128, budget_bucket=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.budget_bucket = budget_bucket
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def key_for(self, inputs, mode="full"):
+        canonical = canonicalize_inputs(inputs, self.budget_bucket)
+        payload = json.dumps({"mode": mode, "inputs": canonical}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def get(self, inputs, mode="full"):
+        with self._lock:
+            return self._lookup(self.key_for(inputs, mode))
+
+    def get_or_compute(self, inputs, compute, mode="full"):
+        key = self.key_for(inputs, mode)
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                return value
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._inflight[key]
+            if value is not None:
+                self._entries[key] = (time.monotonic(), value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        future.set_result(value)
+        return value
+
+    def invalidate(self, inputs, mode="full"):
+        with self._lock:
+            self._entries.pop(self.key_for(inputs, mode), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
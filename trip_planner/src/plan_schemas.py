@@ -0,0 +1,226 @@
+import logging
+import re
+from typing import List, Optional
+
+from crewai.utilities.converter import Converter, ConverterError
+from pydantic import BaseModel, Field, ValidationError
+
+logger = logging.getLogger(__name__)
+
+HTML_TAG = re.compile(r"<[^>]+>")
+JSON_OBJECT = re.compile(r"\{.*\}", re.DOTALL)
+
+
+def clean_markdown(content):
+    """Strip HTML tags and code fences an LLM sometimes wraps its markdown in"""
+    if not content:
+        return "No content available"
+    content = HTML_TAG.sub("", content)
+    content = content.replace("```html", "").replace("```markdown", "").replace("```", "")
+    return content.strip()
+
+
+def _money(amount, currency="USD"):
+    if amount is None:
+        return "price varies"
+    return f"${amount:,.0f}" if currency == "USD" else f"{amount:,.0f} {currency}"
+
+
+def _bullets(items):
+    return [f"- {item}" for item in items]
+
+
+class DestinationOption(BaseModel):
+    name: str = Field(description="City or region, with its country")
+    why: str = Field(description="Why it fits the traveler's preferences and season")
+    highlights: List[str] = Field(default_factory=list, description="Activities matching the traveler's interests")
+
+
+class DestinationRecommendations(BaseModel):
+    destinations: List[DestinationOption]
+    summary: str = ""
+
+    def to_markdown(self):
+        lines = [self.summary, ""] if self.summary else []
+        for number, option in enumerate(self.destinations, 1):
+            lines += [f"#### {number}. {option.name}", option.why, *_bullets(option.highlights), ""]
+        return "\n".join(lines).strip()
+
+
+class ScheduledActivity(BaseModel):
+    time: str = Field(description="Time slot, e.g. 09:00-11:00")
+    activity: str
+    location: str = ""
+    estimated_cost_usd: Optional[float] = None
+
+
+class ItineraryDay(BaseModel):
+    day: int
+    title: str
+    activities: List[ScheduledActivity]
+
+
+class Itinerary(BaseModel):
+    days: List[ItineraryDay]
+    tips: List[str] = Field(default_factory=list)
+
+    def to_markdown(self):
+        lines = []
+        for day in self.days:
+            lines.append(f"#### Day {day.day}: {day.title}")
+            for item in day.activities:
+                where = f" ({item.location})" if item.location else ""
+                cost = f" - {_money(item.estimated_cost_usd)}" if item.estimated_cost_usd is not None else ""
+                lines.append(f"- **{item.time}** {item.activity}{where}{cost}")
+            lines.append("")
+        if self.tips:
+            lines += ["#### Tips", *_bullets(self.tips)]
+        return "\n".join(lines).strip()
+
+
+class CostItem(BaseModel):
+    category: str = Field(description="e.g. Flights, Accommodation, Food, Activities")
+    description: str = ""
+    amount: float = Field(description="Total cost of this item for the whole trip")
+
+
+class BudgetBreakdown(BaseModel):
+    currency: str = "USD"
+    items: List[CostItem]
+    total: float
+    daily_average: Optional[float] = None
+    savings_tips: List[str] = Field(default_factory=list)
+
+    def to_markdown(self):
+        lines = ["| Category | Details | Cost |", "| --- | --- | --- |"]
+        lines += [f"| {item.category} | {item.description} | {_money(item.amount, self.currency)} |"
+                  for item in self.items]
+        lines += ["", f"**Total: {_money(self.total, self.currency)}**"]
+        if self.daily_average is not None:
+            lines.append(f"**Daily average: {_money(self.daily_average, self.currency)}**")
+        if self.savings_tips:
+            lines += ["", "#### Cost-saving tips", *_bullets(self.savings_tips)]
+        return "\n".join(lines)
+
+
+class HotelOption(BaseModel):
+    name: str
+    area: str = Field(description="Neighborhood or district")
+    category: str = Field(default="", description="e.g. Luxury, Mid-range, Budget, Hostel")
+    price_per_night_usd: Optional[float] = None
+    highlights: List[str] = Field(default_factory=list)
+
+
+class AccommodationOptions(BaseModel):
+    options: List[HotelOption]
+    booking_tips: List[str] = Field(default_factory=list)
+
+    def to_markdown(self):
+        lines = []
+        for option in self.options:
+            category = f" ({option.category})" if option.category else ""
+            lines.append(f"#### {option.name}{category}")
+            lines.append(f"{option.area} - {_money(option.price_per_night_usd)} per night")
+            lines += [*_bullets(option.highlights), ""]
+        if self.booking_tips:
+            lines += ["#### Booking tips", *_bullets(self.booking_tips)]
+        return "\n".join(lines).strip()
+
+
+class FlightOption(BaseModel):
+    airline: str
+    route: str = Field(description="Airports, including any stops, e.g. JFK - IST - KTM")
+    stops: int = 0
+    duration: str = ""
+    price_usd: Optional[float] = Field(default=None, description="Round-trip price per traveler")
+    notes: str = ""
+
+
+class FlightOptions(BaseModel):
+    options: List[FlightOption]
+    booking_tips: List[str] = Field(default_factory=list)
+
+    def to_markdown(self):
+        lines = ["| Airline | Route | Stops | Duration | Price |", "| --- | --- | --- | --- | --- |"]
+        lines += [f"| {option.airline} | {option.route} | {option.stops} | {option.duration} | "
+                  f"{_money(option.price_usd)} |" for option in self.options]
+        notes = [f"**{option.airline}:** {option.notes}" for option in self.options if option.notes]
+        if notes:
+            lines += ["", *_bullets(notes)]
+        if self.booking_tips:
+            lines += ["", "#### Booking tips", *_bullets(self.booking_tips)]
+        return "\n".join(lines)
+
+
+class PackingCategory(BaseModel):
+    name: str
+    items: List[str]
+
+
+class PackingList(BaseModel):
+    categories: List[PackingCategory]
+    tips: List[str] = Field(default_factory=list)
+
+    def to_markdown(self):
+        lines = []
+        for category in self.categories:
+            lines += [f"#### {category.name}", *[f"- [ ] {item}" for item in category.items], ""]
+        if self.tips:
+            lines += ["#### Packing tips", *_bullets(self.tips)]
+        return "\n".join(lines).strip()
+
+
+class LenientConverter(Converter):
+    """Converter that keeps the task's raw text when it cannot be validated, instead of failing the task.
+
+    An answer that already holds valid JSON is validated directly, so the
+    usual case costs no extra LLM call.
+    """
+
+    def to_pydantic(self, current_attempt=1):
+        match = JSON_OBJECT.search(self.text or "")
+        if match:
+            try:
+                return self.model.model_validate_json(match.group())
+            except ValidationError:
+                pass
+        try:
+            return super().to_pydantic(current_attempt)
+        except ConverterError as e:
+            logger.warning(f"Keeping free-form output; {self.model.__name__} validation failed: {e}")
+            return e
+
+
+# Task name -> schema its output is validated against; other tasks produce free-form markdown
+TASK_SCHEMAS = {
+    'destination_selection': DestinationRecommendations,
+    'serendipity_destination': DestinationRecommendations,
+    'detailed_itinerary': Itinerary,
+    'comprehensive_budget': BudgetBreakdown,
+    'accommodation_recommendations': AccommodationOptions,
+    'hotel_optimization': AccommodationOptions,
+    'flight_optimization': FlightOptions,
+    'smart_packing_guide': PackingList,
+}
+
+
+def structured_output(task_name):
+    """Task keyword arguments that validate task_name's output against its schema; {} for free-form tasks"""
+    schema = TASK_SCHEMAS.get(task_name)
+    if schema is None:
+        return {}
+    return {'output_pydantic': schema, 'converter_cls': LenientConverter}
+
+
+def output_markdown(output):
+    """Display-ready markdown for a TaskOutput, rendered from its structured data when it has any"""
+    model = getattr(output, 'pydantic', None)
+    if model is not None and hasattr(model, 'to_markdown'):
+        return model.to_markdown()
+    return clean_markdown(output.raw)
+
+
+def output_data(output):
+    """A TaskOutput's validated structured data as plain dicts, or None for free-form outputs"""
+    model = getattr(output, 'pydantic', None)
+    return model.model_dump() if model is not None else None
@@ -0,0 +1,141 @@
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .api_services import APIIntegrationService
+from .live_data import LiveTripData
+
+logger = logging.getLogger(__name__)
+
+# Inputs keys read by any prefetched section; other form edits do not restart a prefetch
+PREFETCH_KEYS = tuple(sorted({key for keys in LiveTripData.SECTIONS.values() for key in keys}))
+
+
+class _Slot:
+    """Debounce state of one caller, e.g. one app session"""
+
+    def __init__(self):
+        self.key = None
+        self.generation = 0
+        self.timer = None
+        self.futures = []
+
+
+class SpeculativePrefetcher:
+    """Fetches a trip's live prompt data while the user is still editing the form.
+
+    schedule() is cheap to call on every rerun: a prefetch only fires after the
+    inputs in PREFETCH_KEYS have stayed the same for delay seconds. Changing
+    them bumps the slot's generation, which cancels the pending timer and any
+    sections that have not started yet. Each LiveTripData section the task
+    prompts read is built once, so its requests land in the shared response
+    cache and rate table; when the crew builds the same sections it hits warm
+    data, or joins a request still in flight. Without the response cache
+    nothing would be kept for the crew, so prefetching stays off.
+    """
+
+    def __init__(self, delay=1.5, max_workers=2, service_factory=APIIntegrationService, max_slots=1000):
+        self.delay = delay
+        self.max_slots = max_slots
+        self.service_factory = service_factory
+        self._live = None
+        self._disabled = False
+        self._slots = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="trip-prefetch")
+
+    def _slot(self, slot_id):
+        slot = self._slots.get(slot_id)
+        if slot is None:
+            slot = self._slots[slot_id] = _Slot()
+            while len(self._slots) > self.max_slots:
+                _, dropped = self._slots.popitem(last=False)
+                self._cancel(dropped)
+        self._slots.move_to_end(slot_id)
+        return slot
+
+    @staticmethod
+    def _cancel(slot):
+        slot.generation += 1
+        if slot.timer is not None:
+            slot.timer.cancel()
+            slot.timer = None
+        for future in slot.futures:
+            future.cancel()
+        slot.futures = []
+
+    def schedule(self, inputs, slot_id="default"):
+        """Debounced prefetch for these trip inputs; returns False if the prefetched ones are unchanged"""
+        key = tuple(str(inputs.get(name)) for name in PREFETCH_KEYS)
+        with self._lock:
+            if self._disabled:
+                return False
+            slot = self._slot(slot_id)
+            if slot.key == key:
+                return False
+            self._cancel(slot)
+            slot.key = key
+            slot.timer = threading.Timer(self.delay, self._fire, (slot_id, slot.generation, dict(inputs)))
+            slot.timer.daemon = True
+            slot.timer.start()
+            return True
+
+    def cancel(self, slot_id="default"):
+        with self._lock:
+            slot = self._slots.pop(slot_id, None)
+            if slot is not None:
+                self._cancel(slot)
+
+    def _get_live(self):
+        if self._live is None and not self._disabled:
+            try:
+                service = self.service_factory()
+            except ValueError as e:
+                logger.info(f"Speculative prefetch disabled: {e}")
+                self._disabled = True
+                return None
+            if service.cache is None:
+                logger.info("Speculative prefetch disabled: the SerpAPI response cache is off")
+                service.close()
+                self._disabled = True
+                return None
+            self._live = LiveTripData(service)
+        return self._live
+
+    def _is_current(self, slot_id, generation):
+        slot = self._slots.get(slot_id)
+        return slot is not None and slot.generation == generation
+
+    def _fire(self, slot_id, generation, inputs):
+        with self._lock:
+            if not self._is_current(slot_id, generation):
+                return
+            live = self._get_live()
+            if live is None:
+                return
+            slot = self._slots[slot_id]
+            slot.timer = None
+            slot.futures = [
+                self._pool.submit(self._fetch, slot_id, generation, getattr(live, section), inputs)
+                for section in LiveTripData.SECTIONS
+            ]
+
+    def _fetch(self, slot_id, generation, section, inputs):
+        with self._lock:
+            if not self._is_current(slot_id, generation):
+                return
+        try:
+            section(inputs)
+            logger.info(f"Prefetched {section.__name__} for {inputs.get('destination')}")
+        except Exception as e:
+            logger.warning(f"Prefetch of {section.__name__} failed: {e}")
+
+    def shutdown(self):
+        with self._lock:
+            for slot in self._slots.values():
+                self._cancel(slot)
+            self._slots.clear()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        if self._live is not None:
+            self._live.service.close()
@@ -0,0 +1,243 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Provider -> token bucket (requests per second, burst) and AIMD concurrency bounds
+DEFAULT_LIMITS = {
+    "serpapi": {"rate": 5.0, "burst": 10, "concurrency": 4, "max_concurrency": 10},
+    "exchange_rate": {"rate": 2.0, "burst": 4, "concurrency": 2, "max_concurrency": 4},
+    "gemini": {"rate": 2.0, "burst": 5, "concurrency": 4, "max_concurrency": 8},
+    "openai": {"rate": 3.0, "burst": 6, "concurrency": 4, "max_concurrency": 8},
+    "default": {"rate": 2.0, "burst": 4, "concurrency": 2, "max_concurrency": 4},
+}
+
+THROTTLE_MARKERS = ("429", "rate limit", "ratelimit", "resource_exhausted", "too many requests", "quota")
+
+# How long async waiters sleep between attempts to get a concurrency slot
+ASYNC_POLL_INTERVAL = 0.05
+
+
+def is_throttle_error(error):
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status == 429:
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in THROTTLE_MARKERS)
+
+
+class TokenBucket:
+    """Classic token bucket: rate tokens per second, holding at most burst"""
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token if one is available; otherwise return the seconds until one will be"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        while True:
+            wait = self.reserve()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        while True:
+            wait = self.reserve()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+class AIMDLimiter:
+    """Concurrency limit that grows additively while calls are healthy and halves on trouble.
+
+    A call is trouble when it was throttled (HTTP 429 or a provider rate-limit
+    error) or, once warmup calls have been seen, took more than latency_factor
+    times the smoothed latency. At most one decrease happens per cooldown, so
+    one burst of slow calls halves the limit once instead of collapsing it.
+    """
+
+    def __init__(self, initial=4, min_limit=1, max_limit=16, increase=1.0, decrease=0.5,
+                 latency_factor=2.5, cooldown=1.0, warmup=5):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.cooldown = cooldown
+        self.warmup = warmup
+        self._limit = float(min(max(initial, min_limit), max_limit))
+        self._in_flight = 0
+        self._latency = None
+        self._samples = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self):
+        return int(self._limit)
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+    def try_acquire(self):
+        with self._condition:
+            if self._in_flight < int(self._limit):
+                self._in_flight += 1
+                return True
+            return False
+
+    def acquire(self):
+        with self._condition:
+            self._condition.wait_for(lambda: self._in_flight < int(self._limit))
+            self._in_flight += 1
+
+    def release(self, latency=None, throttled=False, failed=False):
+        with self._condition:
+            self._in_flight -= 1
+            spiked = (
+                latency is not None and self._samples >= self.warmup
+                and latency > self.latency_factor * self._latency
+            )
+            now = time.monotonic()
+            if throttled or spiked:
+                if now - self._last_decrease >= self.cooldown:
+                    self._limit = max(self.min_limit, self._limit * self.decrease)
+                    self._last_decrease = now
+                    logger.info(f"Concurrency limit lowered to {self.limit} ({'throttled' if throttled else 'slow'})")
+            elif not failed:
+                # Roughly +increase per full window of successful calls
+                self._limit = min(self.max_limit, self._limit + self.increase / self._limit)
+            if latency is not None and not throttled:
+                self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+                self._samples += 1
+            self._condition.notify_all()
+
+
+class _Request:
+    def __init__(self):
+        self.throttled = False
+
+    def report(self, status_code):
+        self.throttled = status_code == 429
+
+
+class ProviderLimiter:
+    """Token bucket for request rate plus AIMD concurrency for one provider"""
+
+    def __init__(self, name, rate, burst, concurrency, max_concurrency, min_concurrency=1):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = AIMDLimiter(concurrency, min_concurrency, max_concurrency)
+
+    def _release(self, started, request, error=None, interrupted=False):
+        if interrupted:
+            # A cancelled call says nothing about the provider's latency or health
+            self.concurrency.release(failed=True)
+            return
+        throttled = request.throttled or (error is not None and is_throttle_error(error))
+        self.concurrency.release(time.monotonic() - started, throttled=throttled, failed=error is not None)
+
+    @contextmanager
+    def request(self):
+        """Wait for a token and a concurrency slot; call report(status_code) on the yielded request"""
+        self.bucket.acquire()
+        self.concurrency.acquire()
+        started, request = time.monotonic(), _Request()
+        error, interrupted = None, True
+        try:
+            yield request
+            interrupted = False
+        except Exception as e:
+            error, interrupted = e, False
+            raise
+        finally:
+            # The slot is given back even when the caller is cancelled or interrupted
+            self._release(started, request, error, interrupted)
+
+    @asynccontextmanager
+    async def arequest(self):
+        await self.bucket.acquire_async()
+        while not self.concurrency.try_acquire():
+            await asyncio.sleep(ASYNC_POLL_INTERVAL)
+        started, request = time.monotonic(), _Request()
+        error, interrupted = None, True
+        try:
+            yield request
+            interrupted = False
+        except Exception as e:
+            error, interrupted = e, False
+            raise
+        finally:
+            # The slot is given back even when the caller is cancelled or interrupted
+            self._release(started, request, error, interrupted)
+
+
+def load_limits(source=None):
+    """DEFAULT_LIMITS merged with RATE_LIMITS: a JSON object, or the path of a JSON file"""
+    source = (source if source is not None else os.getenv("RATE_LIMITS", "")).strip()
+    limits = {name: dict(settings) for name, settings in DEFAULT_LIMITS.items()}
+    if not source:
+        return limits
+    if source.startswith("{"):
+        overrides = json.loads(source)
+    else:
+        with open(source, encoding="utf-8") as handle:
+            overrides = json.load(handle)
+    for name, settings in overrides.items():
+        limits.setdefault(name, dict(DEFAULT_LIMITS["default"])).update(settings)
+    return limits
+
+
+_limiters = {}
+_limits = None
+_limiters_lock = threading.Lock()
+
+
+def shared_limiter(provider):
+    """Process-wide limiter for a provider, so every thread and session shares its budget"""
+    global _limits
+    with _limiters_lock:
+        if provider not in _limiters:
+            if _limits is None:
+                _limits = load_limits()
+            settings = _limits.get(provider, _limits["default"])
+            _limiters[provider] = ProviderLimiter(provider, **settings)
+        return _limiters[provider]
+
+
+def provider_for_model(model):
+    return model.split("/", 1)[0] if "/" in model else "default"
+
+
+def limit_llm_calls(llm, limiter):
+    """Route llm.call through limiter; the LLM object is otherwise untouched"""
+    inner_call = llm.call
+
+    def call(*args, **kwargs):
+        with limiter.request():
+            return inner_call(*args, **kwargs)
+
+    # crewai LLMs are pydantic models, so set the instance attribute directly
+    object.__setattr__(llm, "call", call)
+    return llm
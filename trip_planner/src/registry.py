@@ -0,0 +1,36 @@
+import threading
+
+
+class LazyRegistry:
+    """Named factories whose objects are built on first access and then reused"""
+
+    def __init__(self, factories=None):
+        self._factories = dict(factories or {})
+        self._built = {}
+        # Re-entrant so a factory may pull other entries (e.g. a task its agent)
+        self._lock = threading.RLock()
+
+    def __contains__(self, name):
+        return name in self._factories
+
+    def register(self, name, factory):
+        with self._lock:
+            self._factories[name] = factory
+            self._built.pop(name, None)
+
+    def get(self, name):
+        with self._lock:
+            if name not in self._built:
+                if name not in self._factories:
+                    raise KeyError(f"Nothing registered under '{name}'")
+                self._built[name] = self._factories[name]()
+            return self._built[name]
+
+    def is_built(self, name):
+        return name in self._built
+
+    def names(self):
+        return list(self._factories)
+
+    def built_names(self):
+        return list(self._built)
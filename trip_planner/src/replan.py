@@ -0,0 +1,58 @@
+from crewai.tasks.task_output import TaskOutput
+
+from .plan_cache import canonicalize_inputs
+from .task_graph import task_dependencies
+
+
+def changed_input_keys(old_inputs, new_inputs):
+    """Inputs keys whose canonical values differ, so emoji or case-only edits do not count"""
+    old, new = canonicalize_inputs(old_inputs), canonicalize_inputs(new_inputs)
+    return {key for key in set(old) | set(new) if old.get(key) != new.get(key)}
+
+
+def with_dependents(tasks, seeds):
+    """IDs of the seed tasks plus every task that takes one of them as context, transitively"""
+    dependents = {}
+    for task in tasks:
+        for dep in task_dependencies(task):
+            dependents.setdefault(id(dep), []).append(task)
+    affected = set(seeds)
+    frontier = list(seeds)
+    while frontier:
+        for dependent in dependents.get(frontier.pop(), []):
+            if id(dependent) not in affected:
+                affected.add(id(dependent))
+                frontier.append(id(dependent))
+    return affected
+
+
+def as_task_output(task, previous):
+    """Wrap a stored raw output (or pass through a TaskOutput) for reuse as task's result"""
+    if isinstance(previous, TaskOutput):
+        return previous
+    return TaskOutput(
+        name=task.name,
+        description=task.description,
+        expected_output=task.expected_output,
+        raw=str(previous),
+        agent=task.agent.role if task.agent else "",
+    )
+
+
+def reusable_outputs(tasks, input_keys, changed_keys, previous_outputs):
+    """Outputs by id(task) for tasks that read no changed input and depend on no re-run task.
+
+    input_keys maps id(task) to the inputs keys that task reads, or None when
+    unknown. previous_outputs maps task name to the earlier output; tasks
+    without one are re-run along with their dependents.
+    """
+    rerun = set()
+    for task in tasks:
+        keys = input_keys.get(id(task))
+        if keys is None or changed_keys.intersection(keys) or task.name not in previous_outputs:
+            rerun.add(id(task))
+    rerun = with_dependents(tasks, rerun)
+    return {
+        id(task): as_task_output(task, previous_outputs[task.name])
+        for task in tasks if id(task) not in rerun
+    }
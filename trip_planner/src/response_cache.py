@@ -0,0 +1,173 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+# (fresh_for, stale_for) in seconds per SerpAPI engine. A fresh entry is served
+# as is; a stale one is served while a background refresh replaces it; past
+# fresh_for + stale_for the entry is treated as a miss.
+ENGINE_TTLS = {
+    "google_flights": (15 * MINUTE, 45 * MINUTE),
+    "google_hotels": (6 * HOUR, 18 * HOUR),
+    "google": (1 * DAY, 2 * DAY),
+    "google_maps_directions": (3 * DAY, 4 * DAY),
+    "google_maps": (7 * DAY, 7 * DAY),
+}
+DEFAULT_TTL = (1 * HOUR, 1 * DAY)
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "trip_planner", "serpapi_cache.sqlite3")
+
+EXCLUDED_PARAMS = frozenset({"api_key"})
+# Case-sensitive tokens and ids that must be kept exactly as SerpAPI returned them
+OPAQUE_PARAMS = frozenset({
+    "next_page_token", "departure_token", "booking_token", "property_token",
+    "place_id", "data_id", "data_cid", "ludocid", "lsig",
+})
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def normalize_params(params):
+    """Canonical form of request params: secrets dropped, whitespace collapsed, case folded (except opaque tokens)"""
+    normalized = {}
+    for name, value in params.items():
+        if name in EXCLUDED_PARAMS or value is None:
+            continue
+        if isinstance(value, str) and name not in OPAQUE_PARAMS:
+            value = " ".join(value.split()).casefold()
+        normalized[name] = value
+    return normalized
+
+
+def cache_key(params):
+    payload = json.dumps(normalize_params(params), sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def shared_response_cache():
+    """Process-wide cache at SERPAPI_CACHE_PATH, or None when caching is disabled or unavailable"""
+    global _shared_cache
+    if os.getenv("SERPAPI_CACHE_DISABLED", "").lower() in ("1", "true", "yes"):
+        return None
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            try:
+                _shared_cache = ResponseCache(os.getenv("SERPAPI_CACHE_PATH", DEFAULT_CACHE_PATH))
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"SerpAPI response cache unavailable: {e}")
+                return None
+        return _shared_cache
+
+
+class ResponseCache:
+    """SQLite-backed response cache with per-engine TTLs, LRU eviction and stale-while-revalidate"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=5000, ttls=None, refresh_workers=2):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.ttls = dict(ENGINE_TTLS, **(ttls or {}))
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._refresher = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="cache-refresh")
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, engine TEXT NOT NULL, body TEXT NOT NULL, "
+                "stored_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+
+    def _ttl(self, engine):
+        return self.ttls.get(engine, DEFAULT_TTL)
+
+    def lookup(self, params):
+        """Return (value, state) where state is "fresh", "stale" or "miss" """
+        key = cache_key(params)
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT engine, body, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None, "miss"
+            engine, body, stored_at = row
+            fresh_for, stale_for = self._ttl(engine)
+            age = now - stored_at
+            if age > fresh_for + stale_for:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None, "miss"
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        return json.loads(body), ("fresh" if age <= fresh_for else "stale")
+
+    def store(self, params, value):
+        now = time.time()
+        engine = params.get("engine", "")
+        body = json.dumps(value, separators=(",", ":"))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, engine, body, stored_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (cache_key(params), engine, body, now, now)
+            )
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def begin_refresh(self, params):
+        """Claim the background refresh for these params; False if one is already running"""
+        key = cache_key(params)
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def end_refresh(self, params):
+        with self._lock:
+            self._refreshing.discard(cache_key(params))
+
+    def _refresh(self, params, fetch):
+        try:
+            self.store(params, fetch())
+        except Exception as e:
+            logger.warning(f"Background cache refresh failed for {params.get('engine')}: {e}")
+        finally:
+            self.end_refresh(params)
+
+    def get_or_fetch(self, params, fetch):
+        value, state = self.lookup(params)
+        if state == "fresh":
+            return value
+        if state == "stale":
+            if self.begin_refresh(params):
+                self._refresher.submit(self._refresh, params, fetch)
+            return value
+        value = fetch()
+        self.store(params, value)
+        return value
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self):
+        self._refresher.shutdown(wait=False)
+        with self._lock:
+            self._conn.close()
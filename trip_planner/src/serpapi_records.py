@@ -0,0 +1,198 @@
+import io
+from collections import namedtuple
+
+import ijson
+
+# Records projected from one SerpAPI response, plus its pagination token when it has one
+RecordPage = namedtuple("RecordPage", ["records", "next_page_token"])
+
+MAX_AMENITIES = 6
+
+
+def _number(value):
+    return float(value) if isinstance(value, (int, float)) else None
+
+
+def _duration(minutes):
+    if minutes is None:
+        return "?"
+    hours, minutes = divmod(int(minutes), 60)
+    return f"{hours}h {minutes:02d}m" if hours else f"{minutes}m"
+
+
+def _money(amount):
+    return "price n/a" if amount is None else f"${amount:,.0f}"
+
+
+class _Record:
+    """Base for compact SerpAPI projections: fixed __slots__, plain-dict round trip for caching"""
+
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __hash__(self):
+        # List fields (airlines, amenities) hash as tuples so equal records hash alike
+        return hash((type(self), *(tuple(value) if isinstance(value, list) else value
+                                   for value in (getattr(self, name) for name in self.__slots__))))
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class FlightOffer(_Record):
+    __slots__ = ("price", "airlines", "route", "stops", "duration_minutes", "departure_time", "arrival_time")
+
+    @classmethod
+    def from_serpapi(cls, offer):
+        legs = offer.get("flights") or []
+        airports = [leg.get("departure_airport", {}).get("id") for leg in legs]
+        if legs:
+            airports.append(legs[-1].get("arrival_airport", {}).get("id"))
+        return cls(
+            price=_number(offer.get("price")),
+            airlines=sorted({leg.get("airline") for leg in legs if leg.get("airline")}),
+            route="-".join(airport for airport in airports if airport),
+            stops=max(len(legs) - 1, 0),
+            duration_minutes=_number(offer.get("total_duration")),
+            departure_time=legs[0].get("departure_airport", {}).get("time") if legs else None,
+            arrival_time=legs[-1].get("arrival_airport", {}).get("time") if legs else None,
+        )
+
+    def to_prompt(self):
+        stops = "nonstop" if not self.stops else f"{self.stops} stop{'s' if self.stops > 1 else ''}"
+        departs = f" | dep {self.departure_time}" if self.departure_time else ""
+        return (f"{_money(self.price)} | {', '.join(self.airlines) or 'airline n/a'} | {self.route} | "
+                f"{stops} | {_duration(self.duration_minutes)}{departs}")
+
+
+class HotelOffer(_Record):
+    __slots__ = ("name", "price_per_night", "total_price", "rating", "reviews", "hotel_class", "amenities", "link")
+
+    @classmethod
+    def from_serpapi(cls, hotel):
+        return cls(
+            name=hotel.get("name"),
+            price_per_night=_number((hotel.get("rate_per_night") or {}).get("extracted_lowest")),
+            total_price=_number((hotel.get("total_rate") or {}).get("extracted_lowest")),
+            rating=_number(hotel.get("overall_rating")),
+            reviews=hotel.get("reviews"),
+            hotel_class=hotel.get("extracted_hotel_class"),
+            amenities=list(hotel.get("amenities") or [])[:MAX_AMENITIES],
+            link=hotel.get("link"),
+        )
+
+    def to_prompt(self):
+        stars = f" | {self.hotel_class}-star" if self.hotel_class else ""
+        rating = f" | rated {self.rating:g}" if self.rating is not None else ""
+        amenities = f" | {', '.join(self.amenities)}" if self.amenities else ""
+        return f"{self.name} | {_money(self.price_per_night)}/night{stars}{rating}{amenities}"
+
+
+class Place(_Record):
+    __slots__ = ("title", "category", "rating", "reviews", "address", "latitude", "longitude", "price")
+
+    @classmethod
+    def from_serpapi(cls, place):
+        gps = place.get("gps_coordinates") or {}
+        return cls(
+            title=place.get("title"),
+            category=place.get("type"),
+            rating=_number(place.get("rating")),
+            reviews=place.get("reviews"),
+            address=place.get("address"),
+            latitude=_number(gps.get("latitude")),
+            longitude=_number(gps.get("longitude")),
+            price=place.get("price"),
+        )
+
+    def to_prompt(self):
+        details = [part for part in (self.category, f"rated {self.rating:g}" if self.rating is not None else None,
+                                     self.price, self.address) if part]
+        return " | ".join([self.title or "?", *details])
+
+
+class Route(_Record):
+    __slots__ = ("mode", "duration_seconds", "distance_meters", "via")
+
+    @classmethod
+    def from_serpapi(cls, route):
+        return cls(
+            mode=route.get("travel_mode"),
+            duration_seconds=_number(route.get("duration")),
+            distance_meters=_number(route.get("distance")),
+            via=route.get("via"),
+        )
+
+    def to_prompt(self):
+        minutes = None if self.duration_seconds is None else self.duration_seconds / 60
+        distance = "" if self.distance_meters is None else f" | {self.distance_meters / 1000:.1f} km"
+        via = f" via {self.via}" if self.via else ""
+        return f"{self.mode or 'route'}{via} | {_duration(minutes)}{distance}"
+
+
+# Projection name -> record type and the JSON paths of the items it is built from
+PROJECTIONS = {
+    'flights': (FlightOffer, ("best_flights", "other_flights")),
+    'hotels': (HotelOffer, ("properties",)),
+    'places': (Place, ("local_results",)),
+    'local_places': (Place, ("local_results.places",)),
+    'routes': (Route, ("directions",)),
+}
+
+PAGINATION_PATH = "serpapi_pagination.next_page_token"
+
+
+def project(body, kind):
+    """RecordPage of compact records from a SerpAPI response body: bytes or a readable stream.
+
+    The body is parsed in one incremental pass. Only the items of the
+    projection's arrays are materialized, and the pagination token is picked
+    up on the way; images, tokens and other metadata are skipped.
+    """
+    if isinstance(body, (bytes, bytearray)):
+        body = io.BytesIO(body)
+    record_type, paths = PROJECTIONS[kind]
+    item_prefixes = {f"{path}.item" for path in paths}
+    records, next_page_token = [], None
+    builder, item_prefix = None, None
+    for prefix, event, value in ijson.parse(body, use_float=True):
+        if builder is None:
+            if event == "start_map" and prefix in item_prefixes:
+                builder, item_prefix = ijson.ObjectBuilder(), prefix
+                builder.event(event, value)
+            elif prefix == PAGINATION_PATH and event == "string":
+                next_page_token = value
+            continue
+        builder.event(event, value)
+        if event == "end_map" and prefix == item_prefix:
+            records.append(record_type.from_serpapi(builder.value))
+            builder = None
+    return RecordPage(records, next_page_token)
+
+
+def page_to_dict(page):
+    return {'records': [record.to_dict() for record in page.records], 'next_page_token': page.next_page_token}
+
+
+def page_from_dict(data, kind):
+    record_type = PROJECTIONS[kind][0]
+    return RecordPage([record_type.from_dict(record) for record in data['records']], data['next_page_token'])
+
+
+def render_records(records, limit=None):
+    """Token-efficient prompt text: one line per record"""
+    return "\n".join(f"- {record.to_prompt()}" for record in list(records)[:limit])
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from functools import partial
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution.
+
+    The first caller for a key runs the call; callers arriving while it is in
+    flight wait for the same result or exception. Sync callers in threads and
+    async callers on any event loop share one table, since the in-flight
+    result is a thread-safe concurrent.futures.Future. Nothing is kept once a
+    call finishes, so this is deduplication, not caching.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        # Strong references to running leader tasks, which the event loop only holds weakly
+        self._tasks = set()
+        self._lock = threading.Lock()
+
+    def _claim(self, key):
+        """Return (future, leader): leader is True when the caller must run the call"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = self._calls[key] = Future()
+            return future, True
+
+    def _settle(self, key, future, result=None, error=None):
+        with self._lock:
+            self._calls.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def do(self, key, fn):
+        future, leader = self._claim(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            self._settle(key, future, error=e)
+            raise
+        self._settle(key, future, result)
+        return result
+
+    def _settle_task(self, key, future, task):
+        self._tasks.discard(task)
+        if task.cancelled():
+            self._settle(key, future, error=asyncio.CancelledError())
+        elif task.exception() is not None:
+            self._settle(key, future, error=task.exception())
+        else:
+            self._settle(key, future, task.result())
+
+    async def do_async(self, key, coro_fn):
+        future, leader = self._claim(key)
+        if leader:
+            # A detached task, so cancelling the caller that started it does not cancel it for the others
+            task = asyncio.ensure_future(coro_fn())
+            self._tasks.add(task)
+            task.add_done_callback(partial(self._settle_task, key, future))
+        # Every caller waits shielded, so a cancellation only affects that caller
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+
+_shared_flights = SingleFlight()
+
+
+def shared_single_flight():
+    return _shared_flights
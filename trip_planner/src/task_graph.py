@@ -0,0 +1,236 @@
+import contextvars
+import logging
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from .metrics import estimate_tokens, task_scope
+from .plan_schemas import output_data, output_markdown
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_SEPARATOR = "\n\n----------\n\n"
+
+# kind is "started", "finished" or "failed"; output is set for "finished" only
+TaskEvent = namedtuple("TaskEvent", ["kind", "task_name", "completed", "total", "output"])
+
+
+def task_dependencies(task):
+    """Return the tasks listed in a task's context, ignoring crewai's NOT_SPECIFIED sentinel"""
+    context = getattr(task, 'context', None)
+    return list(context) if isinstance(context, (list, tuple)) else []
+
+
+class TaskGraphOutput:
+    """Result of a task graph run, exposing the same fields the app reads from CrewOutput"""
+
+    def __init__(self, tasks_output, metrics=None):
+        self.tasks_output = tasks_output
+        self.metrics = metrics
+        self.by_name = {output.name: output for output in tasks_output}
+
+    def markdown(self):
+        """Display-ready markdown by task name"""
+        return {name: output_markdown(output) for name, output in self.by_name.items()}
+
+    def data(self):
+        """Validated structured data by task name, for tasks with an output schema"""
+        data = {}
+        for name, output in self.by_name.items():
+            value = output_data(output)
+            if value is not None:
+                data[name] = value
+        return data
+
+    @property
+    def raw(self):
+        return self.tasks_output[-1].raw if self.tasks_output else ""
+
+    def __str__(self):
+        return self.raw
+
+
+class TaskGraphExecutor:
+    """Run crewai tasks as a dependency graph built from each task's context list.
+
+    Tasks whose context dependencies are satisfied run concurrently on a bounded
+    thread pool. Two tasks bound to the same agent never run at the same time,
+    because a crewai Agent keeps its executor state on the instance.
+
+    With a RunMetrics, each task's queue time (ready to started) and wall time
+    are recorded, and workers run inside the task's metrics scope so LLM and
+    API calls are attributed to it.
+
+    compactors maps a task name to an object whose compact(sections) turns the
+    (name, raw output) pairs of that task's context into a shorter context.
+    Compaction runs on the consumer's worker thread.
+
+    precomputed maps id(task) to an output reused from an earlier run; those
+    tasks are not executed and count as finished from the start.
+    """
+
+    def __init__(self, tasks, max_workers=4, on_event=None, metrics=None, compactors=None, precomputed=None):
+        self.tasks = list(tasks)
+        self.max_workers = max(1, int(max_workers))
+        self.on_event = on_event
+        self.metrics = metrics
+        self.compactors = dict(compactors or {})
+        self.precomputed = dict(precomputed or {})
+        self._members = {id(task) for task in self.tasks}
+        self._position = {id(task): index for index, task in enumerate(self.tasks)}
+        self.dependencies = {
+            id(task): [dep for dep in task_dependencies(task) if id(dep) in self._members]
+            for task in self.tasks
+        }
+        self.dependents = {id(task): [] for task in self.tasks}
+        for task in self.tasks:
+            for dep in self.dependencies[id(task)]:
+                self.dependents[id(dep)].append(task)
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        remaining = {key: len(deps) for key, deps in self.dependencies.items()}
+        frontier = [task for task in self.tasks if not remaining[id(task)]]
+        visited = 0
+        while frontier:
+            task = frontier.pop()
+            visited += 1
+            for dependent in self.dependents[id(task)]:
+                remaining[id(dependent)] -= 1
+                if not remaining[id(dependent)]:
+                    frontier.append(dependent)
+        if visited != len(self.tasks):
+            raise ValueError("Task context dependencies contain a cycle")
+
+    def critical_path_length(self):
+        """Number of tasks on the longest dependency chain"""
+        depth = {}
+        for task in self._topological_order():
+            deps = self.dependencies[id(task)]
+            depth[id(task)] = 1 + max((depth[id(dep)] for dep in deps), default=0)
+        return max(depth.values(), default=0)
+
+    def _topological_order(self):
+        order, seen = [], set()
+
+        def visit(task):
+            if id(task) in seen:
+                return
+            seen.add(id(task))
+            for dep in self.dependencies[id(task)]:
+                visit(dep)
+            order.append(task)
+
+        for task in self.tasks:
+            visit(task)
+        return order
+
+    def _context_sections(self, task, outputs):
+        sections = []
+        for dep in task_dependencies(task):
+            output = outputs.get(id(dep)) if id(dep) in self._members else getattr(dep, 'output', None)
+            if output is not None:
+                sections.append((dep.name, output_markdown(output)))
+        return sections
+
+    def _build_context(self, task, sections, task_metrics=None):
+        context = CONTEXT_SEPARATOR.join(raw for _, raw in sections)
+        compactor = self.compactors.get(task.name)
+        if compactor is None or not sections:
+            return context
+        compacted = compactor.compact(sections)
+        if task_metrics is not None:
+            task_metrics.record_context(estimate_tokens(context), estimate_tokens(compacted))
+        logger.info(
+            f"Compacted context for {task.name}: ~{estimate_tokens(context)} -> ~{estimate_tokens(compacted)} tokens"
+        )
+        return compacted
+
+    def _emit(self, kind, task, completed, output=None):
+        if self.on_event is None:
+            return
+        try:
+            self.on_event(TaskEvent(kind, task.name, completed, len(self.tasks), output))
+        except Exception as e:
+            logger.warning(f"Task event callback failed: {e}")
+
+    def _task_metrics(self, task):
+        if self.metrics is None:
+            return None
+        return self.metrics.task(task.name, getattr(task.agent, 'role', None))
+
+    def _mark_ready(self, task):
+        task_metrics = self._task_metrics(task)
+        if task_metrics is not None:
+            task_metrics.mark_queued()
+
+    def _execute(self, task, sections, task_metrics=None):
+        logger.info(f"Starting task: {task.name}")
+        if task_metrics is not None:
+            task_metrics.mark_started()
+        try:
+            with task_scope(task_metrics):
+                context = self._build_context(task, sections, task_metrics)
+                output = task.execute_sync(agent=task.agent, context=context)
+        except BaseException:
+            if task_metrics is not None:
+                task_metrics.mark_finished(succeeded=False)
+            raise
+        if task_metrics is not None:
+            task_metrics.mark_finished()
+        logger.info(f"Finished task: {task.name}")
+        return output
+
+    def run(self):
+        outputs = {}
+        remaining = {key: len(deps) for key, deps in self.dependencies.items()}
+        for task in self.tasks:
+            if id(task) in self.precomputed:
+                outputs[id(task)] = self.precomputed[id(task)]
+                task_metrics = self._task_metrics(task)
+                if task_metrics is not None:
+                    task_metrics.status = "reused"
+                self._emit("finished", task, len(outputs), outputs[id(task)])
+                for dependent in self.dependents[id(task)]:
+                    remaining[id(dependent)] -= 1
+        ready = [task for task in self.tasks if not remaining[id(task)] and id(task) not in outputs]
+        for task in ready:
+            self._mark_ready(task)
+        running = {}
+        busy_agents = set()
+
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="trip-task")
+        try:
+            while ready or running:
+                deferred = []
+                for task in ready:
+                    if len(running) >= self.max_workers or id(task.agent) in busy_agents:
+                        deferred.append(task)
+                        continue
+                    busy_agents.add(id(task.agent))
+                    sections = self._context_sections(task, outputs)
+                    # Workers inherit the caller's context, e.g. the run's metrics scope
+                    worker_context = contextvars.copy_context()
+                    future = pool.submit(
+                        worker_context.run, self._execute, task, sections, self._task_metrics(task)
+                    )
+                    running[future] = task
+                    self._emit("started", task, len(outputs))
+                ready = deferred
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    busy_agents.discard(id(task.agent))
+                    if future.exception() is not None:
+                        self._emit("failed", task, len(outputs))
+                    outputs[id(task)] = future.result()
+                    self._emit("finished", task, len(outputs), outputs[id(task)])
+                    for dependent in self.dependents[id(task)]:
+                        remaining[id(dependent)] -= 1
+                        if not remaining[id(dependent)]:
+                            self._mark_ready(dependent)
+                            ready.append(dependent)
+                ready.sort(key=lambda task: self._position[id(task)])
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        return TaskGraphOutput([outputs[id(task)] for task in self.tasks], metrics=self.metrics)
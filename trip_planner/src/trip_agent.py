@@ -1,10 +1,10 @@
-from .trip_agents import TripAgents
+from .trip_agents import shared_trip_agents
 from .trip_tasks import TripTasks
 from .trip_crew import EnhancedTripCrew
 
 class TripAgent:
     def __init__(self):
-        self.agents = TripAgents()
+        self.agents = shared_trip_agents()
     
     def get_agent(self, agent_type):
         agent_methods = {
@@ -1,184 +1,266 @@
-from crewai import Crew, Process
-from .trip_agents import TripAgents
+from .trip_agents import shared_trip_agents
 from .trip_tasks import TripTasks
 from .api_services import APIIntegrationService
+from .task_graph import TaskGraphExecutor
+from .registry import LazyRegistry
+from .metrics import RunMetrics, flush_llm_events, install_llm_listener, run_scope
+from .context_compaction import make_compactor
+from .llm_pool import GEMINI_MODEL, shared_llm_pool
+from .model_routing import ModelRouter
+from .replan import changed_input_keys, reusable_outputs
+from .plan_schemas import output_data, output_markdown
+from .knowledge_pack import verified_facts
+from functools import partial
 import logging
+import os
 
 # Configure logging for better debugging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class EnhancedTripCrew:
-    def __init__(self, inputs):
-        self.inputs = inputs
-        self.agents_instance = TripAgents(use_gemini=True)
-        self.tasks_instance = TripTasks()
-        
-        # Initialize all agents
-        self._initialize_agents()
-        
-        # Initialize all tasks based on available agents
-        self._initialize_tasks()
-
-    def _initialize_agents(self):
-        """Initialize all available agents"""
+    # Crew attribute -> TripAgents factory method
+    AGENT_FACTORIES = {
         # Core travel planning agents
-        self.city_selector = self.agents_instance.country_selector_agent()
-        self.local_expert = self.agents_instance.local_expert_agent()
-        self.travel_planner = self.agents_instance.travel_planner_agent()
-        self.budget_manager = self.agents_instance.budget_manager_agent()
-        self.accommodation_specialist = self.agents_instance.accommodation_agent()
-        self.transportation_coordinator = self.agents_instance.transportation_agent()
-        
+        'city_selector': 'country_selector_agent',
+        'local_expert': 'local_expert_agent',
+        'travel_planner': 'travel_planner_agent',
+        'budget_manager': 'budget_manager_agent',
+        'accommodation_specialist': 'accommodation_agent',
+        'transportation_coordinator': 'transportation_agent',
         # Enhanced service agents
-        self.currency_converter = self.agents_instance.currency_conversion_agent()
-        self.visa_officer = self.agents_instance.visa_documentation_agent()
-        self.flight_hunter = self.agents_instance.flight_finder_agent()
-        self.hotel_expert = self.agents_instance.hotel_finder_agent()
-        self.transport_optimizer = self.agents_instance.local_transport_optimizer()
-        self.safety_advisor = self.agents_instance.emergency_safety_agent()
-        
+        'currency_converter': 'currency_conversion_agent',
+        'visa_officer': 'visa_documentation_agent',
+        'flight_hunter': 'flight_finder_agent',
+        'hotel_expert': 'hotel_finder_agent',
+        'transport_optimizer': 'local_transport_optimizer',
+        'safety_advisor': 'emergency_safety_agent',
         # Special feature agents
-        self.mystery_mode = self.agents_instance.mystery_mode_agent()
-        self.story_narrator = self.agents_instance.story_narrator_agent()
-
-    def _initialize_tasks(self):
-        """Initialize tasks with proper dependencies"""
-        # Phase 1: Destination Planning
-        self.destination_selection = self.tasks_instance.country_selector_task(
-            self.city_selector, self.inputs
-        )
-        
-        # Phase 2: Research and Intelligence
-        self.destination_research = self.tasks_instance.city_research_task(
-            self.local_expert, self.inputs
-        )
-        
-        # Phase 3: Logistics Planning
-        self.currency_conversion = self.tasks_instance.currency_conversion_task(
-            self.currency_converter, self.inputs
-        )
-        
-        self.visa_requirements = self.tasks_instance.visa_documentation_task(
-            self.visa_officer, self.inputs
-        )
-        
-        # Phase 4: Transportation Planning
-        self.flight_optimization = self.tasks_instance.flight_finder_task(
-            self.flight_hunter, self.inputs
-        )
-        
-        self.transportation_planning = self.tasks_instance.transportation_task(
-            self.transportation_coordinator, self.inputs
-        )
-        
-        self.local_transport_optimization = self.tasks_instance.local_transport_optimization_task(
-            self.transport_optimizer, self.inputs
-        )
-        
-        # Phase 5: Accommodation Planning
-        self.hotel_optimization = self.tasks_instance.hotel_finder_task(
-            self.hotel_expert, self.inputs
-        )
-        
-        self.accommodation_planning = self.tasks_instance.accommodation_task(
-            self.accommodation_specialist, self.inputs
-        )
-        
-        # Phase 6: Itinerary Creation (depends on research and logistics)
-        self.itinerary_creation = self.tasks_instance.itinerary_creation_task(
-            self.travel_planner, self.inputs
-        )
-        
-        # Phase 7: Budget Planning (depends on itinerary and accommodations)
-        self.budget_planning = self.tasks_instance.budget_planning_task(
-            self.budget_manager, 
-            self.inputs, 
-            context_tasks=[
-                self.itinerary_creation, 
-                self.accommodation_planning, 
-                self.transportation_planning
-            ]
-        )
-        
-        # Phase 8: Safety and Security
-        self.safety_planning = self.tasks_instance.emergency_safety_task(
-            self.safety_advisor, self.inputs
-        )
-        
-        # Phase 9: Additional Features
-        self.packing_guide = self.tasks_instance.packing_list_task(
-            self.accommodation_specialist, self.inputs  # Reusing agent for packing
+        'mystery_mode': 'mystery_mode_agent',
+        'story_narrator': 'story_narrator_agent',
+    }
+
+    # Crew attribute -> (TripTasks factory method, agent attribute, context task attributes)
+    TASK_SPECS = {
+        'destination_selection': ('country_selector_task', 'city_selector', ()),
+        'destination_research': ('city_research_task', 'local_expert', ()),
+        'currency_conversion': ('currency_conversion_task', 'currency_converter', ()),
+        'visa_requirements': ('visa_documentation_task', 'visa_officer', ()),
+        'flight_optimization': ('flight_finder_task', 'flight_hunter', ()),
+        'transportation_planning': ('transportation_task', 'transportation_coordinator', ()),
+        'local_transport_optimization': ('local_transport_optimization_task', 'transport_optimizer', ()),
+        'hotel_optimization': ('hotel_finder_task', 'hotel_expert', ()),
+        'accommodation_planning': ('accommodation_task', 'accommodation_specialist', ()),
+        'itinerary_creation': ('itinerary_creation_task', 'travel_planner', ()),
+        'budget_planning': (
+            'budget_planning_task', 'budget_manager',
+            ('itinerary_creation', 'accommodation_planning', 'transportation_planning')
+        ),
+        'safety_planning': ('emergency_safety_task', 'safety_advisor', ()),
+        'packing_guide': ('packing_list_task', 'accommodation_specialist', ()),  # Reusing agent for packing
+        'travel_story': ('story_narrative_task', 'story_narrator', ('itinerary_creation',)),
+        'weather_analysis': ('weather_analysis_task', 'local_expert', ()),  # Reusing local expert for weather
+        'cultural_immersion': ('cultural_immersion_task', 'local_expert', ()),
+        'mystery_destination': ('mystery_mode_task', 'mystery_mode', ()),
+        'mystery_story': ('story_narrative_task', 'story_narrator', ('mystery_destination',)),
+    }
+
+    # Crew task attribute -> default compaction of its context ("facts", "summary" or "off");
+    # the compaction argument or CONTEXT_COMPACTION overrides it for every listed task
+    CONTEXT_COMPACTION = {
+        'budget_planning': 'facts',
+    }
+
+    # Task name -> section key in export_plan_data; other tasks export under their own name
+    EXPORT_SECTIONS = {
+        'destination_selection': 'destinations',
+        'serendipity_destination': 'destinations',
+        'destination_research': 'city_research',
+        'currency_management': 'currency_info',
+        'visa_requirements': 'visa_requirements',
+        'detailed_itinerary': 'itinerary',
+        'accommodation_recommendations': 'accommodation',
+        'transportation_planning': 'transportation',
+        'comprehensive_budget': 'budget_breakdown',
+        'safety_security_planning': 'safety_guide',
+        'smart_packing_guide': 'packing_list',
+    }
+
+    def __init__(self, inputs, max_workers=4, mode="full", metrics_path=None,
+                 compaction=None, compaction_max_tokens=None, router=None):
+        self.inputs = inputs
+        self.max_workers = max_workers
+        self.mode = mode
+        self.compaction = compaction or os.getenv("CONTEXT_COMPACTION")
+        self.compaction_max_tokens = compaction_max_tokens
+        self.on_event = None
+        # Each run appends its metrics as JSON lines here when set
+        self.metrics_path = metrics_path or os.getenv("TRIP_METRICS_PATH")
+        self.metrics = None
+        # (previous inputs, previous outputs by task name) while a replan() is running
+        self._previous = None
+        self.router = router or ModelRouter.load()
+        self.agents_instance = shared_trip_agents(use_gemini=True)
+        self.tasks_instance = TripTasks()
+
+        # Agents and tasks are only built when a mode first asks for them. Agents are
+        # keyed "<name>@<tier>"; the bare name resolves to the agent's own tier.
+        agent_factories = {}
+        for name, method in self.AGENT_FACTORIES.items():
+            agent_factories[name] = partial(self._routed_agent, name, None)
+            for tier in self.router.tier_names():
+                agent_factories[f"{name}@{tier}"] = partial(self._build_agent, method, tier)
+        self._agents = LazyRegistry(agent_factories)
+        self._tasks = LazyRegistry({
+            name: partial(self._build_task, name, *spec)
+            for name, spec in self.TASK_SPECS.items()
+        })
+
+    def __getattr__(self, name):
+        # Only reached for attributes not set in __init__, i.e. registry entries
+        registries = [self.__dict__.get('_agents'), self.__dict__.get('_tasks')]
+        for registry in registries:
+            if registry is not None and name in registry:
+                return registry.get(name)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def _build_agent(self, method, tier):
+        llm = shared_llm_pool().get_tier(
+            tier, self.router.settings(tier), use_gemini=self.agents_instance.use_gemini
         )
-        
-        self.travel_story = self.tasks_instance.story_narrative_task(
-            self.story_narrator, self.inputs
+        return getattr(self.agents_instance, method)(llm=llm)
+
+    def _routed_agent(self, agent_name, task_name):
+        tier = self.router.tier_for(task_name=task_name, agent_name=agent_name)
+        return self._agents.get(f"{agent_name}@{tier}")
+
+    def _build_task(self, task_name, method, agent_name, context_names):
+        factory = getattr(self.tasks_instance, method)
+        agent = self._routed_agent(agent_name, task_name)
+        if context_names:
+            context_tasks = [self._tasks.get(name) for name in context_names]
+            return factory(agent, self.inputs, context_tasks=context_tasks)
+        return factory(agent, self.inputs)
+
+    def _summary_llm(self):
+        model = os.getenv("CONTEXT_SUMMARY_MODEL", GEMINI_MODEL)
+        return shared_llm_pool().get(model, temperature=0.0)
+
+    def _compactors(self, tasks):
+        """Context compactors by task name, for the tasks in this run that declare one"""
+        selected = {id(task) for task in tasks}
+        compactors = {}
+        for name, default_kind in self.CONTEXT_COMPACTION.items():
+            if not self._tasks.is_built(name) or id(self._tasks.get(name)) not in selected:
+                continue
+            kind = self.compaction or default_kind
+            llm = self._summary_llm() if kind == "summary" else None
+            compactor = make_compactor(kind, self.compaction_max_tokens, llm=llm)
+            if compactor is not None:
+                compactors[self._tasks.get(name).name] = compactor
+        return compactors
+
+    def _reusable_outputs(self, tasks):
+        """Earlier outputs of the tasks a replan() does not need to re-run"""
+        if self._previous is None:
+            return {}
+        previous_inputs, previous_outputs = self._previous
+        changed = changed_input_keys(previous_inputs, self.inputs)
+        input_keys = {
+            id(self._tasks.get(name)): self.tasks_instance.input_keys(self.TASK_SPECS[name][0])
+            for name in self._tasks.built_names()
+        }
+        reused = reusable_outputs(tasks, input_keys, changed, previous_outputs)
+        logger.info(
+            f"Re-planning after changes to {sorted(changed) or 'nothing'}: "
+            f"re-running {len(tasks) - len(reused)} of {len(tasks)} tasks"
         )
-        
-        # Additional enhancement tasks
-        self.weather_analysis = self.tasks_instance.weather_analysis_task(
-            self.local_expert, self.inputs  # Reusing local expert for weather
+        return reused
+
+    def _execute_tasks(self, tasks):
+        """Run tasks concurrently, ordered only by their context dependencies"""
+        executor = TaskGraphExecutor(
+            tasks, max_workers=self.max_workers, on_event=self.on_event, metrics=self.metrics,
+            compactors=self._compactors(tasks), precomputed=self._reusable_outputs(tasks)
         )
-        
-        self.cultural_immersion = self.tasks_instance.cultural_immersion_task(
-            self.local_expert, self.inputs
+        logger.info(
+            f"Running {len(tasks)} tasks with {executor.max_workers} workers "
+            f"(critical path: {executor.critical_path_length()} tasks)"
         )
+        return executor.run()
 
-    def _initialize_mystery_mode_tasks(self):
-        """Initialize mystery mode specific tasks"""
-        self.mystery_destination = self.tasks_instance.mystery_mode_task(
-            self.mystery_mode, self.inputs
-        )
+    def run_crew(self, mode=None, include_enhanced_features=True, on_event=None):
+        """Run the crew; on_event receives a TaskEvent as each task starts and finishes.
 
-    def run_crew(self, mode="full", include_enhanced_features=True):
+        The returned result carries the run's RunMetrics as result.metrics; they
+        are also kept on self.metrics, including for failed runs.
+        """
+        mode = mode or self.mode
+        if on_event is not None:
+            self.on_event = on_event
+        install_llm_listener()
+        self.metrics = RunMetrics(mode=mode)
         try:
-            # Configure API services
-            if include_enhanced_features:
-                try:
-                    self.tasks_instance.api_service = APIIntegrationService()
-                except ValueError as e:
-                    print(f"API Configuration Warning: {e}")
-                    print("Running with limited API features...")
-                    include_enhanced_features = False
-
-            # Select execution mode
-            if mode == "mystery":
-                return self._run_mystery_mode()
-            elif mode == "basic":
-                return self._run_basic_mode()
-            elif mode == "full":
-                return self._run_full_mode(include_enhanced_features)
-            else:
-                return self._run_custom_mode(include_enhanced_features)
+            with run_scope(self.metrics):
+                # Configure API services
+                if include_enhanced_features:
+                    try:
+                        self.tasks_instance.api_service = APIIntegrationService()
+                    except ValueError as e:
+                        print(f"API Configuration Warning: {e}")
+                        print("Running with limited API features...")
+                        include_enhanced_features = False
+
+                # Select execution mode
+                if mode == "mystery":
+                    return self._run_mystery_mode()
+                elif mode == "basic":
+                    return self._run_basic_mode()
+                elif mode == "full":
+                    return self._run_full_mode(include_enhanced_features)
+                else:
+                    return self._run_custom_mode(include_enhanced_features)
 
         except Exception as e:
             print(f"Error running crew: {e}")
             return None
+        finally:
+            self._finish_metrics()
+
+    def replan(self, previous_inputs, previous_outputs, mode=None, include_enhanced_features=True, on_event=None):
+        """Run the crew again, reusing previous_outputs (task name -> raw output or TaskOutput)
+        for every task whose declared inputs did not change since previous_inputs
+        """
+        self._previous = (previous_inputs, previous_outputs)
+        try:
+            return self.run_crew(mode, include_enhanced_features, on_event)
+        finally:
+            self._previous = None
+
+    def _finish_metrics(self):
+        """Close the run's metrics, log a one-line summary and export them if configured"""
+        flush_llm_events()
+        self.metrics.finish()
+        summary = self.metrics.summary()
+        logger.info(
+            f"Run {summary['run_id']} ({summary['mode']}): {summary['wall_time']:.1f}s, "
+            f"{summary['llm_calls']} LLM calls, "
+            f"{summary['prompt_tokens'] + summary['completion_tokens']} tokens, "
+            f"${summary['cost_usd']:.4f}, {summary['api_calls']} API calls; "
+            f"slowest task: {summary['slowest_task']}"
+        )
+        if self.metrics_path:
+            try:
+                self.metrics.write_jsonl(self.metrics_path)
+            except OSError as e:
+                logger.warning(f"Could not write metrics to {self.metrics_path}: {e}")
 
     def _run_mystery_mode(self):
         """Execute mystery/serendipity mode"""
-        self._initialize_mystery_mode_tasks()
-        
-        crew = Crew(
-            agents=[self.mystery_mode, self.story_narrator],
-            tasks=[self.mystery_destination, self.travel_story],
-            verbose=True,
-            process=Process.sequential
-        )
-        
-        return crew.kickoff()
+        return self._execute_tasks([self.mystery_destination, self.mystery_story])
 
     def _run_basic_mode(self):
         """Execute basic trip planning without API features"""
-        basic_agents = [
-            self.city_selector,
-            self.local_expert,
-            self.travel_planner,
-            self.budget_manager,
-            self.accommodation_specialist,
-            self.transportation_coordinator
-        ]
-        
         basic_tasks = [
             self.destination_selection,
             self.destination_research,
@@ -188,30 +270,10 @@ class EnhancedTripCrew:
             self.budget_planning
         ]
         
-        crew = Crew(
-            agents=basic_agents,
-            tasks=basic_tasks,
-            verbose=True,
-            process=Process.sequential
-        )
-        
-        return crew.kickoff()
+        return self._execute_tasks(basic_tasks)
 
     def _run_full_mode(self, include_enhanced_features):
         """Execute comprehensive trip planning"""
-        # Core agents for all modes
-        agents = [
-            self.city_selector,
-            self.local_expert,
-            self.currency_converter,
-            self.visa_officer,
-            self.travel_planner,
-            self.budget_manager,
-            self.accommodation_specialist,
-            self.transportation_coordinator,
-            self.safety_advisor
-        ]
-        
         # Core tasks for all modes
         tasks = [
             self.destination_selection,
@@ -228,13 +290,6 @@ class EnhancedTripCrew:
         
         # Add enhanced features if available
         if include_enhanced_features:
-            agents.extend([
-                self.flight_hunter,
-                self.hotel_expert,
-                self.transport_optimizer,
-                self.story_narrator
-            ])
-            
             tasks.extend([
                 self.flight_optimization,
                 self.hotel_optimization,
@@ -242,67 +297,45 @@ class EnhancedTripCrew:
                 self.travel_story
             ])
 
-        crew = Crew(
-            agents=agents,
-            tasks=tasks,
-            verbose=True,
-            process=Process.sequential
-        )
-        
-        return crew.kickoff()
+        return self._execute_tasks(tasks)
 
     def _run_custom_mode(self, include_enhanced_features):
         """Execute custom mode based on user preferences"""
-        # Start with essential agents
-        agents = [self.city_selector, self.local_expert, self.travel_planner]
+        # Start with essential tasks
         tasks = [self.destination_selection, self.destination_research, self.itinerary_creation]
         
-        # Add agents based on user needs
+        # Add tasks based on user needs
         user_interests = self.inputs.get('interests', [])
         travel_type = self.inputs.get('travel_type', '').lower()
         
         # Budget-conscious travelers need budget management
         if 'budget' in travel_type or any('budget' in interest.lower() for interest in user_interests):
-            agents.append(self.budget_manager)
             tasks.append(self.budget_planning)
         
         # International travelers need visa and currency services
         if self.inputs.get('origin') != self.inputs.get('destination'):
-            agents.extend([self.currency_converter, self.visa_officer])
             tasks.extend([self.currency_conversion, self.visa_requirements])
         
         # All travelers need accommodation and safety
-        agents.extend([self.accommodation_specialist, self.safety_advisor])
         tasks.extend([self.accommodation_planning, self.safety_planning])
         
         # Add transportation based on preferences
         transport_prefs = self.inputs.get('transport_preferences', [])
         if transport_prefs:
-            agents.append(self.transportation_coordinator)
             tasks.append(self.transportation_planning)
             
             if include_enhanced_features:
-                agents.extend([self.flight_hunter, self.transport_optimizer])
                 tasks.extend([self.flight_optimization, self.local_transport_optimization])
         
         # Add luxury features for luxury travelers
         if 'luxury' in travel_type and include_enhanced_features:
-            agents.append(self.hotel_expert)
             tasks.append(self.hotel_optimization)
         
         # Add story narration for adventure/cultural travelers
         if any(keyword in travel_type for keyword in ['adventure', 'cultural', 'educational']):
-            agents.append(self.story_narrator)
             tasks.append(self.travel_story)
 
-        crew = Crew(
-            agents=agents,
-            tasks=tasks,
-            verbose=True,
-            process=Process.sequential
-        )
-        
-        return crew.kickoff()
+        return self._execute_tasks(tasks)
 
     def get_available_modes(self):
         """Return list of available execution modes"""
@@ -318,8 +351,9 @@ class EnhancedTripCrew:
         api_status = "Available" if self.tasks_instance.api_service else "Limited"
         
         return {
-            "agents_initialized": 12,
-            "tasks_available": 17,  # Updated count
+            "agents_initialized": len([name for name in self._agents.built_names() if "@" in name]),
+            "tasks_initialized": len(self._tasks.built_names()),
+            "tasks_available": len(self.TASK_SPECS),
             "api_services": api_status,
             "modes_available": list(self.get_available_modes().keys())
         }
@@ -393,29 +427,17 @@ class EnhancedTripCrew:
                 'duration': self.inputs.get('duration'),
                 'budget': self.inputs.get('budget'),
                 'generated_at': str(__import__('datetime').datetime.now()),
+                'quick_facts': verified_facts(self.inputs.get('destination', ''), self.inputs.get('origin')),
                 'sections': {}
             }
             
-            # Map task outputs to sections
-            section_mapping = {
-                0: 'destinations',
-                1: 'city_research', 
-                2: 'currency_info',
-                3: 'visa_requirements',
-                4: 'itinerary',
-                5: 'accommodation',
-                6: 'transportation',
-                7: 'budget_breakdown',
-                8: 'safety_guide',
-                9: 'packing_list'
-            }
-            
-            for idx, task_output in enumerate(result.tasks_output):
-                if idx in section_mapping:
-                    plan_data['sections'][section_mapping[idx]] = {
-                        'content': task_output.raw if hasattr(task_output, 'raw') else str(task_output),
-                        'task_name': getattr(task_output, 'name', f'Task {idx}')
-                    }
+            # Sections are keyed by task name, so every mode exports the right content
+            for task_output in result.tasks_output:
+                plan_data['sections'][self.EXPORT_SECTIONS.get(task_output.name, task_output.name)] = {
+                    'content': output_markdown(task_output),
+                    'data': output_data(task_output),
+                    'task_name': task_output.name
+                }
             
             return plan_data
             
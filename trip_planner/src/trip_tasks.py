@@ -1,12 +1,68 @@
 from crewai import Task
 from src.api_services import APIIntegrationService
+from src.knowledge_pack import verified_facts
+from src.live_data import LiveTripData
+from src.plan_schemas import structured_output
 
 class TripTasks:
+    # TripTasks method -> inputs keys its task reads; re-planning re-runs a task only when one changed
+    # Only the budget, flight, hotel and mystery prompts quote the budget, so a budget edit re-runs just those
+    INPUT_KEYS = {
+        'country_selector_task': ('destination', 'duration', 'group_type', 'interests', 'season', 'travel_type'),
+        'mystery_mode_task': ('budget', 'duration', 'travel_type'),
+        'city_research_task': ('destination', 'interests', 'season'),
+        'itinerary_creation_task': ('destination', 'duration', 'group_type', 'interests', 'season', 'travel_type'),
+        'budget_planning_task': ('budget', 'destination', 'duration', 'origin', 'travel_type'),
+        'accommodation_task': ('destination', 'duration', 'group_size', 'group_type', 'travel_type'),
+        'transportation_task': ('destination', 'duration', 'origin', 'transport_preferences'),
+        'currency_conversion_task': ('destination', 'origin'),
+        'visa_documentation_task': ('destination', 'duration', 'origin'),
+        'flight_finder_task': ('budget', 'destination', 'duration', 'group_size', 'origin', 'season'),
+        'hotel_finder_task': ('budget', 'destination', 'duration', 'group_size', 'season', 'travel_type'),
+        'local_transport_optimization_task': ('destination', 'duration', 'interests'),
+        'emergency_safety_task': ('destination', 'duration', 'group_type', 'origin', 'season'),
+        'story_narrative_task': ('destination', 'duration', 'interests', 'season', 'travel_type'),
+        'packing_list_task': ('destination', 'duration', 'group_type', 'interests', 'season', 'travel_type'),
+        'weather_analysis_task': ('destination', 'duration', 'interests', 'season'),
+        'cultural_immersion_task': ('destination', 'duration', 'group_type', 'interests'),
+    }
+
     def __init__(self):
         try:
             self.api_service = APIIntegrationService()
         except ValueError:
             self.api_service = None
+        self._live_data = None
+
+    @classmethod
+    def input_keys(cls, method):
+        """Inputs keys read by a task method, or None when undeclared (treat as reading everything)"""
+        return cls.INPUT_KEYS.get(method)
+
+    @staticmethod
+    def _verified_facts(inputs, with_entry=True):
+        """Knowledge pack facts for the prompt, so the LLM builds on them instead of regenerating them"""
+        facts = verified_facts(inputs['destination'], inputs.get('origin') if with_entry else None)
+        if not facts:
+            return ""
+        return (
+            "Verified facts (the traveler sees these separately; rely on them as given, "
+            "do not repeat or contradict them):\n" + facts + "\n"
+        )
+
+    @property
+    def live_data(self):
+        """LiveTripData over the current api_service, which the crew may replace"""
+        if self._live_data is None or self._live_data.service is not self.api_service:
+            self._live_data = LiveTripData(self.api_service)
+        return self._live_data
+
+    def _live_section(self, section, inputs):
+        """A LiveTripData section for the prompt, or "" without an API service"""
+        if self.api_service is None:
+            return ""
+        text = getattr(self.live_data, section)(inputs)
+        return text + "\n" if text else ""
 
     def country_selector_task(self, agent, inputs):
         return Task(
@@ -18,13 +74,13 @@ class TripTasks:
                 f"Season: {inputs['season']}\n"
                 f"Destination: {inputs['destination']}\n"
                 f"Duration: {inputs['duration']} days\n"
-                f"Budget: {inputs['budget']}\n"
                 f"Group: {inputs.get('group_type', 'Not specified')}\n"
                 "Consider cultural attractions, adventure opportunities, gastronomy, entertainment, and seasonal factors.\n"
                 "Output: Provide 3-5 city/location recommendations with detailed rationale."
             ),
             agent=agent,
-            expected_output="Detailed list of 3-5 destinations with explanations of why each fits user preferences, seasonal considerations, and highlight activities matching their interests."
+            expected_output="Detailed list of 3-5 destinations with explanations of why each fits user preferences, seasonal considerations, and highlight activities matching their interests.",
+            **structured_output("destination_selection")
         )
 
     def mystery_mode_task(self, agent, inputs):
@@ -40,7 +96,8 @@ class TripTasks:
                 f"Make the random selection feel like destiny with persuasive rationale."
             ),
             agent=agent,
-            expected_output="Single surprise destination with passionate explanation of why this random choice is the perfect adventure for the traveler."
+            expected_output="Single surprise destination with passionate explanation of why this random choice is the perfect adventure for the traveler.",
+            **structured_output("serendipity_destination")
         )
 
     def city_research_task(self, agent, inputs):
@@ -76,6 +133,7 @@ class TripTasks:
                 f"Season: {inputs['season']}\n"
                 f"Budget level: {inputs['travel_type']}\n"
                 f"Group type: {inputs.get('group_type', 'general')}\n"
+                f"{self._live_section('attraction_route', inputs)}"
                 "Include:\n"
                 "- Hour-by-hour daily schedules with buffer time\n"
                 "- Logical activity sequencing by location and opening hours\n"
@@ -89,7 +147,8 @@ class TripTasks:
                 "- Evening entertainment options"
             ),
             agent=agent,
-            expected_output="Day-by-day detailed itinerary with time slots, specific locations, estimated costs, and practical logistics for seamless travel experience."
+            expected_output="Day-by-day detailed itinerary with time slots, specific locations, estimated costs, and practical logistics for seamless travel experience.",
+            **structured_output("detailed_itinerary")
         )
 
     def budget_planning_task(self, agent, inputs, context_tasks=None):
@@ -115,7 +174,8 @@ class TripTasks:
             ),
             agent=agent,
             context=context_tasks if context_tasks else [],
-            expected_output="Itemized budget with daily costs, category totals, cost-saving recommendations, and contingency planning."
+            expected_output="Itemized budget with daily costs, category totals, cost-saving recommendations, and contingency planning.",
+            **structured_output("comprehensive_budget")
         )
 
     def accommodation_task(self, agent, inputs):
@@ -123,7 +183,6 @@ class TripTasks:
             name="accommodation_recommendations",
             description=(
                 f"Find optimal accommodation for {inputs['destination']}:\n"
-                f"Budget: {inputs['budget']}\n"
                 f"Duration: {inputs['duration']} nights\n"
                 f"Travel style: {inputs['travel_type']}\n"
                 f"Group size: {inputs.get('group_size', 2)}\n"
@@ -137,7 +196,8 @@ class TripTasks:
                 "For each option include: location benefits, amenities, estimated costs, booking tips, and pros/cons."
             ),
             agent=agent,
-            expected_output="Detailed accommodation guide with diverse options, location analysis, amenity comparisons, and booking strategies for different budgets."
+            expected_output="Detailed accommodation guide with diverse options, location analysis, amenity comparisons, and booking strategies for different budgets.",
+            **structured_output("accommodation_recommendations")
         )
 
     def transportation_task(self, agent, inputs):
@@ -147,7 +207,6 @@ class TripTasks:
                 f"Plan complete transportation for {inputs['destination']} trip:\n"
                 f"Origin: {inputs.get('origin', 'Not specified')}\n"
                 f"Duration: {inputs['duration']} days\n"
-                f"Budget: {inputs['budget']}\n"
                 f"Transport preferences: {inputs.get('transport_preferences', [])}\n"
                 "Cover all transportation needs:\n"
                 "- International flight options and booking strategies\n"
@@ -169,10 +228,11 @@ class TripTasks:
             name="currency_management",
             description=(
                 f"Provide currency conversion and money management for {inputs['destination']}:\n"
-                f"Budget: {inputs['budget']} USD\n"
                 f"Origin: {inputs.get('origin', 'USA')}\n"
+                f"{self._verified_facts(inputs, with_entry=False)}"
+                f"{self._live_section('exchange_rate', inputs)}"
                 "Include:\n"
-                "- Real-time exchange rate conversion\n"
+                "- Real-time exchange rate conversion (use the live rate when given)\n"
                 "- Historical rate trends and forecasts\n"
                 "- Best currency exchange methods and locations\n"
                 "- ATM strategies and fee avoidance\n"
@@ -180,7 +240,7 @@ class TripTasks:
                 "- Mobile payment options and digital wallets\n"
                 "- Tipping customs and cash requirements\n"
                 "- Money safety and security tips\n"
-                "- Budget allocation in local currency"
+                "- Typical daily costs in local currency"
             ),
             agent=agent,
             expected_output="Complete currency guide with converted amounts, exchange strategies, payment method recommendations, and financial safety tips."
@@ -194,6 +254,8 @@ class TripTasks:
                 f"Traveler origin: {inputs.get('origin', 'USA')}\n"
                 f"Trip duration: {inputs['duration']} days\n"
                 f"Travel purpose: Tourism\n"
+                f"{self._verified_facts(inputs)}"
+                f"{self._live_section('consulates', inputs)}"
                 "Provide comprehensive information:\n"
                 "- Current visa requirements and exemptions\n"
                 "- Required documents checklist\n"
@@ -219,10 +281,11 @@ class TripTasks:
                 f"Duration: {inputs['duration']} days\n"
                 f"Season: {inputs['season']}\n"
                 f"Passengers: {inputs.get('group_size', 2)}\n"
+                f"{self._live_section('flight_fares', inputs)}"
                 "Research and compare:\n"
                 "- Direct vs connecting flights\n"
                 "- Multiple airline options and pricing\n"
-                "- Flexible date savings opportunities\n"
+                "- Flexible date savings opportunities (use the live fare grid when given)\n"
                 "- Different booking platforms\n"
                 "- Seat selection and upgrade options\n"
                 "- Baggage policies and fees\n"
@@ -232,7 +295,8 @@ class TripTasks:
                 "- Loyalty program benefits"
             ),
             agent=agent,
-            expected_output="Detailed flight recommendations with price comparisons, booking strategies, and travel optimization tips."
+            expected_output="Detailed flight recommendations with price comparisons, booking strategies, and travel optimization tips.",
+            **structured_output("flight_optimization")
         )
 
     def hotel_finder_task(self, agent, inputs):
@@ -244,6 +308,7 @@ class TripTasks:
                 f"Duration: {inputs['duration']} nights\n"
                 f"Group: {inputs.get('group_size', 2)} guests\n"
                 f"Travel style: {inputs['travel_type']}\n"
+                f"{self._live_section('hotel_offers', inputs)}"
                 "Research and analyze:\n"
                 "- Hotels across different price tiers\n"
                 "- Location advantages and neighborhood analysis\n"
@@ -257,7 +322,8 @@ class TripTasks:
                 "- Proximity to attractions and transport"
             ),
             agent=agent,
-            expected_output="Comprehensive hotel guide with detailed comparisons, location analysis, and booking optimization strategies."
+            expected_output="Comprehensive hotel guide with detailed comparisons, location analysis, and booking optimization strategies.",
+            **structured_output("hotel_optimization")
         )
 
     def local_transport_optimization_task(self, agent, inputs):
@@ -266,7 +332,6 @@ class TripTasks:
             description=(
                 f"Optimize local transportation in {inputs['destination']}:\n"
                 f"Duration: {inputs['duration']} days\n"
-                f"Budget considerations: {inputs['budget']}\n"
                 f"Interests: {inputs.get('interests', [])}\n"
                 "Create comprehensive local transport strategy:\n"
                 "- Efficient routes between major attractions\n"
@@ -292,6 +357,7 @@ class TripTasks:
                 f"Trip duration: {inputs['duration']} days\n"
                 f"Group type: {inputs.get('group_type', 'general')}\n"
                 f"Season: {inputs['season']}\n"
+                f"{self._verified_facts(inputs)}"
                 "Cover all safety aspects:\n"
                 "- Emergency contact numbers (local and international)\n"
                 "- Medical facilities and hospitals locations\n"
@@ -310,7 +376,7 @@ class TripTasks:
             expected_output="Complete safety and security guide with emergency protocols, risk mitigation, and local safety intelligence."
         )
 
-    def story_narrative_task(self, agent, inputs):
+    def story_narrative_task(self, agent, inputs, context_tasks=None):
         return Task(
             name="travel_story_creation",
             description=(
@@ -333,6 +399,7 @@ class TripTasks:
                 "Make the itinerary feel like an epic journey."
             ),
             agent=agent,
+            context=context_tasks if context_tasks else [],
             expected_output="Engaging travel narrative that transforms the practical itinerary into an inspiring adventure story with emotional depth."
         )
 
@@ -359,7 +426,8 @@ class TripTasks:
                 "- Packing strategies and tips"
             ),
             agent=agent,
-            expected_output="Detailed packing checklist organized by category with climate considerations, activity requirements, and packing optimization tips."
+            expected_output="Detailed packing checklist organized by category with climate considerations, activity requirements, and packing optimization tips.",
+            **structured_output("smart_packing_guide")
         )
 
     def weather_analysis_task(self, agent, inputs):
@@ -0,0 +1,117 @@
+import asyncio
+import io
+import json
+import threading
+
+import httpx
+import pytest
+import requests
+
+from src.api_services import APIIntegrationService, AsyncAPIIntegrationService
+from src.http_policy import RetryPolicy
+from src.response_cache import ResponseCache
+
+FLIGHTS = {"best_flights": [{"price": 480, "flights": [{"airline": "ANA"}]}]}
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.headers = {}
+        self.content = json.dumps(payload).encode()
+        self.raw = io.BytesIO(self.content)
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.HTTPError(f"HTTP {self.status_code}")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.sent = []
+
+    def get(self, url, params=None, timeout=None, stream=False):
+        self.sent.append((params, stream))
+        return self.responses.pop(0)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def make_service(monkeypatch):
+    monkeypatch.setenv("SERPAPI_KEY", "test-key")
+
+    def make(responses):
+        session = FakeSession(responses)
+        policy = RetryPolicy(max_attempts=3, backoff_base=0.001, backoff_max=0.001)
+        return APIIntegrationService(session=session, retry_policy=policy, cache=False), session
+
+    return make
+
+
+def test_streamed_responses_are_closed_on_retry_and_success(make_service):
+    throttled, served = FakeResponse(503, {"error": "busy"}), FakeResponse(200, FLIGHTS)
+    service, session = make_service([throttled, served])
+
+    offers = service.search_flight_offers("JFK", "NRT", "2026-11-01", "2026-11-08")
+
+    assert [offer.price for offer in offers] == [480.0]
+    assert [stream for _, stream in session.sent] == [True, True]
+    assert throttled.closed and served.closed
+
+
+def test_streamed_error_response_is_closed_before_raising(make_service):
+    missing = FakeResponse(404, {"error": "not found"})
+    service, _ = make_service([missing])
+
+    with pytest.raises(requests.HTTPError):
+        service.search_flight_offers("JFK", "XXX", "2026-11-01")
+    assert missing.closed
+
+
+class ThreadRecordingCache(ResponseCache):
+    """ResponseCache that notes which threads touched SQLite"""
+
+    def __init__(self):
+        super().__init__(":memory:")
+        self.threads = []
+
+    def lookup(self, params):
+        self.threads.append(threading.get_ident())
+        return super().lookup(params)
+
+    def store(self, params, value):
+        self.threads.append(threading.get_ident())
+        super().store(params, value)
+
+
+def test_async_service_keeps_sqlite_off_the_event_loop(monkeypatch):
+    monkeypatch.setenv("SERPAPI_KEY", "test-key")
+    cache = ThreadRecordingCache()
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json={"places": [], "q": request.url.params["q"]}))
+
+    async def main():
+        loop_thread = threading.get_ident()
+        async with httpx.AsyncClient(transport=transport) as client:
+            async with AsyncAPIIntegrationService(client=client, cache=cache) as service:
+                first = await service.search_places("Kyoto")
+                second = await service.search_places("Kyoto")
+        return loop_thread, first, second
+
+    try:
+        loop_thread, first, second = asyncio.run(main())
+    finally:
+        cache.close()
+    assert first == second
+    assert len(cache.threads) == 3
+    assert loop_thread not in cache.threads
@@ -0,0 +1,116 @@
+import json
+import threading
+
+import pytest
+
+import batch_runner
+from batch_runner import BatchRunner, completed_ids, read_items
+
+
+class FakeResult:
+    def __init__(self, inputs):
+        self.inputs = inputs
+        self.metrics = None
+
+    def markdown(self):
+        return {"itinerary": f"{self.inputs['destination']} in {self.inputs['duration']} days"}
+
+    def data(self):
+        return {"itinerary": None}
+
+
+class FakeCrew:
+    """Stands in for EnhancedTripCrew; records every run and fails for destination "Nowhere" """
+
+    runs = []
+    lock = threading.Lock()
+
+    def __init__(self, inputs, max_workers=4, mode="full"):
+        self.inputs = inputs
+        self.mode = mode
+
+    def run_crew(self):
+        with self.lock:
+            self.runs.append((self.inputs['destination'], self.mode))
+        if self.inputs['destination'] == "Nowhere":
+            raise RuntimeError("no such destination")
+        return FakeResult(self.inputs)
+
+
+@pytest.fixture(autouse=True)
+def fake_crew(monkeypatch):
+    FakeCrew.runs = []
+    monkeypatch.setattr(batch_runner, "EnhancedTripCrew", FakeCrew)
+    return FakeCrew
+
+
+def read_records(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_csv_rows_take_the_apps_input_shape(tmp_path):
+    path = tmp_path / "trips.csv"
+    path.write_text(
+        "id,destination,interests,duration,budget,transport_preferences\n"
+        "tokyo,Japan,Food; History,7,3000,\n"
+        "paris,France,Art|Food,5,$2500,Train\n",
+        encoding="utf-8"
+    )
+    assert read_items(str(path)) == [
+        {"id": "tokyo", "destination": "Japan", "interests": ["Food", "History"], "duration": 7, "budget": "$3000"},
+        {"id": "paris", "destination": "France", "interests": ["Art", "Food"], "duration": 5, "budget": "$2500",
+         "transport_preferences": ["Train"]},
+    ]
+
+
+def test_every_item_gets_one_record(tmp_path):
+    output = tmp_path / "plans.jsonl"
+    items = [
+        {"id": "tokyo", "destination": "Japan", "duration": 7},
+        {"id": "lost", "destination": "Nowhere", "duration": 3},
+        {"destination": "France", "duration": 5, "mode": "basic"},
+    ]
+    counts = BatchRunner(str(output), concurrency=3).run(items)
+    assert counts == {'succeeded': 2, 'failed': 1, 'skipped': 0}
+
+    records = {record['id']: record for record in read_records(output)}
+    assert records["tokyo"]['outputs'] == {"itinerary": "Japan in 7 days"}
+    assert records["lost"]['status'] == "failed" and records["lost"]['error'] == "no such destination"
+    france = next(record for record in records.values() if record['inputs']['destination'] == "France")
+    assert france['mode'] == "basic" and "mode" not in france['inputs']
+    assert sorted(FakeCrew.runs) == [("France", "basic"), ("Japan", "full"), ("Nowhere", "full")]
+
+
+def test_identical_inputs_run_once_and_resumed_batches_skip_done_items(tmp_path):
+    output = tmp_path / "plans.jsonl"
+    items = [
+        {"destination": "Japan", "duration": 7},
+        {"destination": "japan", "duration": 7},
+        {"id": "lost", "destination": "Nowhere", "duration": 3},
+    ]
+    assert BatchRunner(str(output)).run(items) == {'succeeded': 1, 'failed': 1, 'skipped': 1}
+    assert len(FakeCrew.runs) == 2
+
+    # Only the failed item is retried
+    FakeCrew.runs = []
+    assert BatchRunner(str(output)).run(items) == {'succeeded': 0, 'failed': 1, 'skipped': 2}
+    assert FakeCrew.runs == [("Nowhere", "full")]
+
+
+def test_limit_caps_the_pending_items(tmp_path):
+    output = tmp_path / "plans.jsonl"
+    items = [{"id": str(duration), "destination": "Japan", "duration": duration} for duration in range(1, 5)]
+    assert BatchRunner(str(output)).run(items, limit=2)['succeeded'] == 2
+    assert BatchRunner(str(output)).run(items) == {'succeeded': 2, 'failed': 0, 'skipped': 2}
+
+
+def test_completed_ids_ignore_a_cut_off_last_line(tmp_path):
+    output = tmp_path / "plans.jsonl"
+    output.write_text(
+        json.dumps({"id": "a", "status": "succeeded"}) + "\n"
+        + json.dumps({"id": "b", "status": "failed"}) + "\n"
+        + '{"id": "c", "stat',
+        encoding="utf-8"
+    )
+    assert completed_ids(str(output)) == {"a"}
+    assert completed_ids(str(tmp_path / "missing.jsonl")) == set()
@@ -0,0 +1,13 @@
+from src.response_cache import cache_key, normalize_params
+
+
+def test_search_text_is_normalized():
+    assert cache_key({"engine": "google", "q": "Visa  Center near TOKYO", "api_key": "a"}) == \
+        cache_key({"engine": "google", "q": "visa center near tokyo", "api_key": "b"})
+
+
+def test_page_tokens_are_kept_exactly():
+    first = {"engine": "google_hotels", "q": "Tokyo", "next_page_token": "CAESAmNk"}
+    second = dict(first, next_page_token="caesamnk")
+    assert cache_key(first) != cache_key(second)
+    assert normalize_params(first)["next_page_token"] == "CAESAmNk"
@@ -0,0 +1,27 @@
+from src.context_compaction import AMOUNT, extract_cost_facts
+
+
+def test_repeated_costs_under_different_days_are_kept():
+    text = "## Day 1\n- Lunch: $25\n- Museum: $15\n## Day 2\n- Lunch: $25\n- Lunch: $25\n"
+    assert extract_cost_facts(text) == [
+        "- Day 1: Lunch: $25",
+        "- Day 1: Museum: $15",
+        "- Day 2: Lunch: $25",
+    ]
+
+
+def test_currency_code_before_amount_is_a_cost():
+    for text in ("Flight: USD 900", "Dinner EUR 45", "Rail pass: JPY50,000", "Taxi: 30 EUR", "Hotel: $120"):
+        assert AMOUNT.search(text), text
+    assert extract_cost_facts("Round trip: USD 900\nNo price here") == ["- Round trip: USD 900"]
+
+
+def test_amounts_in_any_destination_currency_are_costs():
+    for text in ("Trek permit: NPR 3,000", "Desert safari AED 250", "Pho: 60,000 VND", "Ferry: 35 NZD",
+                 "Dinner KRW45000", "Museum: EGP 200"):
+        assert AMOUNT.search(text), text
+
+
+def test_lowercase_words_next_to_numbers_are_not_amounts():
+    for text in ("Day 2 and 3 are free", "Take bus 12 to the old town", "for 3 nights"):
+        assert not AMOUNT.search(text), text
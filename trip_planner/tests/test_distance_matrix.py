@@ -0,0 +1,70 @@
+import numpy as np
+
+from src.distance_matrix import DistanceMatrixService, order_stops
+from src.serpapi_records import Route
+
+# Stops on a line; the fastest tour visits them left to right
+POSITIONS = {"a": 0, "d": 30, "b": 10, "c": 20}
+
+
+class FakeService:
+    def __init__(self):
+        self.searches = []
+
+    def get_routes(self, origin, destination, mode="driving"):
+        self.searches.append((origin, destination, mode))
+        if "nowhere" in (origin, destination):
+            return []
+        minutes = abs(POSITIONS[origin] - POSITIONS[destination])
+        return [Route(mode=mode, duration_seconds=minutes * 60.0, distance_meters=minutes * 500.0)]
+
+
+def line_seconds(positions):
+    return np.abs(np.subtract.outer(positions, positions)).astype(float)
+
+
+def test_order_stops_finds_the_shortest_tour():
+    seconds = line_seconds([0, 30, 10, 20])
+    assert order_stops(seconds) == [0, 2, 3, 1]
+    assert order_stops(seconds, start=1) == [1, 3, 2, 0]
+
+
+def test_order_stops_keeps_the_start_first_on_round_trips():
+    seconds = line_seconds([0, 30, 10, 20])
+    order = order_stops(seconds, start=2, return_to_start=True)
+    assert order[0] == 2 and sorted(order) == [0, 1, 2, 3]
+
+
+def test_order_stops_puts_unreachable_pairs_last():
+    seconds = line_seconds([0, 10, 20])
+    seconds[0, 1] = seconds[1, 0] = np.nan
+    assert order_stops(seconds) == [0, 2, 1]
+
+
+def test_asymmetric_modes_fetch_both_directions_once():
+    service = FakeService()
+    matrix = DistanceMatrixService(service).matrix(list(POSITIONS), "driving")
+    assert len(service.searches) == 12
+    order = matrix.order()
+    assert [matrix.places[index] for index in order] == ["a", "b", "c", "d"]
+    assert matrix.route_seconds(order) == 30 * 60
+
+    DistanceMatrixService(service).matrix(["a", "b"], "driving")
+    assert len(service.searches) == 14
+
+
+def test_symmetric_modes_fill_both_directions_from_one_search():
+    service = FakeService()
+    routes = DistanceMatrixService(service)
+    matrix = routes.matrix(list(POSITIONS), "walking")
+    assert len(service.searches) == 6
+    np.testing.assert_array_equal(matrix.seconds, matrix.seconds.T)
+
+    places, seconds = routes.plan_day(["d", "a", "c"], "walking", start=1)
+    assert places == ["a", "c", "d"] and seconds == 30 * 60
+    assert len(service.searches) == 6
+
+
+def test_missing_routes_are_described():
+    matrix = DistanceMatrixService(FakeService()).matrix(["a", "nowhere"], "walking")
+    assert matrix.describe_route([0, 1]) == "- a -> nowhere: no route found"
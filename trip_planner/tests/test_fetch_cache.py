@@ -0,0 +1,38 @@
+from src.fetch_cache import ConcurrentFetchCache
+
+
+def test_only_missing_keys_are_fetched_and_failures_stay_uncached():
+    calls = []
+
+    def fetch(value):
+        calls.append(value)
+        if value < 0:
+            raise RuntimeError("upstream error")
+        return value * 2
+
+    cache = ConcurrentFetchCache(fetch, fresh_for=60, max_workers=3)
+    found, missing = cache.lookup(["a", "b", "bad"])
+    assert found == {} and missing == ["a", "b", "bad"]
+    assert cache.fetch_many({"a": (1,), "b": (2,), "bad": (-1,)}) == {"a": 2, "b": 4}
+
+    found, missing = cache.lookup(["a", "b", "bad"])
+    assert found == {"a": 2, "b": 4}
+    assert missing == ["bad"]
+    assert sorted(calls) == [-1, 1, 2]
+
+
+def test_entries_expire_after_fresh_for():
+    cache = ConcurrentFetchCache(lambda: None, fresh_for=0)
+    cache.put("a", 1)
+    assert cache.lookup(["a"]) == ({}, ["a"])
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ConcurrentFetchCache(lambda: None, fresh_for=60, max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.lookup(["a"])
+    cache.put("c", 3)
+    assert len(cache) == 2
+    assert cache.lookup(["a", "b", "c"]) == ({"a": 1, "c": 3}, ["b"])
@@ -0,0 +1,138 @@
+import threading
+import time
+
+import pytest
+
+from src.job_queue import FAILED, QUEUED, RUNNING, SUCCEEDED, JobQueue, make_job_store, new_job
+from src.task_graph import TaskEvent
+
+INPUTS = {"destination": "Japan", "duration": 7}
+
+
+class FakeOutput:
+    def __init__(self, name, raw):
+        self.name = name
+        self.raw = raw
+
+
+class FakeResult:
+    def __init__(self, outputs):
+        self.tasks_output = outputs
+
+
+class FakeCrew:
+    """Stands in for run_trip_crew: reports two finished tasks, optionally waiting or failing first"""
+
+    def __init__(self, fail=False, release=None):
+        self.fail = fail
+        self.release = release
+        self.calls = []
+
+    def __call__(self, inputs, mode, on_event, previous=None):
+        self.calls.append((inputs, mode, previous))
+        if self.release is not None:
+            self.release.wait(5)
+        if self.fail:
+            raise RuntimeError("crew failed")
+        outputs = [FakeOutput("research", "Research **notes**"), FakeOutput("itinerary", "```markdown\nDay 1\n```")]
+        for completed, output in enumerate(outputs, start=1):
+            on_event(TaskEvent("started", output.name, completed - 1, len(outputs), None))
+            on_event(TaskEvent("finished", output.name, completed, len(outputs), output))
+        return FakeResult(outputs)
+
+
+def wait_until_finished(queue, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.status(job_id)
+        if job['status'] in (SUCCEEDED, FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    return make_job_store(request.param, str(tmp_path / "jobs.sqlite3"))
+
+
+def test_jobs_run_in_the_background_and_keep_their_outputs(store):
+    crew = FakeCrew()
+    queue = JobQueue(store, run_job=crew)
+    job_id = queue.submit(INPUTS, mode="basic")
+    job = wait_until_finished(queue, job_id)
+    queue.shutdown()
+
+    assert job['status'] == SUCCEEDED and job['error'] is None
+    assert (job['completed'], job['total']) == (2, 2)
+    assert job['outputs'] == {"research": "Research **notes**", "itinerary": "Day 1"}
+    assert job['inputs'] == INPUTS and job['mode'] == "basic"
+    assert crew.calls == [(INPUTS, "basic", None)]
+
+
+def test_progress_is_visible_while_a_job_runs(store):
+    release = threading.Event()
+    queue = JobQueue(store, run_job=FakeCrew(release=release))
+    job_id = queue.submit(INPUTS)
+    deadline = time.monotonic() + 5
+    while queue.status(job_id)['status'] != RUNNING and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert queue.status(job_id)['status'] == RUNNING
+    release.set()
+    assert wait_until_finished(queue, job_id)['status'] == SUCCEEDED
+    queue.shutdown()
+
+
+def test_failed_and_empty_runs_are_marked_failed(store):
+    queue = JobQueue(store, run_job=FakeCrew(fail=True))
+    job = wait_until_finished(queue, queue.submit(INPUTS))
+    assert job['status'] == FAILED and job['error'] == "crew failed"
+
+    queue.run_job = lambda inputs, mode, on_event: None
+    job = wait_until_finished(queue, queue.submit(INPUTS))
+    assert job['status'] == FAILED and job['error'] == "The crew did not return a plan"
+    queue.shutdown()
+
+
+def test_replans_start_from_a_succeeded_job_in_the_same_mode(store):
+    crew = FakeCrew()
+    queue = JobQueue(store, run_job=crew)
+    first = queue.submit(INPUTS)
+    wait_until_finished(queue, first)
+
+    changed = dict(INPUTS, duration=8)
+    wait_until_finished(queue, queue.submit(changed, previous_job_id=first))
+    wait_until_finished(queue, queue.submit(changed, mode="basic", previous_job_id=first))
+    queue.shutdown()
+
+    assert crew.calls[1] == (changed, "full", (INPUTS, {"research": "Research **notes**", "itinerary": "Day 1"}))
+    # A plan from another mode is not reused
+    assert crew.calls[2] == (changed, "basic", None)
+
+
+def test_claims_take_the_oldest_queued_job_once(store):
+    first, second = new_job(INPUTS, "full"), new_job(INPUTS, "basic")
+    second['created_at'] = first['created_at'] + 1
+    store.create(second)
+    store.create(first)
+    assert store.claim_next()['job_id'] == first['job_id']
+    assert store.claim_next()['job_id'] == second['job_id']
+    assert store.claim_next() is None
+    assert store.get(first['job_id'])['status'] == RUNNING
+
+
+def test_queued_jobs_wait_for_a_free_worker(store):
+    release = threading.Event()
+    queue = JobQueue(store, max_workers=1, run_job=FakeCrew(release=release))
+    first, second = queue.submit(INPUTS), queue.submit(INPUTS)
+    time.sleep(0.05)
+    assert queue.status(second)['status'] == QUEUED
+    release.set()
+    for job_id in (first, second):
+        assert wait_until_finished(queue, job_id)['status'] == SUCCEEDED
+    queue.shutdown()
+
+
+def test_unknown_backends_are_rejected():
+    with pytest.raises(ValueError):
+        make_job_store("redis")
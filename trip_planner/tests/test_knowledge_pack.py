@@ -0,0 +1,17 @@
+import os
+
+from src.knowledge_pack import KnowledgePack, build_pack, destination_currency
+
+
+def test_built_pack_answers_lookups(tmp_path):
+    path = os.path.join(tmp_path, "pack.bin")
+    build_pack(pack_path=path)
+    pack = KnowledgePack(path)
+    try:
+        assert pack.country("japan")["currency"] == "JPY"
+        assert pack.resolve("New York, United States") == "USA"
+        assert pack.pair("USA", "Nepal")["destination"] == "Nepal"
+        assert destination_currency("Dubai", pack) == "AED"
+        assert destination_currency("Atlantis", pack) is None
+    finally:
+        pack.close()
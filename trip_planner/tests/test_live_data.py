@@ -0,0 +1,128 @@
+from datetime import date
+
+from src.live_data import LiveTripData, travel_window
+from src.serpapi_records import FlightOffer, HotelOffer, Place, Route
+
+TODAY = date(2026, 10, 18)
+
+# Attractions along one line, listed out of visiting order; each unit is a minute apart
+POSITIONS = {"Museum": 0, "Tower": 30, "Temple": 10, "Market": 20}
+
+INPUTS = {
+    "origin": "New York, USA",
+    "destination": "Japan",
+    "season": "Spring",
+    "duration": 7,
+    "group_size": 2,
+    "budget": "$3,500",
+}
+
+
+class FakeService:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.flight_searches = []
+        self.hotel_searches = []
+        self.route_searches = []
+
+    def search_flight_offers(self, origin, destination, departure_date, return_date=None, travel_class="economy"):
+        self.flight_searches.append((origin, destination, departure_date, return_date))
+        if self.fail:
+            raise RuntimeError("upstream error")
+        days = (date.fromisoformat(return_date) - date.fromisoformat(departure_date)).days
+        return [FlightOffer(price=900 + 10 * days, airlines=["ANA"], route=f"{origin}-{destination}", stops=0,
+                            duration_minutes=840),
+                FlightOffer(price=None, airlines=["JAL"], route=f"{origin}-{destination}", stops=1,
+                            duration_minutes=1020)]
+
+    def iter_hotels(self, destination, check_in, check_out, adults=2, filters=None, limit=None, max_pages=10):
+        self.hotel_searches.append((destination, check_in, check_out, adults, filters))
+        if self.fail:
+            raise RuntimeError("upstream error")
+        for index in range(limit):
+            yield HotelOffer(name=f"{destination} Hotel {index}", price_per_night=100 + 10 * index, amenities=[])
+
+    def get_exchange_rate(self, from_currency="USD", to_currency="EUR"):
+        if self.fail:
+            raise ValueError(f"No exchange rate for {to_currency}")
+        return {'rate': {"JPY": 151.2, "EUR": 0.92}[to_currency], 'date': "2026-10-18"}
+
+    def get_local_places(self, location, query_type="visa center"):
+        return [Place(title=f"{query_type} {index}", address=f"{index} Park Ave, {location}") for index in range(5)]
+
+    def get_places(self, location, place_type="tourist_attraction"):
+        return [Place(title=title) for title in POSITIONS] + [Place(title="Museum")]
+
+    def get_routes(self, origin, destination, mode="driving"):
+        self.route_searches.append((origin, destination, mode))
+        minutes = abs(POSITIONS[origin.split(",")[0]] - POSITIONS[destination.split(",")[0]])
+        return [Route(mode=mode, duration_seconds=minutes * 60.0, distance_meters=minutes * 500.0)]
+
+
+def test_travel_window_is_the_next_mid_season_date():
+    assert travel_window("Spring", 7, today=TODAY) == (date(2027, 4, 15), date(2027, 4, 22))
+    assert travel_window("Winter", 10, today=TODAY) == (date(2027, 1, 15), date(2027, 1, 25))
+    # Too close to book: the next year's season
+    assert travel_window("Autumn", 3, today=TODAY)[0] == date(2027, 10, 15)
+    assert travel_window("Summer", 5, southern=True, today=TODAY)[0] == date(2027, 1, 15)
+    assert travel_window("Any time", "?", today=TODAY) == (date(2026, 11, 8), date(2026, 11, 15))
+
+
+def test_flight_fares_grid_uses_the_gateway_airports():
+    service = FakeService()
+    section = LiveTripData(service).flight_fares(INPUTS)
+    # Nine grid cells, then the cheapest cell again for its itineraries
+    assert len(set(service.flight_searches)) == 9
+    assert service.flight_searches[-1] == ("JFK", "HND", "2027-04-16", "2027-04-21")
+    assert {search[:2] for search in service.flight_searches} == {("JFK", "HND")}
+    assert "JFK (USA's main gateway) to HND" in section
+    assert "Cheapest: Apr 16 - Apr 21 at $950" in section
+    # The cheapest cell's itineraries, priced ones first
+    assert "Itineraries on the cheapest dates (Apr 16 - Apr 21):" in section
+    assert section.index("$950 | ANA | JFK-HND | nonstop") < section.index("price n/a | JAL")
+
+
+def test_flight_fares_are_empty_when_the_trip_cannot_be_priced():
+    assert LiveTripData(FakeService()).flight_fares(dict(INPUTS, origin="Somewhere")) == ""
+    assert LiveTripData(FakeService()).flight_fares(dict(INPUTS, origin="Tokyo, Japan")) == ""
+    assert LiveTripData(FakeService(fail=True)).flight_fares(INPUTS) == ""
+
+
+def test_hotel_offers_are_capped_by_the_budget_share_per_night():
+    service = FakeService()
+    section = LiveTripData(service).hotel_offers(INPUTS)
+    assert service.hotel_searches == [("Tokyo", "2027-04-15", "2027-04-22", 2, {"max_price": 200})]
+    assert "Live hotel rates in Tokyo, Apr 15 - Apr 22 (7 nights, 2 guests, up to $200/night)" in section
+    assert section.count("\n- ") == 6
+
+    assert LiveTripData(FakeService(fail=True)).hotel_offers(INPUTS) == ""
+
+
+def test_attraction_route_orders_the_top_places():
+    service = FakeService()
+    section = LiveTripData(service).attraction_route(INPUTS)
+    assert len(service.route_searches) == 4 * 3
+    assert section.startswith("Top attractions in Tokyo in a travel-efficient visiting order (30 min by transit in total)")
+    assert section.splitlines()[1:] == [
+        "- Museum, Tokyo -> Temple, Tokyo: 10 min transit",
+        "- Temple, Tokyo -> Market, Tokyo: 10 min transit",
+        "- Market, Tokyo -> Tower, Tokyo: 10 min transit",
+    ]
+
+
+def test_exchange_rate_is_quoted_from_the_budget_currency():
+    assert LiveTripData(FakeService()).exchange_rate(INPUTS) == "Live exchange rate (2026-10-18): 1 USD = 151.20 JPY"
+    assert "1 USD = 0.9200 EUR" in LiveTripData(FakeService()).exchange_rate(dict(INPUTS, destination="France"))
+    assert LiveTripData(FakeService()).exchange_rate(dict(INPUTS, destination="USA")) == ""
+    assert LiveTripData(FakeService(fail=True)).exchange_rate(INPUTS) == ""
+
+
+def test_consulates_near_the_origin():
+    section = LiveTripData(FakeService()).consulates(INPUTS)
+    assert section.splitlines() == [
+        "Japan embassy or consulate offices near New York, USA (live search):",
+        "- Japan embassy or consulate 0 | 0 Park Ave, New York, USA",
+        "- Japan embassy or consulate 1 | 1 Park Ave, New York, USA",
+        "- Japan embassy or consulate 2 | 2 Park Ave, New York, USA",
+    ]
+    assert LiveTripData(FakeService()).consulates(dict(INPUTS, origin="Osaka, Japan")) == ""
@@ -0,0 +1,32 @@
+from src.llm_pool import LLMPool
+
+
+class RecordingPool(LLMPool):
+    """LLMPool that hands out model names instead of building real clients"""
+
+    def get(self, model, temperature=0.7, api_key_env=None, **options):
+        return model
+
+
+def test_tier_follows_changed_settings():
+    pool = RecordingPool()
+    assert pool.get_tier("heavy", {"model": "openai/gpt-4"}) == "openai/gpt-4"
+    assert pool.get_tier("heavy", {"model": "openai/gpt-4o"}) == "openai/gpt-4o"
+    assert pool.get_tier("heavy", {"model": "openai/gpt-4o", "temperature": 0.2}) == "openai/gpt-4o"
+
+
+def test_tier_fallback_is_cached_per_configuration():
+    attempts = []
+
+    class FlakyPool(RecordingPool):
+        def get(self, model, temperature=0.7, api_key_env=None, **options):
+            attempts.append(model)
+            if model.startswith("gemini/"):
+                raise RuntimeError("no key")
+            return model
+
+    pool = FlakyPool()
+    settings = {"model": "gemini/gemini-2.0-flash", "fallback": {"model": "openai/gpt-4o-mini"}}
+    assert pool.get_tier("fast", settings) == "openai/gpt-4o-mini"
+    assert pool.get_tier("fast", settings) == "openai/gpt-4o-mini"
+    assert attempts == ["gemini/gemini-2.0-flash", "openai/gpt-4o-mini"]
@@ -0,0 +1,91 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from src import metrics
+from src.metrics import RunMetrics, estimate_cost, model_price, record_api_call, run_scope, task_scope
+
+
+def test_model_prices_match_the_most_specific_name():
+    assert model_price("openai/gpt-4o-mini-2024-07-18") == (0.15, 0.60)
+    assert model_price("gpt-4o") == (2.50, 10.00)
+    assert model_price("gemini/gemini-2.0-flash") == (0.10, 0.40)
+    assert model_price("local-llama") is None
+    assert estimate_cost("gpt-4o", 1_000_000, 100_000) == pytest.approx(3.50)
+    assert estimate_cost("local-llama", 1000, 1000) == 0.0
+
+
+def test_usage_tokens_of_each_provider_shape():
+    assert metrics._usage_tokens({"prompt_tokens": 10, "completion_tokens": 5}) == (10, 5)
+    assert metrics._usage_tokens({"prompt_token_count": 7, "completion_tokens": 2}) == (7, 2)
+    assert metrics._usage_tokens({"input_tokens": 3, "output_tokens": 1}) == (3, 1)
+    assert metrics._usage_tokens({}) == (0, 0)
+
+
+def test_api_calls_attach_to_the_current_task_else_the_run():
+    record_api_call("google", "Search", 200, 0.1, 100, 0)
+    run = RunMetrics(mode="full")
+    task = run.task("research", "Local Expert")
+    with run_scope(run):
+        record_api_call("exchange_rate", "Exchange rate", 200, 0.05, 50, 0)
+        with task_scope(task):
+            record_api_call("google", "Search", 503, 0.2, 0, 1, error="unavailable")
+    assert [call.endpoint for call in run.api_calls] == ["exchange_rate"]
+    assert [call.status for call in task.api_calls] == [503]
+    assert len(run.all_api_calls()) == 2
+
+
+def test_llm_events_are_counted_on_the_current_task():
+    task = RunMetrics().task("itinerary", "Planner")
+    reported = SimpleNamespace(model="gpt-4o", usage={"prompt_tokens": 1000, "completion_tokens": 200},
+                               messages=None, response=None)
+    unreported = SimpleNamespace(model="gpt-4o", usage=None, messages="x" * 400, response="y" * 40)
+    with task_scope(task):
+        metrics._on_llm_call_completed(None, reported)
+        metrics._on_llm_call_completed(None, unreported)
+        metrics._on_llm_call_failed(None, None)
+    # Outside a task the events are ignored
+    metrics._on_llm_call_completed(None, reported)
+
+    assert task.llm_calls == 2 and task.llm_errors == 1
+    assert (task.prompt_tokens, task.completion_tokens) == (1100, 210)
+    assert task.tokens_estimated
+    assert task.cost == pytest.approx(estimate_cost("gpt-4o", 1100, 210))
+
+
+def test_summary_and_agent_totals():
+    run = RunMetrics(mode="basic", run_id="run-1")
+    for name, agent, seconds, tokens, ok in [("research", "Expert", 2.0, 100, True),
+                                             ("itinerary", "Planner", 5.0, 300, True),
+                                             ("weather", "Expert", 1.0, 50, False)]:
+        task = run.task(name, agent)
+        task.mark_queued()
+        task.mark_started()
+        task.started_at -= seconds
+        task.record_llm_call("gpt-4o-mini", tokens, tokens // 2)
+        task.mark_finished(succeeded=ok)
+    run.finish()
+
+    summary = run.summary()
+    assert summary['tasks'] == 3 and summary['failed_tasks'] == 1
+    assert summary['llm_calls'] == 3 and summary['prompt_tokens'] == 450
+    assert summary['slowest_task'] == "itinerary" and summary['costliest_task'] == "itinerary"
+    agents = {agent['agent']: agent for agent in run.by_agent()}
+    assert agents["Expert"]['tasks'] == 2
+    assert agents["Expert"]['wall_time'] == pytest.approx(3.0, abs=0.1)
+
+
+def test_runs_append_json_lines(tmp_path):
+    run = RunMetrics(mode="full", run_id="run-1")
+    task = run.task("research", "Expert")
+    with run_scope(run), task_scope(task):
+        record_api_call("google", "Search", 200, 0.1, 100, 0)
+    path = tmp_path / "metrics" / "runs.jsonl"
+    run.write_jsonl(str(path))
+    run.write_jsonl(str(path))
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(records) == 8
+    assert [record['type'] for record in records[:4]] == ["run", "task", "agent", "api_call"]
+    assert records[3]['task'] == "research" and records[3]['run_id'] == "run-1"
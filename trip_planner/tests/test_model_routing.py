@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from src.model_routing import DEFAULT_TASK_TIERS, DEFAULT_TIERS, ModelRouter
+from src.trip_crew import EnhancedTripCrew
+
+
+def test_task_routes_win_over_agent_routes_and_the_default():
+    router = ModelRouter(task_tiers={"packing_guide": "fast"}, agent_tiers={"local_expert": "fast"})
+    assert router.tier_for(task_name="packing_guide", agent_name="travel_planner") == "fast"
+    assert router.tier_for(task_name="destination_research", agent_name="local_expert") == "fast"
+    assert router.tier_for(task_name="itinerary_creation", agent_name="travel_planner") == "heavy"
+    assert router.tier_for(agent_name="travel_planner") == "heavy"
+
+
+def test_default_routes_name_real_crew_tasks():
+    assert set(DEFAULT_TASK_TIERS) <= set(EnhancedTripCrew.TASK_SPECS)
+    assert ModelRouter().tier_names() == list(DEFAULT_TIERS)
+
+
+def test_unknown_tiers_are_rejected():
+    with pytest.raises(ValueError):
+        ModelRouter(task_tiers={"packing_guide": "tiny"})
+    with pytest.raises(ValueError):
+        ModelRouter.from_config({"default_tier": "tiny"})
+
+
+def test_config_is_merged_over_the_defaults():
+    router = ModelRouter.from_config({
+        "tiers": {"fast": {"model": "openai/gpt-4o-mini"}, "local": {"model": "ollama/llama3"}},
+        "tasks": {"itinerary_creation": "local"},
+        "agents": {"story_narrator": "fast"},
+    })
+    assert router.settings("fast")["model"] == "openai/gpt-4o-mini"
+    # Settings the override leaves out keep their defaults
+    assert router.settings("fast")["fallback"] == DEFAULT_TIERS["fast"]["fallback"]
+    assert router.tier_for(task_name="itinerary_creation") == "local"
+    assert router.tier_for(task_name="packing_guide") == "fast"
+    assert router.tier_for(task_name="travel_story", agent_name="story_narrator") == "fast"
+    assert DEFAULT_TIERS["fast"]["model"] != "openai/gpt-4o-mini"
+
+
+def test_load_reads_the_environment_inline_or_from_a_file(monkeypatch, tmp_path):
+    monkeypatch.delenv("MODEL_ROUTING", raising=False)
+    assert ModelRouter.load().task_tiers == DEFAULT_TASK_TIERS
+
+    monkeypatch.setenv("MODEL_ROUTING", '{"default_tier": "fast"}')
+    assert ModelRouter.load().tier_for(task_name="itinerary_creation") == "fast"
+
+    path = tmp_path / "routing.json"
+    path.write_text(json.dumps({"tasks": {"packing_guide": "heavy"}}), encoding="utf-8")
+    assert ModelRouter.load(str(path)).tier_for(task_name="packing_guide") == "heavy"
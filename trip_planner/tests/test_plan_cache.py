@@ -0,0 +1,129 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src import plan_cache
+from src.plan_cache import PlanCache, canonicalize_inputs, strip_emoji
+
+INPUTS = {
+    "travel_type": "🎒 Backpacker",
+    "destination": "🇯🇵 Japan",
+    "interests": ["🍜 Food", "🏛️ History"],
+    "budget": "$3,000",
+    "duration": 7,
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(plan_cache, "time", clock)
+    return clock
+
+
+def test_emoji_and_whitespace_are_stripped():
+    assert strip_emoji("🇯🇵  Japan ") == "Japan"
+    assert strip_emoji("👨‍👩‍👧‍👦 Family") == "Family"
+
+
+def test_equivalent_inputs_share_a_key():
+    cache = PlanCache()
+    same = dict(INPUTS, travel_type="backpacker", destination="JAPAN", interests=["History", "Food"], budget="3000")
+    assert canonicalize_inputs(same) == canonicalize_inputs(INPUTS)
+    assert cache.key_for(same) == cache.key_for(INPUTS)
+    assert cache.key_for(INPUTS, mode="basic") != cache.key_for(INPUTS)
+    assert cache.key_for(dict(INPUTS, duration=8)) != cache.key_for(INPUTS)
+
+
+def test_budget_buckets_group_nearby_budgets():
+    cache = PlanCache(budget_bucket=500)
+    assert cache.key_for(dict(INPUTS, budget="$3,400")) == cache.key_for(INPUTS)
+    assert cache.key_for(dict(INPUTS, budget="$3,500")) != cache.key_for(INPUTS)
+
+
+def test_results_expire_after_the_ttl(clock):
+    cache = PlanCache(ttl=60)
+    calls = []
+    compute = lambda: calls.append(1) or f"plan {len(calls)}"
+    assert cache.get_or_compute(INPUTS, compute) == "plan 1"
+    clock.now += 59
+    assert cache.get_or_compute(INPUTS, compute) == "plan 1"
+    clock.now += 2
+    assert cache.get(INPUTS) is None
+    assert cache.get_or_compute(INPUTS, compute) == "plan 2"
+
+
+def test_least_recently_used_plans_are_evicted():
+    cache = PlanCache(max_entries=2)
+    for duration in (1, 2):
+        cache.get_or_compute(dict(INPUTS, duration=duration), lambda: f"plan {duration}")
+    cache.get(dict(INPUTS, duration=1))
+    cache.get_or_compute(dict(INPUTS, duration=3), lambda: "plan 3")
+    assert cache.get(dict(INPUTS, duration=2)) is None
+    assert cache.get(dict(INPUTS, duration=1)) == "plan 1"
+
+
+def test_failed_and_empty_runs_are_not_cached():
+    cache = PlanCache()
+
+    def fail():
+        raise RuntimeError("crew failed")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute(INPUTS, fail)
+    assert cache.get_or_compute(INPUTS, lambda: None) is None
+    assert cache.get_or_compute(INPUTS, lambda: "plan") == "plan"
+
+
+def test_concurrent_identical_requests_share_one_run():
+    cache = PlanCache()
+    started, release, calls = threading.Event(), threading.Event(), []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "plan"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        first = pool.submit(cache.get_or_compute, INPUTS, compute)
+        assert started.wait(5)
+        others = [pool.submit(cache.get_or_compute, dict(INPUTS, destination="japan"), compute) for _ in range(3)]
+        release.set()
+        assert [future.result(5) for future in [first, *others]] == ["plan"] * 4
+    assert len(calls) == 1
+
+
+def test_waiters_see_the_owners_failure():
+    cache = PlanCache()
+    started, release = threading.Event(), threading.Event()
+
+    def compute():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("crew failed")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        owner = pool.submit(cache.get_or_compute, INPUTS, compute)
+        assert started.wait(5)
+        waiter = pool.submit(cache.get_or_compute, INPUTS, compute)
+        release.set()
+        for future in (owner, waiter):
+            with pytest.raises(RuntimeError):
+                future.result(5)
+
+
+def test_invalidate_drops_one_plan():
+    cache = PlanCache()
+    cache.get_or_compute(INPUTS, lambda: "plan")
+    cache.invalidate(dict(INPUTS, destination="Japan"))
+    assert cache.get(INPUTS) is None
@@ -0,0 +1,120 @@
+import threading
+import time
+
+import pytest
+
+from src.prefetch import SpeculativePrefetcher
+
+INPUTS = {
+    "origin": "New York, USA",
+    "destination": "Japan",
+    "season": "Spring",
+    "duration": 7,
+    "group_size": 2,
+    "budget": "$3000",
+    "interests": ["Food"],
+}
+
+
+class FakeService:
+    def __init__(self, cache=True):
+        self.cache = object() if cache else None
+        self.calls = []
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def _record(self, name, *args):
+        with self._lock:
+            self.calls.append((name, *args))
+
+    def get_exchange_rate(self, from_currency="USD", to_currency="EUR"):
+        self._record("rate", to_currency)
+        return {'rate': 150.0, 'date': "2026-10-18"}
+
+    def get_local_places(self, location, query_type="visa center"):
+        self._record("local", location, query_type)
+        return []
+
+    def iter_hotels(self, destination, check_in, check_out, adults=2, filters=None, limit=None, max_pages=10):
+        self._record("hotels", destination)
+        return iter(())
+
+    def search_flight_offers(self, origin, destination, departure_date, return_date=None, travel_class="economy"):
+        self._record("flights", origin, destination)
+        return []
+
+    def get_places(self, location, place_type="tourist_attraction"):
+        self._record("places", location)
+        return []
+
+    def close(self):
+        self.closed = True
+
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def service():
+    return FakeService()
+
+
+@pytest.fixture
+def prefetcher(service):
+    prefetcher = SpeculativePrefetcher(delay=0.05, service_factory=lambda: service)
+    yield prefetcher
+    prefetcher.shutdown()
+
+
+def test_every_prompt_section_is_prefetched_once(prefetcher, service):
+    assert prefetcher.schedule(INPUTS)
+    assert not prefetcher.schedule(dict(INPUTS))
+    # Inputs no prefetched section reads do not restart it
+    assert not prefetcher.schedule(dict(INPUTS, interests=["History"]))
+
+    # The 3 x 3 fare grid is the largest section
+    assert wait_for(lambda: len([call for call in service.calls if call[0] == "flights"]) == 9)
+    assert wait_for(lambda: {call[0] for call in service.calls} == {"rate", "local", "hotels", "flights", "places"})
+    assert ("rate", "JPY") in service.calls
+    assert ("local", "New York, USA", "Japan embassy or consulate") in service.calls
+    assert ("hotels", "Tokyo") in service.calls
+    assert ("places", "Tokyo") in service.calls
+
+
+def test_changed_inputs_cancel_the_pending_prefetch(prefetcher, service):
+    assert prefetcher.schedule(dict(INPUTS, destination="France"))
+    assert prefetcher.schedule(INPUTS)
+    assert wait_for(lambda: ("places", "Tokyo") in service.calls)
+    time.sleep(0.1)
+    assert ("places", "Paris") not in service.calls
+
+
+def test_slots_are_debounced_independently(prefetcher, service):
+    assert prefetcher.schedule(INPUTS, slot_id="a")
+    assert prefetcher.schedule(dict(INPUTS, destination="France"), slot_id="b")
+    assert wait_for(lambda: ("places", "Tokyo") in service.calls and ("places", "Paris") in service.calls)
+
+
+def test_cancelled_slots_fetch_nothing(prefetcher, service):
+    assert prefetcher.schedule(INPUTS)
+    prefetcher.cancel()
+    time.sleep(0.15)
+    assert service.calls == []
+
+
+def test_prefetch_stays_off_without_the_response_cache():
+    service = FakeService(cache=False)
+    prefetcher = SpeculativePrefetcher(delay=0.01, service_factory=lambda: service)
+    try:
+        assert prefetcher.schedule(INPUTS)
+        assert wait_for(lambda: service.closed)
+        assert not prefetcher.schedule(dict(INPUTS, destination="France"))
+        assert service.calls == []
+    finally:
+        prefetcher.shutdown()
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from src.rate_limit import ProviderLimiter
+
+
+def make_limiter(concurrency=2):
+    return ProviderLimiter("test", rate=1000, burst=1000, concurrency=concurrency, max_concurrency=concurrency)
+
+
+def test_request_releases_slot_on_success_and_error():
+    limiter = make_limiter()
+    with limiter.request() as request:
+        assert limiter.concurrency.in_flight == 1
+        request.report(200)
+    with pytest.raises(RuntimeError):
+        with limiter.request():
+            raise RuntimeError("boom")
+    assert limiter.concurrency.in_flight == 0
+
+
+def test_throttled_response_lowers_limit():
+    limiter = make_limiter(concurrency=4)
+    with limiter.request() as request:
+        request.report(429)
+    assert limiter.concurrency.limit == 2
+
+
+def test_cancelled_async_request_gives_capacity_back():
+    limiter = make_limiter()
+
+    async def hold():
+        async with limiter.arequest():
+            await asyncio.sleep(10)
+
+    async def main():
+        tasks = [asyncio.ensure_future(hold()) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        assert limiter.concurrency.in_flight == 2
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run(main())
+    assert limiter.concurrency.in_flight == 0
+    assert limiter.concurrency.limit == 2
+    assert limiter.concurrency.try_acquire()
@@ -0,0 +1,67 @@
+from src.replan import changed_input_keys, reusable_outputs, with_dependents
+from src.trip_crew import EnhancedTripCrew
+from src.trip_tasks import TripTasks
+
+INPUTS = {
+    "destination": "🇯🇵 Japan",
+    "interests": ["🍜 Food", "🏛️ History"],
+    "budget": "$3000",
+    "duration": 7,
+}
+
+
+class FakeAgent:
+    role = "planner"
+
+
+class FakeTask:
+    def __init__(self, name, context=None):
+        self.name = name
+        self.description = f"{name} description"
+        self.expected_output = f"{name} output"
+        self.agent = FakeAgent()
+        self.context = context
+
+
+def test_only_canonical_changes_count():
+    same = dict(INPUTS, destination="japan", interests=["History", "Food"], budget="3,000")
+    assert changed_input_keys(INPUTS, same) == set()
+    assert changed_input_keys(INPUTS, dict(INPUTS, budget="$3500", duration=8)) == {"budget", "duration"}
+
+
+def test_dependents_are_rerun_transitively():
+    research = FakeTask("research")
+    itinerary = FakeTask("itinerary", context=[research])
+    story = FakeTask("story", context=[itinerary])
+    packing = FakeTask("packing")
+    tasks = [research, itinerary, story, packing]
+    assert with_dependents(tasks, {id(research)}) == {id(research), id(itinerary), id(story)}
+
+
+def test_unaffected_tasks_reuse_their_previous_output():
+    hotels = FakeTask("hotels")
+    itinerary = FakeTask("itinerary")
+    budget = FakeTask("budget", context=[itinerary, hotels])
+    safety = FakeTask("safety")
+    undeclared = FakeTask("undeclared")
+    tasks = [hotels, itinerary, budget, safety, undeclared]
+    input_keys = {
+        id(hotels): ("budget", "destination"),
+        id(itinerary): ("destination", "interests"),
+        id(budget): ("budget",),
+        id(safety): ("destination",),
+        id(undeclared): None,
+    }
+    previous = {task.name: f"old {task.name}" for task in tasks if task is not safety}
+
+    reused = reusable_outputs(tasks, input_keys, {"budget"}, previous)
+    # safety has no earlier output and undeclared may read anything, so both re-run too
+    assert set(reused) == {id(itinerary)}
+    assert reused[id(itinerary)].raw == "old itinerary"
+    assert reused[id(itinerary)].name == "itinerary"
+
+
+def test_a_budget_change_only_reruns_the_tasks_that_quote_the_budget():
+    methods = {spec[0] for spec in EnhancedTripCrew.TASK_SPECS.values()}
+    reading_budget = {method for method in methods if "budget" in TripTasks.input_keys(method)}
+    assert reading_budget == {"budget_planning_task", "flight_finder_task", "hotel_finder_task", "mystery_mode_task"}
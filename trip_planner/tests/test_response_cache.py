@@ -0,0 +1,131 @@
+import threading
+
+import pytest
+
+from src import response_cache
+from src.response_cache import ResponseCache, shared_response_cache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(response_cache, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def cache():
+    cache = ResponseCache(":memory:", ttls={"test": (60, 120)})
+    yield cache
+    cache.close()
+
+
+PARAMS = {"engine": "test", "q": "tokyo"}
+
+
+def counting_fetch(values):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return values[len(calls) - 1]
+
+    return fetch, calls
+
+
+def test_fresh_entries_are_served_without_fetching(clock, cache):
+    fetch, calls = counting_fetch([{"v": 1}, {"v": 2}])
+    assert cache.get_or_fetch(PARAMS, fetch) == {"v": 1}
+    clock.now += 59
+    assert cache.get_or_fetch(PARAMS, fetch) == {"v": 1}
+    assert len(calls) == 1
+
+
+def test_stale_entries_are_served_while_refreshing_in_the_background(clock, cache):
+    fetch, calls = counting_fetch([{"v": 1}, {"v": 2}])
+    cache.get_or_fetch(PARAMS, fetch)
+    clock.now += 90
+    assert cache.lookup(PARAMS) == ({"v": 1}, "stale")
+    assert cache.get_or_fetch(PARAMS, fetch) == {"v": 1}
+    cache._refresher.shutdown(wait=True)
+    assert len(calls) == 2
+    assert cache.lookup(PARAMS) == ({"v": 2}, "fresh")
+
+
+def test_entries_past_the_stale_window_are_refetched(clock, cache):
+    fetch, calls = counting_fetch([{"v": 1}, {"v": 2}])
+    cache.get_or_fetch(PARAMS, fetch)
+    clock.now += 181
+    assert cache.lookup(PARAMS) == (None, "miss")
+    assert cache.get_or_fetch(PARAMS, fetch) == {"v": 2}
+    assert len(calls) == 2
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    cache = ResponseCache(":memory:", max_entries=2)
+    try:
+        for query in ("a", "b"):
+            cache.store({"engine": "google", "q": query}, {"q": query})
+            clock.now += 1
+        cache.lookup({"engine": "google", "q": "a"})
+        clock.now += 1
+        cache.store({"engine": "google", "q": "c"}, {"q": "c"})
+        assert cache.lookup({"engine": "google", "q": "b"}) == (None, "miss")
+        assert cache.lookup({"engine": "google", "q": "a"})[1] == "fresh"
+    finally:
+        cache.close()
+
+
+def test_entries_persist_across_reopening(tmp_path):
+    path = str(tmp_path / "cache" / "serpapi.sqlite3")
+    cache = ResponseCache(path)
+    cache.store({"engine": "google_maps", "q": "tokyo", "api_key": "secret"}, {"places": [1, 2]})
+    cache.close()
+
+    reopened = ResponseCache(path)
+    try:
+        # The API key is not part of the cache key
+        assert reopened.lookup({"engine": "google_maps", "q": "tokyo", "api_key": "other"}) == ({"places": [1, 2]}, "fresh")
+    finally:
+        reopened.close()
+
+
+def test_failed_fetches_are_not_cached(clock, cache):
+    def fail():
+        raise RuntimeError("upstream error")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_fetch(PARAMS, fail)
+    assert cache.lookup(PARAMS) == (None, "miss")
+
+
+def test_only_one_background_refresh_runs_per_entry(clock, cache):
+    cache.store(PARAMS, {"v": 1})
+    clock.now += 90
+    started, release, calls = threading.Event(), threading.Event(), []
+
+    def slow_fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"v": 2}
+
+    assert cache.get_or_fetch(PARAMS, slow_fetch) == {"v": 1}
+    assert started.wait(5)
+    assert cache.get_or_fetch(PARAMS, slow_fetch) == {"v": 1}
+    release.set()
+    cache._refresher.shutdown(wait=True)
+    assert len(calls) == 1
+
+
+def test_the_shared_cache_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("SERPAPI_CACHE_DISABLED", "1")
+    assert shared_response_cache() is None
@@ -0,0 +1,71 @@
+import io
+import json
+
+from src.serpapi_records import FlightOffer, HotelOffer, Place, page_from_dict, page_to_dict, project
+
+
+class CountingReader:
+    """Readable stream that counts how many bytes were read from it"""
+
+    def __init__(self, data):
+        self.stream = io.BytesIO(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+FLIGHTS = {
+    "search_metadata": {"id": "abc", "images": ["x" * 100]},
+    "best_flights": [{"price": 480, "total_duration": 420, "flights": [
+        {"airline": "ANA", "departure_airport": {"id": "JFK", "time": "2026-11-01 10:00"},
+         "arrival_airport": {"id": "NRT", "time": "2026-11-02 14:00"}}]}],
+    "other_flights": [{"price": 515.5, "total_duration": 600, "flights": [
+        {"airline": "JAL", "departure_airport": {"id": "JFK"}, "arrival_airport": {"id": "HND"}},
+        {"airline": "JAL", "departure_airport": {"id": "HND"}, "arrival_airport": {"id": "NRT"}}]}],
+    "serpapi_pagination": {"next_page_token": "AbC-123_xyZ"},
+}
+
+
+def test_project_reads_the_body_in_one_pass():
+    body = json.dumps(FLIGHTS).encode()
+    stream = CountingReader(body)
+    page = project(stream, "flights")
+    assert stream.bytes_read == len(body)
+    assert [offer.price for offer in page.records] == [480.0, 515.5]
+    assert page.records[1].route == "JFK-HND-NRT"
+    assert page.records[1].stops == 1
+    assert page.next_page_token == "AbC-123_xyZ"
+
+
+def test_project_accepts_bytes_and_skips_other_arrays():
+    body = json.dumps({"properties": [{"name": "Inn", "rate_per_night": {"extracted_lowest": 90},
+                                       "images": [{"thumbnail": "t"}]}],
+                       "ads": [{"name": "Ad"}]}).encode()
+    page = project(body, "hotels")
+    assert page.records == [HotelOffer(name="Inn", price_per_night=90.0, amenities=[])]
+    assert page.next_page_token is None
+
+
+def test_local_places_come_from_the_nested_local_results():
+    body = json.dumps({"local_results": {"places": [{"title": "Consulate-General of Japan", "type": "Consulate",
+                                                     "address": "299 Park Ave"}],
+                                         "more_locations_link": "https://example.com"},
+                       "organic_results": [{"title": "Visa guide"}]}).encode()
+    assert project(body, "local_places").records == [
+        Place(title="Consulate-General of Japan", category="Consulate", address="299 Park Ave")
+    ]
+
+
+def test_page_round_trips_through_a_plain_dict():
+    page = project(json.dumps(FLIGHTS).encode(), "flights")
+    restored = page_from_dict(json.loads(json.dumps(page_to_dict(page))), "flights")
+    assert restored == page
+    assert isinstance(restored.records[0], FlightOffer)
+
+
+def test_records_deduplicate_in_sets():
+    first, second = (HotelOffer(name="Inn", price_per_night=90.0, amenities=["Wi-Fi"]) for _ in range(2))
+    assert len({first, second, HotelOffer(name="Other")}) == 2
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.single_flight import SingleFlight
+
+
+def test_concurrent_sync_calls_share_one_execution():
+    flights, calls, results = SingleFlight(), [], []
+    started = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        time.sleep(0.05)
+        return "value"
+
+    def caller():
+        results.append(flights.do("key", fetch))
+
+    threads = [threading.Thread(target=caller) for _ in range(5)]
+    threads[0].start()
+    started.wait()
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == ["value"] * 5
+    assert flights.in_flight() == 0
+
+
+def test_errors_reach_every_waiter_and_are_not_kept():
+    flights = SingleFlight()
+
+    def fail():
+        raise ValueError("upstream down")
+
+    with pytest.raises(ValueError):
+        flights.do("key", fail)
+    assert flights.do("key", lambda: "recovered") == "recovered"
+
+
+def test_async_calls_coalesce():
+    flights, calls = SingleFlight(), []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return len(calls)
+
+    async def main():
+        return await asyncio.gather(*(flights.do_async("key", fetch) for _ in range(4)))
+
+    assert asyncio.run(main()) == [1, 1, 1, 1]
+    assert len(calls) == 1
+
+
+def test_cancelling_the_leader_does_not_cancel_followers():
+    flights = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return "value"
+
+    async def main():
+        leader = asyncio.ensure_future(flights.do_async("key", fetch))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(flights.do_async("key", fetch)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*followers)
+
+    assert asyncio.run(main()) == ["value", "value"]
+    assert flights.in_flight() == 0
+
+
+def test_cancelling_a_follower_leaves_the_call_running():
+    flights = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.03)
+        return "value"
+
+    async def main():
+        leader = asyncio.ensure_future(flights.do_async("key", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.do_async("key", fetch))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        await asyncio.gather(follower, return_exceptions=True)
+        return await leader
+
+    assert asyncio.run(main()) == "value"
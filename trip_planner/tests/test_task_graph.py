@@ -0,0 +1,106 @@
+import time
+
+import pytest
+
+from src.task_graph import TaskGraphExecutor
+
+
+class FakeAgent:
+    def __init__(self, role):
+        self.role = role
+
+
+class FakeOutput:
+    def __init__(self, name, raw):
+        self.name = name
+        self.raw = raw
+
+
+class FakeTask:
+    """Stands in for a crewai Task: records when it ran and the context it was given"""
+
+    def __init__(self, name, agent, context=None, duration=0.02, log=None, fail=False):
+        self.name = name
+        self.agent = agent
+        self.context = context
+        self.duration = duration
+        self.log = log if log is not None else []
+        self.fail = fail
+        self.received_context = None
+
+    def execute_sync(self, agent=None, context=None):
+        self.received_context = context
+        self.log.append(("start", self.name, time.monotonic()))
+        time.sleep(self.duration)
+        self.log.append(("end", self.name, time.monotonic()))
+        if self.fail:
+            raise RuntimeError(f"{self.name} failed")
+        return FakeOutput(self.name, f"{self.name} output")
+
+
+def times(log, kind):
+    return {name: at for event, name, at in log if event == kind}
+
+
+def test_tasks_start_only_after_their_dependencies_finish():
+    log = []
+    research = FakeTask("research", FakeAgent("researcher"), log=log)
+    weather = FakeTask("weather", FakeAgent("meteorologist"), log=log)
+    itinerary = FakeTask("itinerary", FakeAgent("planner"), context=[research, weather], log=log)
+    budget = FakeTask("budget", FakeAgent("accountant"), context=[itinerary], log=log)
+
+    result = TaskGraphExecutor([budget, itinerary, weather, research], max_workers=4).run()
+
+    started, ended = times(log, "start"), times(log, "end")
+    assert started["itinerary"] >= max(ended["research"], ended["weather"])
+    assert started["budget"] >= ended["itinerary"]
+    # Independent tasks overlap
+    assert started["weather"] < ended["research"] and started["research"] < ended["weather"]
+    assert "research output" in itinerary.received_context
+    assert "weather output" in itinerary.received_context
+    assert [output.name for output in result.tasks_output] == ["budget", "itinerary", "weather", "research"]
+    assert result.raw == "research output"
+
+
+def test_tasks_of_one_agent_never_run_at_the_same_time():
+    log, agent = [], FakeAgent("planner")
+    tasks = [FakeTask(f"task {index}", agent, log=log) for index in range(3)]
+    tasks.append(FakeTask("other", FakeAgent("researcher"), log=log))
+
+    TaskGraphExecutor(tasks, max_workers=4).run()
+
+    spans = sorted((times(log, "start")[task.name], times(log, "end")[task.name]) for task in tasks[:3])
+    for (_, first_end), (second_start, _) in zip(spans, spans[1:]):
+        assert second_start >= first_end
+    assert times(log, "start")["other"] < spans[0][1]
+
+
+def test_precomputed_outputs_are_reused_not_run():
+    research = FakeTask("research", FakeAgent("researcher"))
+    itinerary = FakeTask("itinerary", FakeAgent("planner"), context=[research])
+    previous = FakeOutput("research", "earlier research")
+
+    TaskGraphExecutor([research, itinerary], precomputed={id(research): previous}).run()
+
+    assert research.received_context is None
+    assert itinerary.received_context == "earlier research"
+
+
+def test_cycles_are_rejected():
+    first = FakeTask("first", FakeAgent("a"))
+    second = FakeTask("second", FakeAgent("b"), context=[first])
+    first.context = [second]
+    with pytest.raises(ValueError):
+        TaskGraphExecutor([first, second])
+
+
+def test_failure_is_raised_and_reported():
+    events = []
+    failing = FakeTask("research", FakeAgent("researcher"), fail=True)
+    dependent = FakeTask("itinerary", FakeAgent("planner"), context=[failing])
+
+    with pytest.raises(RuntimeError):
+        TaskGraphExecutor([failing, dependent], on_event=events.append).run()
+
+    assert [(event.kind, event.task_name) for event in events] == [("started", "research"), ("failed", "research")]
+    assert dependent.received_context is None